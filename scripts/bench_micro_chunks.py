@@ -0,0 +1,58 @@
+"""Benchmark micro-chunking on synthetic long transcripts.
+
+    python scripts/bench_micro_chunks.py [--hours 4] [--caption-sec 0.5] [--compare]
+
+`--compare` also times the previous rescan-every-window implementation (quadratic).
+"""
+from __future__ import annotations
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from yt_channel_expert.processing.chunking import build_micro_chunks
+from yt_channel_expert.types import TranscriptSegment
+
+# The quadratic reference chunker lives with the tests that check against it
+_TESTS_DIR = Path(__file__).resolve().parents[1] / "tests"
+
+def synthetic_transcript(hours: float, caption_sec: float, seed: int = 0):
+    rng = random.Random(seed)
+    segs, t = [], 0
+    end = int(hours * 3600 * 1000)
+    step = int(caption_sec * 1000)
+    while t < end:
+        dur = rng.randint(step, 3 * step)
+        segs.append(TranscriptSegment(video_id="bench", start_ms=t, end_ms=t + dur, text=f"caption line {len(segs)}"))
+        t += rng.randint(step // 2, step * 3 // 2)
+    return segs
+
+def _time(fn, *args, repeat: int = 3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, default=4.0)
+    ap.add_argument("--caption-sec", type=float, default=0.5)
+    ap.add_argument("--compare", action="store_true")
+    args = ap.parse_args()
+
+    segs = synthetic_transcript(args.hours, args.caption_sec)
+    secs, chunks = _time(build_micro_chunks, segs)
+    print(f"{len(segs)} segments -> {len(chunks)} chunks: {secs * 1000:.1f} ms ({len(segs) / secs:,.0f} segments/s)")
+    if args.compare:
+        sys.path.insert(0, str(_TESTS_DIR))
+        from chunking_reference import rescan_chunks
+
+        old_secs, old = _time(rescan_chunks, segs, repeat=1)
+        assert old == chunks, "outputs differ"
+        print(f"rescan implementation: {old_secs * 1000:.1f} ms ({old_secs / secs:.0f}x slower)")
+
+if __name__ == "__main__":
+    main()
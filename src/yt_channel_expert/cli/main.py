@@ -1,26 +1,29 @@
 from __future__ import annotations
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, List
 import json
 import typer
-from rich.console import Console
-from rich.pretty import Pretty
-
-from ..config import PackConfig
-from ..pack.pack_builder import PackBuilder
-from ..rag.answerer import Answerer
-from ..rag.prompts import build_messages
-from ..pack.pack_reader import PackReader
-from ..embeddings.factory import make_embedder
-from ..llm.factory import make_llm
-from ..rag.retriever import PackRetriever
+
+# Heavy modules (numpy, pydantic, sqlite3, tqdm, the pack/rag layers) are imported inside the
+# commands that need them, so `ytce --help` and `ytce pack info` start fast.
+if TYPE_CHECKING:
+    from rich.console import Console
+    from ..config import PackConfig
+    from ..rag.answerer import Answerer
 
 app = typer.Typer(no_args_is_help=True)
-console = Console()
 
 pack_app = typer.Typer(no_args_is_help=True)
 app.add_typer(pack_app, name="pack")
 
+@lru_cache(maxsize=None)
+def _console() -> Console:
+    from rich.console import Console
+    return Console()
+
 def _load_cfg(config: Path | None) -> PackConfig:
+    from ..config import PackConfig
     if config is None:
         return PackConfig()
     return PackConfig.model_validate_json(config.read_text(encoding="utf-8"))
@@ -30,61 +33,102 @@ def pack_build(
     input: Path = typer.Option(..., "--input", "-i", help="Input folder with channel.json, videos.json, transcripts/"),
     out: Path = typer.Option(..., "--out", "-o", help="Output .pack file"),
     config: Path = typer.Option(None, "--config", "-c", help="Optional JSON config file (PackConfig as JSON)"),
+    workers: int = typer.Option(1, "--workers", "-w", help="Worker processes for parsing/chunking/auto-chaptering videos"),
 ):
+    from ..pack.pack_builder import PackBuilder
     cfg = _load_cfg(config)
-    builder = PackBuilder(cfg)
+    builder = PackBuilder(cfg, workers=workers)
     out_path = builder.build_from_folder(input, out)
-    console.print(f"[green]Wrote pack:[/green] {out_path}")
+    _console().print(f"[green]Wrote pack:[/green] {out_path}")
+
+@pack_app.command("update")
+def pack_update(
+    pack: Path = typer.Option(..., "--pack", "-p", help="Existing .pack file to update"),
+    input: Path = typer.Option(..., "--input", "-i", help="Input folder with channel.json, videos.json, transcripts/"),
+    out: Path = typer.Option(None, "--out", "-o", help="Write the updated pack here instead of replacing --pack"),
+    config: Path = typer.Option(None, "--config", "-c", help="JSON config the pack was built with (PackConfig as JSON)"),
+    workers: int = typer.Option(1, "--workers", "-w", help="Worker processes for parsing/chunking/auto-chaptering videos"),
+):
+    from ..pack.pack_builder import PackBuilder
+    cfg = _load_cfg(config)
+    builder = PackBuilder(cfg, workers=workers)
+    res = builder.update_pack(pack, input, out)
+    _console().print(
+        f"[green]Updated pack:[/green] {res.pack_path} "
+        f"(added={len(res.added)} changed={len(res.changed)} removed={len(res.removed)} unchanged={res.unchanged})"
+    )
 
 @pack_app.command("info")
 def pack_info(pack: Path = typer.Option(..., "--pack", "-p")):
     import zipfile
+    from rich.pretty import Pretty
     with zipfile.ZipFile(pack, "r") as z:
         manifest = json.loads(z.read("manifest.json").decode("utf-8"))
-    console.print(Pretty(manifest))
+    _console().print(Pretty(manifest))
 
 @pack_app.command("ask")
 def pack_ask(
-    pack: Path = typer.Option(..., "--pack", "-p"),
-    question: str = typer.Option(..., "--question", "-q"),
+    pack: List[Path] = typer.Option(..., "--pack", "-p", help="Pack to search; repeat to search several channels at once"),
+    question: str = typer.Option(None, "--question", "-q"),
     config: Path = typer.Option(None, "--config", "-c", help="Optional JSON config file (PackConfig as JSON)"),
     stream: bool = typer.Option(False, "--stream", help="Stream output if backend supports it"),
+    questions_file: Path = typer.Option(None, "--questions-file", help="JSONL with a 'question' per line; answers go to --out"),
+    out: Path = typer.Option(None, "--out", "-o", help="JSONL output for --questions-file (default: stdout)"),
+    concurrency: int = typer.Option(4, "--concurrency", help="Concurrent generations for --questions-file"),
 ):
+    if (question is None) == (questions_file is None):
+        raise typer.BadParameter("Pass exactly one of --question or --questions-file")
+    from rich.pretty import Pretty
+    from ..rag.answerer import Answerer
+    from ..rag.prompts import build_messages
     cfg = _load_cfg(config)
 
+    answerer = Answerer(cfg)
+    # One pack: a plain session. Several: searched together (same embedding model required).
+    open_session = (lambda: answerer.open_session(pack[0])) if len(pack) == 1 else (lambda: answerer.open_federated_session(pack))
+
+    if questions_file is not None:
+        _ask_batch(answerer, open_session, questions_file, out, concurrency)
+        raise typer.Exit()
+
     if not stream:
-        ans = Answerer(cfg).answer(str(pack), question)
-        console.print(ans.answer)
-        console.print()
-        console.print(f"citations_present={ans.citations_present}")
-        console.print(Pretty(ans.debug))
+        with open_session() as session:
+            ans = answerer.answer(session, question)
+        _console().print(ans.answer)
+        _console().print()
+        _console().print(f"citations_present={ans.citations_present}")
+        _console().print(Pretty(ans.debug))
         raise typer.Exit()
 
     # Streaming pipeline
-    embedder = make_embedder(cfg.embedding)
-    llm = make_llm(cfg.llm)
-
-    with PackReader(pack) as pr:
-        conn = pr.connect()
-        manifest = pr.paths.manifest if pr.paths else {}
-        channel_title = manifest.get("channel_title", "Unknown Channel")
-
-        sec_emb, chunk_emb = pr.load_embeddings()
-        bm25_docs = pr.load_bm25_docs()
-
-        retriever = PackRetriever(conn, embedder, sec_emb, chunk_emb, bm25_docs=bm25_docs)
-        ctx = retriever.retrieve(
-            question,
-            top_sections=cfg.retrieval.top_sections,
-            top_chunks=cfg.retrieval.top_chunks,
-            bm25_top_k=cfg.retrieval.bm25_top_k,
-        )
-
-        messages = build_messages(question, channel_title, ctx.section_summaries, ctx.chunks)
+    with open_session() as session:
+        ctx = session.retrieve(question)
+
+        messages = build_messages(question, session.channel_title, ctx.section_summaries, ctx.chunks)
         response_format = {"type": "text"}
 
-        for delta in llm.stream_generate(messages, response_format=response_format):
-            console.print(delta, end="")
+        for delta in answerer.llm.stream_generate(messages, response_format=response_format):
+            _console().print(delta, end="")
+
+        _console().print()
+        _console().print(Pretty({"sections": ctx.section_summaries, "chunks": len(ctx.chunks)}))
 
-        console.print()
-        console.print(Pretty({"sections": ctx.section_summaries, "chunks": len(ctx.chunks)}))
+def _ask_batch(answerer: Answerer, open_session, questions_file: Path, out: Path | None, concurrency: int) -> None:
+    """Answer every line of a JSONL file; each output line is the input object plus the answer."""
+    rows = [json.loads(line) for line in questions_file.read_text(encoding="utf-8").splitlines() if line.strip()]
+    missing = [i + 1 for i, r in enumerate(rows) if not isinstance(r, dict) or not r.get("question")]
+    if missing:
+        raise typer.BadParameter(f"Lines without a 'question' field: {missing[:10]}", param_hint="--questions-file")
+    with open_session() as session:
+        results = answerer.answer_batch(session, [r["question"] for r in rows], max_concurrency=concurrency)
+    lines = [
+        json.dumps({**r, "answer": res.answer, "citations_present": res.citations_present, "debug": res.debug}, ensure_ascii=False)
+        for r, res in zip(rows, results)
+    ]
+    if out is None:
+        for line in lines:
+            print(line)
+        return
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+    _console().print(f"[green]Wrote {len(lines)} answers:[/green] {out}")
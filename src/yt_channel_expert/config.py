@@ -1,6 +1,8 @@
 from __future__ import annotations
 from pydantic import BaseModel, Field, ConfigDict
+from pathlib import Path
 from typing import Literal, Optional, Dict, Any
+import os
 import yaml
 
 class EmbeddingConfig(BaseModel):
@@ -8,6 +10,20 @@ class EmbeddingConfig(BaseModel):
     backend: Literal["hash", "sentence_transformer"] = "hash"
     model_name: str = "hash-384"
     dim: int = 384
+    # Content-addressed embedding cache under `default_cache_dir()`, shared across builds
+    cache: bool = True
+    cache_max_mb: int = 2048
+    # Processes used to embed large batches: sentence_transformer runs a multi-process
+    # encode pool, the hash backend shards batches of 8192+ texts
+    workers: int = 1
+    # Texts per model forward pass (sentence_transformer)
+    batch_size: int = 64
+    # In-memory LRU of query embeddings used when answering; 0 disables it
+    query_cache_size: int = 1024
+    # How pack embedding matrices are stored: float32, float16, or int8 with per-row scales.
+    # `keep_full_precision` also stores a float32 copy for exact rescoring.
+    storage_dtype: Literal["float32", "float16", "int8"] = "float32"
+    keep_full_precision: bool = False
 
 class LLMConfig(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
@@ -27,8 +43,9 @@ class LLMConfig(BaseModel):
 
     # For llmhub backend, recommended keys:
     #   base_url: "http://localhost:8787"
-    #   timeout_s: 60
+    #   timeout_s: 60         (per request: connect and each read)
     #   verify_tls: true
+    #   pool_size: 8          (idle keep-alive connections kept for reuse)
     extra: Dict[str, Any] = Field(default_factory=dict)
 
 class ChunkingConfig(BaseModel):
@@ -38,10 +55,41 @@ class ChunkingConfig(BaseModel):
     max_section_sec: int = 12 * 60
 
 class RetrievalConfig(BaseModel):
+    # Episode-summary tier: search only the sections/chunks of this many best videos (0 = off)
+    top_episodes: int = 0
     top_sections: int = 5
     top_chunks: int = 10
     use_bm25: bool = True
     bm25_top_k: int = 20
+    # Re-score this many vector candidates exactly (needs a pack built with keep_full_precision)
+    rescore_candidates: int = 0
+    # Coarse-to-fine: score chunks (vector and BM25) only inside the `top_sections` best sections
+    hierarchical: bool = False
+    # Vector index, built at pack build time and stored in the pack. "ivfpq" covers chunks,
+    # "hnsw" sections and chunks; packs without one (or without hnswlib installed) fall back
+    # to brute force. None builds brute force (`pack update` keeps the pack's kind) and,
+    # when querying, uses the kind recorded in the pack manifest; a value overrides it.
+    # `ivf_nlist`/`pq_m` = 0 pick sizes from the data.
+    vector_index: Optional[Literal["brute_force", "ivfpq", "hnsw"]] = None
+    ivf_nlist: int = 0
+    pq_m: int = 0
+    # IVF lists scanned per query: higher = better recall, slower
+    nprobe: int = 8
+    # HNSW graph degree / build-time and query-time beam widths
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 200
+    hnsw_ef: int = 50
+
+class AnswerCacheConfig(BaseModel):
+    # Reuse generated answers for repeated questions (see rag/answer_cache.py).
+    # Stored in `path` or `default_cache_dir()/answers.sqlite`.
+    enabled: bool = False
+    path: Optional[str] = None
+    ttl_s: Optional[int] = 7 * 24 * 3600
+    max_entries: int = 10000
+    # Cosine threshold for reusing a paraphrased question's answer (same evidence only);
+    # None disables the near-duplicate lookup.
+    similarity: Optional[float] = None
 
 class PackConfig(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
@@ -50,8 +98,18 @@ class PackConfig(BaseModel):
     chunking: ChunkingConfig = Field(default_factory=ChunkingConfig)
     retrieval: RetrievalConfig = Field(default_factory=RetrievalConfig)
     llm: LLMConfig = Field(default_factory=LLMConfig)
+    answer_cache: AnswerCacheConfig = Field(default_factory=AnswerCacheConfig)
 
 def load_config(path: str) -> PackConfig:
     with open(path, "r", encoding="utf-8") as f:
         data = yaml.safe_load(f)
     return PackConfig.model_validate(data)
+
+def default_cache_dir() -> Path:
+    """Root for on-disk caches (pack DBs, ...). Override with `YTCE_CACHE_DIR`."""
+    env = os.environ.get("YTCE_CACHE_DIR")
+    if env:
+        return Path(env)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "yt_channel_expert"
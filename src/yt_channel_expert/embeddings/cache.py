@@ -0,0 +1,172 @@
+from __future__ import annotations
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..config import default_cache_dir
+from .embedder import Embedder
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding (
+  key BLOB PRIMARY KEY,      -- sha256(model_id, dim, text)
+  vec BLOB NOT NULL,         -- float32, dim values
+  nbytes INTEGER NOT NULL,
+  last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embedding_last_used ON embedding(last_used);
+-- Running SUM(nbytes), kept by triggers so no writer has to scan the vectors to size the cache
+CREATE TABLE IF NOT EXISTS embedding_size (id INTEGER PRIMARY KEY CHECK (id = 0), nbytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO embedding_size(id, nbytes) SELECT 0, COALESCE(SUM(nbytes), 0) FROM embedding;
+CREATE TRIGGER IF NOT EXISTS embedding_size_ins AFTER INSERT ON embedding
+  BEGIN UPDATE embedding_size SET nbytes = nbytes + NEW.nbytes WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS embedding_size_del AFTER DELETE ON embedding
+  BEGIN UPDATE embedding_size SET nbytes = nbytes - OLD.nbytes WHERE id = 0; END;
+"""
+
+# SQLite caps bound parameters per statement; keep IN (...) lists below it.
+_BATCH = 500
+
+class EmbeddingCache:
+    """Content-addressed on-disk embedding store, shared by every build on the machine.
+
+    Vectors are keyed by (model id, dim, text hash), so any text embedded once by the same
+    model is never embedded again. The store is a SQLite file in WAL mode with a busy
+    timeout, which lets concurrent builds (and `--workers` processes) read and write it.
+    When it grows past `max_bytes`, least-recently-used vectors are evicted.
+
+    Reads never write: `last_used` touches are buffered and flushed with the next
+    `put_many` (or `close`), so pure cache hits take no write lock.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = 2 << 30) -> None:
+        self.path = Path(path) if path is not None else default_cache_dir() / "embeddings.sqlite"
+        self.max_bytes = int(max_bytes)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._touched: Dict[bytes, int] = {}
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def key(model_id: str, dim: int, text: str) -> bytes:
+        h = hashlib.sha256()
+        h.update(f"{model_id}\0{int(dim)}\0".encode("utf-8"))
+        h.update(text.encode("utf-8"))
+        return h.digest()
+
+    def get_many(self, keys: Sequence[bytes], dim: int) -> Dict[bytes, np.ndarray]:
+        out: Dict[bytes, np.ndarray] = {}
+        now = int(time.time())
+        with self._lock:
+            for i in range(0, len(keys), _BATCH):
+                batch = list(keys[i:i + _BATCH])
+                marks = ",".join("?" * len(batch))
+                for key, vec in self._conn.execute(f"SELECT key, vec FROM embedding WHERE key IN ({marks})", batch):
+                    arr = np.frombuffer(vec, dtype=np.float32)
+                    if arr.shape[0] == dim:
+                        out[bytes(key)] = arr
+                        self._touched[bytes(key)] = now
+            # End the read transaction; touches are written by the next put_many
+            self._conn.commit()
+        return out
+
+    def put_many(self, keys: Sequence[bytes], vecs: np.ndarray) -> None:
+        now = int(time.time())
+        vecs = np.ascontiguousarray(vecs, dtype=np.float32)
+        rows = [(k, vecs[i].tobytes(), int(vecs[i].nbytes), now) for i, k in enumerate(keys)]
+        with self._lock:
+            self._flush_touched()
+            # Same key means same text and model, so an existing row only needs touching
+            self._conn.executemany(
+                "INSERT INTO embedding(key, vec, nbytes, last_used) VALUES (?,?,?,?) "
+                "ON CONFLICT(key) DO UPDATE SET last_used = excluded.last_used",
+                rows,
+            )
+            self._conn.commit()
+            self._evict()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        return int(self._conn.execute("SELECT nbytes FROM embedding_size WHERE id = 0").fetchone()[0])
+
+    def _flush_touched(self) -> None:
+        if not self._touched:
+            return
+        self._conn.executemany("UPDATE embedding SET last_used = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()])
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% so eviction is not re-run on every insert once the cache is full.
+        excess = total - int(self.max_bytes * 0.9)
+        doomed: List[bytes] = []
+        freed = 0
+        for key, nbytes in self._conn.execute("SELECT key, nbytes FROM embedding ORDER BY last_used, rowid"):
+            doomed.append(key)
+            freed += int(nbytes)
+            if freed >= excess:
+                break
+        for i in range(0, len(doomed), _BATCH):
+            batch = doomed[i:i + _BATCH]
+            self._conn.execute(f"DELETE FROM embedding WHERE key IN ({','.join('?' * len(batch))})", batch)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+class CachedEmbedder(Embedder):
+    """Wrap an embedder so texts already in the `EmbeddingCache` are not recomputed."""
+
+    def __init__(self, inner: Embedder, model_id: str, cache: EmbeddingCache) -> None:
+        self.inner = inner
+        self.model_id = model_id
+        self.cache = cache
+
+    @property
+    def dim(self) -> int:
+        return self.inner.dim
+
+    def warmup(self) -> None:
+        self.inner.warmup()
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        dim = self.dim
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        if not texts:
+            return out
+        keys = [EmbeddingCache.key(self.model_id, dim, t) for t in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)), dim)
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing: Dict[bytes, int] = {}
+        for k, t in zip(keys, texts):
+            if k not in found and k not in missing:
+                missing[k] = len(missing)
+        if missing:
+            miss_texts = [""] * len(missing)
+            for k, t in zip(keys, texts):
+                if k in missing:
+                    miss_texts[missing[k]] = t
+            vecs = np.asarray(self.inner.embed_texts(miss_texts), dtype=np.float32)
+            self.cache.put_many(list(missing), vecs)
+            for k, j in missing.items():
+                found[k] = vecs[j]
+        for i, k in enumerate(keys):
+            out[i] = found[k]
+        return out
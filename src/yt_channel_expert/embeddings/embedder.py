@@ -13,3 +13,8 @@ class Embedder(ABC):
     def embed_texts(self, texts: List[str]) -> np.ndarray:
         """Return embeddings array of shape (len(texts), dim)."""
         raise NotImplementedError
+
+    def warmup(self) -> None:
+        """Pay one-time costs (model load, first-batch kernel setup) now rather than on the
+        first real request. Safe to call more than once."""
+        self.embed_texts(["warmup"])
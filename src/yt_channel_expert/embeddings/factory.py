@@ -3,10 +3,27 @@ from ..config import EmbeddingConfig
 from .embedder import Embedder
 from .hash_embedder import HashEmbedder
 
-def make_embedder(cfg: EmbeddingConfig) -> Embedder:
+def make_embedder(cfg: EmbeddingConfig, cached: bool = False, query_cache: bool = False) -> Embedder:
+    """Build the configured embedder.
+
+    `cached=True` (pack builds) adds the on-disk cache; `query_cache=True` (answering)
+    adds the in-memory LRU of query embeddings.
+    """
+    emb = _make_backend(cfg)
+    model_id = f"{cfg.backend}:{cfg.model_name}"
+    if query_cache and cfg.query_cache_size > 0:
+        from .query_cache import QueryCachedEmbedder
+        emb = QueryCachedEmbedder(emb, model_id=model_id, max_entries=cfg.query_cache_size)
+    if not (cached and cfg.cache):
+        return emb
+    from .cache import CachedEmbedder, EmbeddingCache
+    cache = EmbeddingCache(max_bytes=cfg.cache_max_mb << 20)
+    return CachedEmbedder(emb, model_id=model_id, cache=cache)
+
+def _make_backend(cfg: EmbeddingConfig) -> Embedder:
     if cfg.backend == "hash":
-        return HashEmbedder(dim=cfg.dim)
+        return HashEmbedder(dim=cfg.dim, workers=cfg.workers)
     if cfg.backend == "sentence_transformer":
         from .sentence_transformer_embedder import SentenceTransformerEmbedder
-        return SentenceTransformerEmbedder(model_name=cfg.model_name)
+        return SentenceTransformerEmbedder(model_name=cfg.model_name, batch_size=cfg.batch_size, workers=cfg.workers)
     raise ValueError(f"Unknown embedding backend: {cfg.backend}")
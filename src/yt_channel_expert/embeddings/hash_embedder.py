@@ -1,9 +1,16 @@
 from __future__ import annotations
 import hashlib
-from typing import List
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
 import numpy as np
 from .embedder import Embedder
 
+# Batches at least this large are split across processes when `workers > 1`
+_SHARD_MIN_TEXTS = 8192
+# Memo entries kept per embedder before the table is reset (bounds memory on huge vocabularies)
+_MEMO_MAX = 1 << 20
+
 class HashEmbedder(Embedder):
     """Deterministic lightweight embedding using feature hashing.
 
@@ -14,24 +21,56 @@ class HashEmbedder(Embedder):
     - allows testing the pipeline end-to-end.
 
     Replace with SentenceTransformerEmbedder or another production embedder.
+
+    Each distinct token is hashed once (memoized as `bucket * 2 + negative`), and a batch
+    is accumulated with one `np.bincount` over all its tokens. Counts are integers, so the
+    result is bit-identical to adding ±1 per token occurrence.
     """
-    def __init__(self, dim: int = 384):
+    def __init__(self, dim: int = 384, workers: int = 1):
         self._dim = int(dim)
+        self.workers = max(1, int(workers))
+        self._memo: Dict[str, int] = {}
+        self._lock = threading.Lock()
 
     @property
     def dim(self) -> int:
         return self._dim
 
     def embed_texts(self, texts: List[str]) -> np.ndarray:
-        mat = np.zeros((len(texts), self._dim), dtype=np.float32)
-        for i, t in enumerate(texts):
-            # simple tokenization
-            for token in t.lower().split():
-                h = hashlib.sha256(token.encode("utf-8")).digest()
-                idx = int.from_bytes(h[:4], "little") % self._dim
-                sign = 1.0 if (h[4] % 2 == 0) else -1.0
-                mat[i, idx] += sign
-        # normalize
-        norms = np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12
-        mat = mat / norms
-        return mat
+        if self.workers > 1 and len(texts) >= _SHARD_MIN_TEXTS:
+            return self._embed_sharded(texts)
+        return _normalize(self._counts(texts))
+
+    def _counts(self, texts: List[str]) -> np.ndarray:
+        n, dim = len(texts), self._dim
+        # simple tokenization
+        docs = [t.lower().split() for t in texts]
+        tokens = [tok for doc in docs for tok in doc]
+        memo = self._memo
+        with self._lock:
+            new = set(tokens).difference(memo)
+            if len(memo) + len(new) > _MEMO_MAX:
+                memo.clear()
+                new = set(tokens)
+            for tok in new:
+                h = hashlib.sha256(tok.encode("utf-8")).digest()
+                memo[tok] = (int.from_bytes(h[:4], "little") % dim) * 2 + (h[4] % 2)
+            codes = np.array(list(map(memo.__getitem__, tokens)), dtype=np.int64)
+        rows = np.repeat(np.arange(n, dtype=np.int64), [len(doc) for doc in docs])
+        signs = 1.0 - 2.0 * (codes & 1)
+        counts = np.bincount(rows * dim + (codes >> 1), weights=signs, minlength=n * dim)
+        return counts.astype(np.float32).reshape(n, dim)
+
+    def _embed_sharded(self, texts: List[str]) -> np.ndarray:
+        step = -(-len(texts) // self.workers)
+        shards = [texts[i:i + step] for i in range(0, len(texts), step)]
+        with ProcessPoolExecutor(max_workers=len(shards)) as ex:
+            parts = list(ex.map(_shard_counts, [self._dim] * len(shards), shards))
+        return _normalize(np.concatenate(parts, axis=0))
+
+def _shard_counts(dim: int, texts: List[str]) -> np.ndarray:
+    return HashEmbedder(dim)._counts(texts)
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12
+    return mat / norms
@@ -0,0 +1,58 @@
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .embedder import Embedder
+
+def normalize_query(text: str) -> str:
+    """Trim and collapse whitespace. Case is kept: cased models embed it differently."""
+    return " ".join(text.split())
+
+class QueryCachedEmbedder(Embedder):
+    """In-memory LRU of query embeddings, keyed by (model id, normalized text).
+
+    Interactive use repeats questions; a hit skips the model entirely. Thread-safe, so
+    one instance can serve a threaded server. Pack builds use the on-disk
+    `CachedEmbedder` instead.
+    """
+
+    def __init__(self, inner: Embedder, model_id: str, max_entries: int = 1024) -> None:
+        self.inner = inner
+        self.model_id = model_id
+        self.max_entries = int(max_entries)
+        self._lru: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dim(self) -> int:
+        return self.inner.dim
+
+    def warmup(self) -> None:
+        self.inner.warmup()
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        keys = [(self.model_id, normalize_query(t)) for t in texts]
+        missing: Dict[Tuple[str, str], List[int]] = {}
+        with self._lock:
+            for i, k in enumerate(keys):
+                vec = self._lru.get(k)
+                if vec is None:
+                    missing.setdefault(k, []).append(i)
+                else:
+                    self._lru.move_to_end(k)
+                    out[i] = vec
+        if not missing:
+            return out
+        vecs = np.asarray(self.inner.embed_texts([k[1] for k in missing]), dtype=np.float32)
+        with self._lock:
+            for j, (k, rows) in enumerate(missing.items()):
+                out[rows] = vecs[j]
+                self._lru[k] = vecs[j].copy()
+                self._lru.move_to_end(k)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+        return out
@@ -1,23 +1,93 @@
 from __future__ import annotations
-from typing import List
+import atexit
+import threading
+from typing import Any, Dict, List, Optional
 import numpy as np
 from .embedder import Embedder
 
+# Loaded models, shared by every embedder in the process (Answerer, sessions, builders)
+_MODELS: Dict[str, Any] = {}
+_MODELS_LOCK = threading.Lock()
+
+def _load_model(model_name: str):
+    with _MODELS_LOCK:
+        model = _MODELS.get(model_name)
+        if model is None:
+            try:
+                from sentence_transformers import SentenceTransformer  # type: ignore
+            except Exception as e:  # pragma: no cover
+                raise ImportError("sentence-transformers not installed. pip install -e '.[embeddings]'") from e
+            model = _MODELS[model_name] = SentenceTransformer(model_name)
+        return model
+
 class SentenceTransformerEmbedder(Embedder):
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        try:
-            from sentence_transformers import SentenceTransformer  # type: ignore
-        except Exception as e:  # pragma: no cover
-            raise ImportError("sentence-transformers not installed. pip install -e '.[embeddings]'") from e
-        self._model = SentenceTransformer(model_name)
-        # Infer dim from model by embedding a tiny string
-        v = self._model.encode(["test"], normalize_embeddings=True)
-        self._dim = int(v.shape[1])
+    """sentence-transformers model, loaded on first use and shared per process.
+
+    Construction is free; call `warmup()` at startup to load the model and run a first
+    batch before serving.
+
+    `encode` length-sorts texts into `batch_size` batches itself. With `workers > 1`,
+    calls of at least `workers * batch_size` texts go to a multi-process encode pool
+    (one CPU process per worker, started on first use).
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        batch_size: int = 64,
+        workers: int = 1,
+    ):
+        self.model_name = model_name
+        self.batch_size = max(1, int(batch_size))
+        self.workers = max(1, int(workers))
+        self._model_obj = None
+        self._dim: Optional[int] = None
+        self._pool: Optional[dict] = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def _model(self):
+        if self._model_obj is None:
+            self._model_obj = _load_model(self.model_name)
+        return self._model_obj
 
     @property
     def dim(self) -> int:
+        if self._dim is None:
+            d = self._model.get_sentence_embedding_dimension()
+            self._dim = int(d) if d else int(self.embed_texts(["test"]).shape[1])
         return self._dim
 
+    def warmup(self) -> None:
+        self.embed_texts(["warmup"] * 8)
+
     def embed_texts(self, texts: List[str]) -> np.ndarray:
-        v = self._model.encode(texts, normalize_embeddings=True)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self.workers > 1 and len(texts) >= self.workers * self.batch_size:
+            # Several chunks per worker so a slow (long-text) chunk does not stall the rest
+            chunk = -(-len(texts) // (self.workers * 4))
+            v = self._model.encode_multi_process(
+                texts,
+                self._start_pool(),
+                batch_size=self.batch_size,
+                chunk_size=max(chunk, self.batch_size),
+                normalize_embeddings=True,
+            )
+        else:
+            v = self._model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True)
         return np.asarray(v, dtype=np.float32)
+
+    def close(self) -> None:
+        """Stop the encode pool's processes, if one was started."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            self._model.stop_multi_process_pool(pool)
+
+    def _start_pool(self) -> dict:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = self._model.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+                atexit.register(self.close)
+            return self._pool
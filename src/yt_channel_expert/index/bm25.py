@@ -1,9 +1,12 @@
 from __future__ import annotations
+from collections import Counter
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, List, Mapping, Optional
 import math
 import re
 
+import numpy as np
+
 _TOK = re.compile(r"[A-Za-z0-9_]+")
 
 def _tokenize(text: str) -> List[str]:
@@ -14,43 +17,290 @@ class BM25Hit:
     idx: int
     score: float
 
+# Array names persisted by `BM25.to_arrays` / read back by `BM25.from_arrays`.
+BM25_ARRAYS = (
+    "term_bytes",        # uint8: all terms, sorted, concatenated (ASCII)
+    "term_offsets",      # int64 (V+1): term i is term_bytes[term_offsets[i]:term_offsets[i+1]]
+    "postings_offsets",  # int64 (V+1): postings of term i are [postings_offsets[i], postings_offsets[i+1])
+    "postings_docs",     # int32: doc ids, ascending within each term
+    "postings_tfs",      # int32: term frequency per posting
+    "doc_lens",          # int32 (N): tokens per doc
+    "term_max_scores",   # float64 (V): best single-posting score per term (top-k pruning bound)
+)
+# New postings are packed into NumPy blocks of this many entries while tokenizing.
+_POSTINGS_BLOCK = 1 << 16
+
+# Derived arrays that `from_arrays` recomputes when a pack does not carry them.
+BM25_DERIVED_ARRAYS = ("term_max_scores",)
+
 class BM25:
+    """Okapi BM25 over an inverted index (term dictionary + CSR postings).
+
+    The index is plain NumPy arrays, so a persisted index can be memory-mapped and
+    used without re-tokenizing the corpus.
+    """
+
     def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
         self.k1 = k1
         self.b = b
-        self.docs: List[List[str]] = []
-        self.df: Dict[str, int] = {}
         self.avgdl = 0.0
+        # Live documents (rows minus tombstones); N for idf and the avgdl denominator.
+        self.doc_count = 0
+        self.term_bytes = np.zeros(0, dtype=np.uint8)
+        self.term_offsets = np.zeros(1, dtype=np.int64)
+        self.postings_offsets = np.zeros(1, dtype=np.int64)
+        self.postings_docs = np.zeros(0, dtype=np.int32)
+        self.postings_tfs = np.zeros(0, dtype=np.int32)
+        self.doc_lens = np.zeros(0, dtype=np.int32)
+        self.term_max_scores = np.zeros(0, dtype=np.float64)
+
+    @property
+    def n_docs(self) -> int:
+        """Number of doc rows, tombstoned ones included."""
+        return int(self.doc_lens.shape[0])
+
+    @property
+    def n_terms(self) -> int:
+        return int(self.term_offsets.shape[0]) - 1
+
+    def terms(self) -> List[str]:
+        offs = self.term_offsets.tolist()
+        blob = self.term_bytes.tobytes()
+        return [blob[offs[i]:offs[i + 1]].decode("ascii") for i in range(self.n_terms)]
+
+    def add_documents(self, texts: Iterable[str]) -> None:
+        self.__init__(k1=self.k1, b=self.b)  # type: ignore[misc]
+        self.append_documents(texts)
+
+    def append_documents(self, texts: Iterable[str], drop_docs: Optional[np.ndarray] = None) -> None:
+        """Append `texts` as new doc rows and tombstone the live rows in `drop_docs`.
+
+        Tombstoned rows keep their row number (so rows stay aligned with the embedding
+        matrix) but lose their postings and length. Existing postings are merged as
+        arrays; only `texts` are tokenized. `texts` may be a stream: new postings are
+        packed into arrays every `_POSTINGS_BLOCK` entries rather than held as Python lists.
+        """
+        old_terms = self.terms()
+        df = np.diff(self.postings_offsets)
+        term_of = np.repeat(np.arange(len(old_terms), dtype=np.int64), df)
+        docs = np.asarray(self.postings_docs, dtype=np.int64)
+        tfs = np.asarray(self.postings_tfs, dtype=np.int32)
+        doc_lens = np.array(self.doc_lens, dtype=np.int32)
+        doc_count = self.doc_count
+
+        if drop_docs is not None and len(drop_docs):
+            drop = np.unique(np.asarray(drop_docs, dtype=np.int64))
+            keep = ~np.isin(docs, drop)
+            term_of, docs, tfs = term_of[keep], docs[keep], tfs[keep]
+            doc_lens[drop] = 0
+            doc_count -= int(drop.shape[0])
+
+        base = doc_lens.shape[0]
+        # New terms get provisional ids in first-seen order; remapped to the sorted vocab below
+        new_ids: Dict[str, int] = {}
+        blocks: List[tuple] = []
+        cur_terms: List[int] = []
+        cur_docs: List[int] = []
+        cur_tfs: List[int] = []
+        new_lens: List[int] = []
+
+        def flush() -> None:
+            if cur_terms:
+                blocks.append((
+                    np.asarray(cur_terms, dtype=np.int64),
+                    np.asarray(cur_docs, dtype=np.int64),
+                    np.asarray(cur_tfs, dtype=np.int32),
+                ))
+                cur_terms.clear()
+                cur_docs.clear()
+                cur_tfs.clear()
+
+        for i, text in enumerate(texts):
+            toks = _tokenize(text)
+            new_lens.append(len(toks))
+            for term, tf in Counter(toks).items():
+                cur_terms.append(new_ids.setdefault(term, len(new_ids)))
+                cur_docs.append(base + i)
+                cur_tfs.append(tf)
+            if len(cur_terms) >= _POSTINGS_BLOCK:
+                flush()
+        flush()
+        new_terms = list(new_ids)
+        new_term_of = np.concatenate([b[0] for b in blocks]) if blocks else np.zeros(0, dtype=np.int64)
+        new_docs = np.concatenate([b[1] for b in blocks]) if blocks else np.zeros(0, dtype=np.int64)
+        new_tfs = np.concatenate([b[2] for b in blocks]) if blocks else np.zeros(0, dtype=np.int32)
+        blocks.clear()  # drop the per-block arrays before the merged ones are built
+
+        vocab = sorted(set(old_terms).union(new_terms))
+        term_idx = {t: i for i, t in enumerate(vocab)}
+        remap = np.asarray([term_idx[t] for t in old_terms], dtype=np.int64)
+        new_remap = np.asarray([term_idx[t] for t in new_terms], dtype=np.int64)
+        term_of = np.concatenate([remap[term_of], new_remap[new_term_of]])
+        docs = np.concatenate([docs, new_docs])
+        tfs = np.concatenate([tfs, new_tfs])
+
+        # Terms whose postings were all tombstoned leave the dictionary.
+        counts = np.bincount(term_of, minlength=len(vocab))
+        live_terms = np.flatnonzero(counts)
+        compact = np.full(len(vocab), -1, dtype=np.int64)
+        compact[live_terms] = np.arange(live_terms.shape[0])
+        term_of = compact[term_of]
+        vocab = [vocab[i] for i in live_terms.tolist()]
+
+        order = np.lexsort((docs, term_of))
+        encoded = [t.encode("ascii") for t in vocab]
+        self.term_bytes = np.frombuffer(b"".join(encoded), dtype=np.uint8).copy()
+        self.term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in encoded], out=self.term_offsets[1:])
+        self.postings_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(counts[live_terms], out=self.postings_offsets[1:])
+        self.postings_docs = docs[order].astype(np.int32)
+        self.postings_tfs = tfs[order]
+        self.doc_lens = np.concatenate([doc_lens, np.asarray(new_lens, dtype=np.int32)])
+        self.doc_count = doc_count + len(new_lens)
+        self.avgdl = int(self.doc_lens.sum()) / max(1, self.doc_count)
+        self.term_max_scores = self._compute_term_max_scores()
 
-    def add_documents(self, texts: List[str]) -> None:
-        self.docs = [_tokenize(t) for t in texts]
-        self.df = {}
-        total_len = 0
-        for doc in self.docs:
-            total_len += len(doc)
-            seen = set(doc)
-            for term in seen:
-                self.df[term] = self.df.get(term, 0) + 1
-        self.avgdl = total_len / max(1, len(self.docs))
-
-    def search(self, query: str, top_k: int) -> List[BM25Hit]:
-        q_terms = _tokenize(query)
-        if not q_terms or not self.docs:
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in BM25_ARRAYS}
+
+    def params(self) -> Dict[str, float]:
+        return {"k1": self.k1, "b": self.b, "avgdl": self.avgdl, "doc_count": self.doc_count}
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, Optional[np.ndarray]], params: Mapping[str, float]) -> "BM25":
+        bm = cls(k1=float(params.get("k1", 1.5)), b=float(params.get("b", 0.75)))
+        for name in BM25_ARRAYS:
+            if arrays.get(name) is not None:
+                setattr(bm, name, arrays[name])
+        bm.doc_count = int(params.get("doc_count", bm.n_docs))
+        avgdl = params.get("avgdl")
+        bm.avgdl = float(avgdl) if avgdl is not None else int(bm.doc_lens.sum()) / max(1, bm.doc_count)
+        if arrays.get("term_max_scores") is None:
+            bm.term_max_scores = bm._compute_term_max_scores()
+        return bm
+
+    def term_id(self, term: str) -> Optional[int]:
+        """Binary-search the sorted term dictionary; None if the term is not indexed."""
+        key = term.encode("ascii")
+        lo, hi = 0, self.n_terms
+        offs = self.term_offsets
+        while lo < hi:
+            mid = (lo + hi) // 2
+            cur = self.term_bytes[offs[mid]:offs[mid + 1]].tobytes()
+            if cur < key:
+                lo = mid + 1
+            elif cur > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _idf(self, df: int) -> float:
+        N = self.doc_count
+        return math.log(1 + (N - df + 0.5) / (df + 0.5))
+
+    def _contrib(self, idf: float, tfs: np.ndarray, dls: np.ndarray) -> np.ndarray:
+        # Same float64 operation order as the scalar Okapi formula, so scores are bit-identical.
+        f = tfs.astype(np.float64)
+        denom = f + self.k1 * (1 - self.b + self.b * (dls.astype(np.float64) / (self.avgdl + 1e-9)))
+        return idf * (f * (self.k1 + 1) / (denom + 1e-9))
+
+    def _compute_term_max_scores(self) -> np.ndarray:
+        if self.n_terms == 0:
+            return np.zeros(0, dtype=np.float64)
+        offs = np.asarray(self.postings_offsets)
+        df = np.diff(offs)
+        N = self.doc_count
+        idf = np.log(1 + (N - df + 0.5) / (df + 0.5))
+        per_posting = self._contrib(1.0, self.postings_tfs, self.doc_lens[self.postings_docs])
+        per_posting *= np.repeat(idf, df)
+        return np.maximum.reduceat(per_posting, offs[:-1])
+
+    def search(self, query: str, top_k: int, candidates: Optional[np.ndarray] = None) -> List[BM25Hit]:
+        """Top-k BM25 over postings, with MaxScore-style pruning.
+
+        Query terms are visited by decreasing score upper bound. After each term, the docs
+        seen so far are scored exactly; once the k-th best exact score beats the sum of the
+        remaining terms' upper bounds, no unseen doc can enter the top-k and the remaining
+        (usually long, low-idf) postings lists are never scanned.
+
+        With `candidates`, only those docs are scored (by binary search into each query
+        term's postings), so the cost follows the candidate set, not the postings lengths.
+        """
+        return self._search_terms(_tokenize(query), top_k, candidates, self.term_id)
+
+    def search_batch(self, queries: List[str], top_k: int) -> List[List[BM25Hit]]:
+        """`search` for each query; each distinct term is looked up in the dictionary once."""
+        tokenized = [_tokenize(q) for q in queries]
+        term_ids = {t: self.term_id(t) for t in {t for toks in tokenized for t in toks}}
+        return [self._search_terms(toks, top_k, None, term_ids.get) for toks in tokenized]
+
+    def _search_terms(
+        self,
+        q_terms: List[str],
+        top_k: int,
+        candidates: Optional[np.ndarray],
+        term_id: Callable[[str], Optional[int]],
+    ) -> List[BM25Hit]:
+        if not q_terms or not self.doc_count or top_k <= 0:
+            return []
+
+        # (term id, lo, hi, idf) per query-term occurrence, in query order; duplicates count twice
+        occ: List[tuple] = []
+        for term in q_terms:
+            tid = term_id(term)
+            if tid is None:
+                continue
+            lo, hi = int(self.postings_offsets[tid]), int(self.postings_offsets[tid + 1])
+            occ.append((tid, lo, hi, self._idf(hi - lo)))
+        if not occ:
             return []
-        N = len(self.docs)
-        scores = [0.0] * N
-        for i, doc in enumerate(self.docs):
-            dl = len(doc)
-            tf: Dict[str, int] = {}
-            for t in doc:
-                tf[t] = tf.get(t, 0) + 1
-            for term in q_terms:
-                if term not in tf:
-                    continue
-                df = self.df.get(term, 0)
-                idf = math.log(1 + (N - df + 0.5) / (df + 0.5))
-                f = tf[term]
-                denom = f + self.k1 * (1 - self.b + self.b * (dl / (self.avgdl + 1e-9)))
-                scores[i] += idf * (f * (self.k1 + 1) / (denom + 1e-9))
-        idxs = sorted(range(N), key=lambda i: scores[i], reverse=True)[:top_k]
-        return [BM25Hit(idx=i, score=float(scores[i])) for i in idxs if scores[i] > 0]
+        if candidates is not None:
+            cand = np.unique(np.asarray(candidates, dtype=np.int64))
+            cand_scores = self._score_docs(cand, occ)
+            top = np.lexsort((cand, -cand_scores))[:top_k]
+            return [BM25Hit(idx=int(cand[i]), score=float(cand_scores[i])) for i in top if cand_scores[i] > 0]
+
+        bound: Dict[int, float] = {}
+        for tid, _, _, _ in occ:
+            bound[tid] = bound.get(tid, 0.0) + float(self.term_max_scores[tid])
+        order = sorted(bound, key=lambda t: -bound[t])
+        remaining = [sum(bound[t] for t in order[j:]) for j in range(len(order) + 1)]
+
+        cand = np.zeros(0, dtype=np.int64)
+        cand_scores = np.zeros(0, dtype=np.float64)
+        for j, tid in enumerate(order):
+            lo, hi = int(self.postings_offsets[tid]), int(self.postings_offsets[tid + 1])
+            new = np.setdiff1d(self.postings_docs[lo:hi], cand, assume_unique=True).astype(np.int64)
+            if new.size:
+                cand = np.concatenate([cand, new])
+                cand_scores = np.concatenate([cand_scores, self._score_docs(new, occ)])
+            if cand.size >= top_k:
+                theta = float(np.partition(cand_scores, cand.size - top_k)[cand.size - top_k])
+                rest = remaining[j + 1]
+                if rest + 1e-9 * max(1.0, rest) < theta:
+                    break
+
+        # Score desc, then doc id asc (the tie order of a stable sort over all docs)
+        top = np.lexsort((cand, -cand_scores))[:top_k]
+        return [BM25Hit(idx=int(cand[i]), score=float(cand_scores[i])) for i in top if cand_scores[i] > 0]
+
+    def _score_docs(self, docs: np.ndarray, occ: List[tuple]) -> np.ndarray:
+        """Exact scores for `docs`, accumulated in query-term order."""
+        docs_sorted = np.sort(docs)
+        acc = np.zeros(docs_sorted.shape[0], dtype=np.float64)
+        dls = self.doc_lens[docs_sorted]
+        for _tid, lo, hi, idf in occ:
+            plist = self.postings_docs[lo:hi]
+            pos = np.searchsorted(plist, docs_sorted)
+            pos_c = np.minimum(pos, max(hi - lo - 1, 0))
+            hit = (pos < hi - lo) & (plist[pos_c] == docs_sorted)
+            if not hit.any():
+                continue
+            tfs = self.postings_tfs[lo:hi][pos_c[hit]]
+            acc[hit] += self._contrib(idf, tfs, dls[hit])
+        # back to the caller's order
+        out = np.empty_like(acc)
+        out[np.argsort(docs, kind="stable")] = acc
+        return out
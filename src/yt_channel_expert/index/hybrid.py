@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from typing import List, Tuple, Optional, Dict
 import numpy as np
 
-from .vector_index import VectorIndex, VectorHit
+from .vector_index import BruteForceIndex, VectorIndex, VectorHit
 from .bm25 import BM25, BM25Hit
 
 @dataclass
@@ -23,10 +23,35 @@ class HybridRetriever:
         self.bm25 = bm25
         self.alpha = alpha
 
-    def search(self, query_vec: np.ndarray, query_text: str, top_k: int, bm25_top_k: int = 20) -> List[HybridHit]:
-        vec_hits = self.vector_index.search(query_vec, top_k=top_k)
-        bm_hits: List[BM25Hit] = self.bm25.search(query_text, top_k=bm25_top_k) if self.bm25 else []
+    def search(
+        self,
+        query_vec: np.ndarray,
+        query_text: str,
+        top_k: int,
+        bm25_top_k: int = 20,
+        candidates: Optional[np.ndarray] = None,
+    ) -> List[HybridHit]:
+        """Merge vector and BM25 hits. `candidates` restricts both to those rows; the
+        vector index must then be a `BruteForceIndex`."""
+        if candidates is None:
+            vec_hits = self.vector_index.search(query_vec, top_k=top_k)
+        else:
+            assert isinstance(self.vector_index, BruteForceIndex)
+            vec_hits = self.vector_index.search(query_vec, top_k=top_k, rows=candidates)
+        bm_hits: List[BM25Hit] = (
+            self.bm25.search(query_text, top_k=bm25_top_k, candidates=candidates) if self.bm25 else []
+        )
+        return self._merge(vec_hits, bm_hits, top_k)
+
+    def search_batch(
+        self, query_vecs: np.ndarray, query_texts: List[str], top_k: int, bm25_top_k: int = 20
+    ) -> List[List[HybridHit]]:
+        """`search` for a batch: one batched vector search and one batched BM25 pass."""
+        vec_batch = self.vector_index.search_batch(query_vecs, top_k=top_k)
+        bm_batch = self.bm25.search_batch(query_texts, top_k=bm25_top_k) if self.bm25 else [[] for _ in query_texts]
+        return [self._merge(v, b, top_k) for v, b in zip(vec_batch, bm_batch)]
 
+    def _merge(self, vec_hits: List[VectorHit], bm_hits: List[BM25Hit], top_k: int) -> List[HybridHit]:
         # Normalize scores to [0,1] within each list
         def norm(scores: List[float]) -> List[float]:
             if not scores:
@@ -0,0 +1,226 @@
+from __future__ import annotations
+import math
+from typing import Dict, List, Mapping, Optional, Union
+
+import numpy as np
+
+from .quantize import BLOCK_ROWS, StoredEmbeddings
+from .vector_index import VectorHit, VectorIndex, _top_indices
+
+# Array names persisted by `IVFPQIndex.to_arrays` / read back by `IVFPQIndex.from_arrays`.
+IVFPQ_ARRAYS = (
+    "centroids",     # float32 (nlist, dim): coarse k-means centroids
+    "codebooks",     # float32 (m, ksub, dim/m): per-subspace residual codebooks
+    "list_offsets",  # int64 (nlist+1): rows of list l are [list_offsets[l], list_offsets[l+1])
+    "list_rows",     # int32 (N): embedding row of each entry, grouped by list
+    "codes",         # uint8 (N, m): PQ code of each entry's residual, same order as list_rows
+)
+
+# Cap on rows sampled to train the coarse and PQ quantizers.
+_MAX_TRAIN = 131072
+
+class IVFPQIndex(VectorIndex):
+    """Inverted-file index with product-quantized residuals (IVF-PQ), in NumPy.
+
+    Rows are assigned to the nearest of `nlist` k-means centroids. Each residual
+    (row - centroid) is split into `m` sub-vectors, each stored as a one-byte code into a
+    per-subspace codebook of up to 256 centroids. A query scans only the entries of its
+    `nprobe` closest lists, scoring codes with one (m, ksub) table of inner products:
+
+        q . x  ~=  q . centroid[list]  +  sum_j lut[j, code_j]
+
+    With `rescore_candidates > 0` and `refine` set, the best approximate candidates are
+    re-scored exactly against the stored embedding rows.
+    """
+
+    def __init__(self, nprobe: int = 8, rescore_candidates: int = 0, refine: Optional[StoredEmbeddings] = None) -> None:
+        self.nprobe = int(nprobe)
+        self.rescore_candidates = int(rescore_candidates)
+        self.refine = refine
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.codebooks = np.zeros((0, 0, 0), dtype=np.float32)
+        self.list_offsets = np.zeros(1, dtype=np.int64)
+        self.list_rows = np.zeros(0, dtype=np.int32)
+        self.codes = np.zeros((0, 0), dtype=np.uint8)
+        self.n_rows = 0
+        self._deleted: Optional[np.ndarray] = None
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @property
+    def m(self) -> int:
+        return int(self.codebooks.shape[0])
+
+    @classmethod
+    def train(
+        cls,
+        embeddings: Union[np.ndarray, StoredEmbeddings],
+        nlist: int = 0,
+        m: int = 0,
+        iters: int = 10,
+        seed: int = 0,
+    ) -> "IVFPQIndex":
+        """Train coarse and PQ quantizers on a sample of `embeddings`, then add all rows.
+
+        `nlist=0` picks ~4*sqrt(N) lists (at least ~39 training rows each); `m=0` picks the
+        largest divisor of dim that is <= 64.
+        """
+        emb = StoredEmbeddings.wrap(embeddings)
+        assert emb is not None
+        n, dim = emb.n_rows, int(emb.matrix.shape[1])
+        if n == 0:
+            raise ValueError("Cannot train IVF-PQ on an empty matrix")
+        rng = np.random.default_rng(seed)
+        sample_idx = np.sort(rng.choice(n, size=min(n, _MAX_TRAIN), replace=False))
+        sample = emb.take(sample_idx)
+
+        if nlist <= 0:
+            nlist = int(round(4 * math.sqrt(n)))
+        nlist = max(1, min(nlist, sample.shape[0] // 39 or 1))
+        # ~64 rows per centroid is plenty for the coarse quantizer
+        coarse_sample = sample[rng.choice(sample.shape[0], size=min(sample.shape[0], 64 * nlist), replace=False)]
+        if m <= 0:
+            m = max(d for d in range(1, min(dim, 64) + 1) if dim % d == 0)
+        if dim % m:
+            raise ValueError(f"pq m={m} must divide embedding dim {dim}")
+
+        index = cls()
+        index.centroids = _kmeans(coarse_sample, nlist, iters, rng)
+        resid = sample - index.centroids[_assign(sample, index.centroids)]
+        ds = dim // m
+        ksub = min(256, sample.shape[0])
+        index.codebooks = np.stack([
+            _kmeans(np.ascontiguousarray(resid[:, j * ds:(j + 1) * ds]), ksub, iters, rng) for j in range(m)
+        ])
+        index.list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+        index.codes = np.zeros((0, m), dtype=np.uint8)
+        index.add(emb)
+        return index
+
+    def add(self, embeddings: Union[np.ndarray, StoredEmbeddings]) -> None:
+        """Encode and append rows (numbered after the existing ones) with the trained quantizers."""
+        emb = StoredEmbeddings.wrap(embeddings)
+        assert emb is not None
+        lists: List[np.ndarray] = []
+        codes: List[np.ndarray] = []
+        for lo in range(0, emb.n_rows, BLOCK_ROWS):
+            lst, code = self._encode(emb.rows(lo, min(lo + BLOCK_ROWS, emb.n_rows)))
+            lists.append(lst)
+            codes.append(code)
+        if not lists:
+            return
+        # Merge with existing entries, keeping each list contiguous and rows ascending within it
+        old_lists = np.repeat(np.arange(self.nlist, dtype=np.int64), np.diff(self.list_offsets))
+        all_lists = np.concatenate([old_lists, *lists])
+        all_rows = np.concatenate([
+            np.asarray(self.list_rows, dtype=np.int64),
+            np.arange(self.n_rows, self.n_rows + emb.n_rows, dtype=np.int64),
+        ])
+        all_codes = np.concatenate([np.asarray(self.codes, dtype=np.uint8), *codes])
+        order = np.lexsort((all_rows, all_lists))
+        self.list_rows = all_rows[order].astype(np.int32)
+        self.codes = all_codes[order]
+        self.list_offsets = np.zeros(self.nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(all_lists, minlength=self.nlist), out=self.list_offsets[1:])
+        self.n_rows += emb.n_rows
+
+    def mark_deleted(self, rows: np.ndarray) -> None:
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            self._deleted = None
+            return
+        self._deleted = np.zeros(self.n_rows, dtype=bool)
+        self._deleted[rows] = True
+
+    def search(self, query_vec: np.ndarray, top_k: int) -> List[VectorHit]:
+        if self.n_rows == 0 or top_k <= 0:
+            return []
+        q = np.asarray(query_vec, dtype=np.float32).reshape(-1)
+        coarse = self.centroids @ q
+        nprobe = max(1, min(self.nprobe, self.nlist))
+        probe = _top_indices(coarse, nprobe)
+
+        starts = self.list_offsets[probe]
+        sizes = self.list_offsets[probe + 1] - starts
+        if not sizes.sum():
+            return []
+        entries = np.concatenate([np.arange(s, s + z) for s, z in zip(starts.tolist(), sizes.tolist())])
+        rows = np.asarray(self.list_rows[entries], dtype=np.int64)
+        m = self.m
+        lut = np.einsum("jkd,jd->jk", self.codebooks, q.reshape(m, -1))
+        scores = lut[np.arange(m), np.asarray(self.codes[entries], dtype=np.intp)].sum(axis=1, dtype=np.float32)
+        scores += np.repeat(coarse[probe], sizes)
+        if self._deleted is not None:
+            keep = ~self._deleted[rows]
+            rows, scores = rows[keep], scores[keep]
+
+        rescore = self.refine is not None and self.rescore_candidates > 0
+        top = _top_indices(scores, min(max(top_k, self.rescore_candidates) if rescore else top_k, len(scores)))
+        rows, scores = rows[top], scores[top]
+        if rescore and len(rows):
+            assert self.refine is not None
+            scores = self.refine.take(rows) @ q
+            top = _top_indices(scores, min(top_k, len(scores)))
+            rows, scores = rows[top], scores[top]
+        return [VectorHit(int(r), float(s)) for r, s in zip(rows, scores)]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in IVFPQ_ARRAYS}
+
+    def params(self) -> Dict[str, int]:
+        return {
+            "nlist": self.nlist,
+            "m": self.m,
+            "ksub": int(self.codebooks.shape[1]),
+            "dim": int(self.centroids.shape[1]),
+            "n_rows": self.n_rows,
+        }
+
+    @classmethod
+    def from_arrays(
+        cls,
+        arrays: Mapping[str, np.ndarray],
+        params: Mapping[str, int],
+        nprobe: int = 8,
+        rescore_candidates: int = 0,
+        refine: Optional[StoredEmbeddings] = None,
+    ) -> "IVFPQIndex":
+        index = cls(nprobe=nprobe, rescore_candidates=rescore_candidates, refine=refine)
+        for name in IVFPQ_ARRAYS:
+            setattr(index, name, arrays[name])
+        index.n_rows = int(params.get("n_rows", index.list_rows.shape[0]))
+        return index
+
+    def _encode(self, x: np.ndarray):
+        lists = _assign(x, self.centroids)
+        resid = x - self.centroids[lists]
+        m = self.m
+        ds = resid.shape[1] // m
+        codes = np.empty((x.shape[0], m), dtype=np.uint8)
+        for j in range(m):
+            codes[:, j] = _assign(np.ascontiguousarray(resid[:, j * ds:(j + 1) * ds]), self.codebooks[j])
+        return lists, codes
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (L2) per row: argmax of x.c - |c|^2/2, in blocks."""
+    half_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(x.shape[0], dtype=np.int64)
+    for lo in range(0, x.shape[0], BLOCK_ROWS):
+        hi = min(lo + BLOCK_ROWS, x.shape[0])
+        out[lo:hi] = np.argmax(x[lo:hi] @ centroids.T - half_norms, axis=1)
+    return out
+
+def _kmeans(x: np.ndarray, k: int, iters: int, rng: np.random.Generator) -> np.ndarray:
+    k = max(1, min(k, x.shape[0]))
+    centroids = x[rng.choice(x.shape[0], size=k, replace=False)].astype(np.float32)
+    for _ in range(iters):
+        assign = _assign(x, centroids)
+        counts = np.bincount(assign, minlength=k)
+        filled = np.flatnonzero(counts)  # empty clusters keep their previous centroid
+        order = np.argsort(assign, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        sums = np.add.reduceat(x[order], starts, axis=0)
+        centroids[filled] = sums / counts[filled, None]
+    return centroids
@@ -0,0 +1,107 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+# Rows converted to float32 at a time when scanning a quantized matrix.
+BLOCK_ROWS = 16384
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+def quantize_rows(x: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Quantize float rows for storage; returns (matrix, per-row scales or None).
+
+    int8 uses symmetric per-row scaling: row i is stored as round(x_i / s_i) with
+    s_i = max|x_i| / 127, and decodes as q_i * s_i.
+    """
+    x = np.asarray(x, dtype=np.float32)
+    if dtype == "float32":
+        return x, None
+    if dtype == "float16":
+        return x.astype(np.float16), None
+    if dtype == "int8":
+        amax = np.abs(x).max(axis=1) if x.shape[1] else np.zeros(x.shape[0], dtype=np.float32)
+        scales = np.where(amax > 0, amax / 127.0, 1.0).astype(np.float32)
+        q = np.clip(np.rint(x / scales[:, None]), -127, 127).astype(np.int8)
+        return q, scales
+    raise ValueError(f"Unknown embedding storage dtype: {dtype}")
+
+@dataclass
+class StoredEmbeddings:
+    """An embedding matrix as stored in a pack.
+
+    `matrix` is float32, float16 or int8 (with per-row `scales`). `full` is an optional
+    float32 copy kept for exact rescoring; all arrays are typically memory-mapped.
+    """
+    matrix: np.ndarray
+    scales: Optional[np.ndarray] = None
+    full: Optional[np.ndarray] = None
+
+    @classmethod
+    def wrap(cls, emb: Union[np.ndarray, "StoredEmbeddings", None]) -> Optional["StoredEmbeddings"]:
+        if emb is None or isinstance(emb, StoredEmbeddings):
+            return emb
+        return cls(matrix=emb)
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.matrix.shape[0])
+
+    @property
+    def dtype(self) -> str:
+        return str(self.matrix.dtype)
+
+    def rows(self, lo: int, hi: int) -> np.ndarray:
+        """Rows [lo, hi) as float32: the full-precision copy if present, else decoded."""
+        if self.full is not None:
+            return np.asarray(self.full[lo:hi], dtype=np.float32)
+        block = np.asarray(self.matrix[lo:hi], dtype=np.float32)
+        if self.scales is not None:
+            block *= np.asarray(self.scales[lo:hi], dtype=np.float32)[:, None]
+        return block
+
+    def slice(self, lo: int, hi: Optional[int] = None) -> "StoredEmbeddings":
+        """Rows [lo, hi) as a StoredEmbeddings view (no copy)."""
+        return StoredEmbeddings(
+            matrix=self.matrix[lo:hi],
+            scales=None if self.scales is None else self.scales[lo:hi],
+            full=None if self.full is None else self.full[lo:hi],
+        )
+
+    def take(self, idx: np.ndarray) -> np.ndarray:
+        """Rows `idx` as float32 (full-precision copy if present, else decoded)."""
+        idx = np.asarray(idx, dtype=np.int64)
+        if self.full is not None:
+            return np.asarray(self.full[idx], dtype=np.float32)
+        block = np.asarray(self.matrix[idx], dtype=np.float32)
+        if self.scales is not None:
+            block *= np.asarray(self.scales[idx], dtype=np.float32)[:, None]
+        return block
+
+    def scores(self, q: np.ndarray) -> np.ndarray:
+        """Dot products of every stored row with `q` (float32, shape (dim,)), without a
+        full-size float32 copy of a quantized matrix."""
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ q
+        out = np.empty(self.n_rows, dtype=np.float32)
+        for lo in range(0, self.n_rows, BLOCK_ROWS):
+            hi = min(lo + BLOCK_ROWS, self.n_rows)
+            out[lo:hi] = np.asarray(self.matrix[lo:hi], dtype=np.float32) @ q
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def scores_batch(self, queries: np.ndarray) -> np.ndarray:
+        """(n_rows, n_queries) dot products with each row of `queries`: one matrix-matrix
+        product per block, so the stored matrix is read once for the whole batch."""
+        qt = np.ascontiguousarray(np.asarray(queries, dtype=np.float32).T)
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ qt
+        out = np.empty((self.n_rows, qt.shape[1]), dtype=np.float32)
+        for lo in range(0, self.n_rows, BLOCK_ROWS):
+            hi = min(lo + BLOCK_ROWS, self.n_rows)
+            out[lo:hi] = np.asarray(self.matrix[lo:hi], dtype=np.float32) @ qt
+        if self.scales is not None:
+            out *= self.scales[:, None]
+        return out
@@ -1,8 +1,12 @@
 from __future__ import annotations
+import threading
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from pathlib import Path
+from typing import List, Tuple, Optional, Union
 import numpy as np
 
+from .quantize import BLOCK_ROWS, StoredEmbeddings
+
 @dataclass
 class VectorHit:
     idx: int
@@ -15,50 +19,175 @@ class VectorIndex:
     def search(self, query_vec: np.ndarray, top_k: int) -> List[VectorHit]:
         raise NotImplementedError
 
+    def search_batch(self, query_vecs: np.ndarray, top_k: int) -> List[List[VectorHit]]:
+        """`search` for each row of `query_vecs`; indices with a faster batched path override it."""
+        return [self.search(q, top_k) for q in np.asarray(query_vecs)]
+
+    def mark_deleted(self, rows: np.ndarray) -> None:
+        """Exclude tombstoned rows from future search results."""
+        raise NotImplementedError
+
 class BruteForceIndex(VectorIndex):
-    def __init__(self) -> None:
-        self._mat: Optional[np.ndarray] = None
+    """Exact dot-product search over a (possibly memory-mapped, possibly quantized) matrix.
 
-    def add(self, embeddings: np.ndarray) -> None:
+    The matrix is used as given, not copied. float16/int8 matrices are scanned in
+    float32 blocks; with `rescore_candidates > 0` and a full-precision copy available,
+    the best `rescore_candidates` approximate hits are re-scored exactly.
+    """
+
+    def __init__(self, rescore_candidates: int = 0) -> None:
+        self.rescore_candidates = int(rescore_candidates)
+        self._emb: Optional[StoredEmbeddings] = None
+        self._deleted: Optional[np.ndarray] = None
+
+    def add(self, embeddings: np.ndarray, scales: Optional[np.ndarray] = None, full: Optional[np.ndarray] = None) -> None:
         # Expect normalized embeddings for cosine similarity via dot product
-        self._mat = embeddings.astype(np.float32, copy=True)
+        self._emb = StoredEmbeddings(matrix=embeddings, scales=scales, full=full)
 
-    def search(self, query_vec: np.ndarray, top_k: int) -> List[VectorHit]:
-        if self._mat is None:
+    def mark_deleted(self, rows: np.ndarray) -> None:
+        self._deleted = np.asarray(rows, dtype=np.int64) if len(rows) else None
+
+    def search(self, query_vec: np.ndarray, top_k: int, rows: Optional[np.ndarray] = None) -> List[VectorHit]:
+        """Top-k rows by dot product; with `rows`, only those rows are read and scored."""
+        if self._emb is None:
             return []
-        q = query_vec.astype(np.float32)
-        if q.ndim == 1:
-            q = q.reshape(1, -1)
-        scores = (self._mat @ q.T).reshape(-1)  # cosine if normalized
-        if top_k >= len(scores):
-            idxs = np.argsort(-scores)
-        else:
-            idxs = np.argpartition(-scores, top_k)[:top_k]
-            idxs = idxs[np.argsort(-scores[idxs])]
+        q = np.asarray(query_vec, dtype=np.float32).reshape(-1)
+        if rows is not None:
+            return self._search_rows(q, np.asarray(rows, dtype=np.int64), top_k)
+        return self._select(self._emb.scores(q), q, top_k)  # cosine if normalized
+
+    def search_batch(self, query_vecs: np.ndarray, top_k: int) -> List[List[VectorHit]]:
+        """Score a batch of queries with matrix-matrix products over blocks of queries."""
+        if self._emb is None:
+            return [[] for _ in range(len(query_vecs))]
+        Q = np.asarray(query_vecs, dtype=np.float32).reshape(len(query_vecs), -1)
+        out: List[List[VectorHit]] = []
+        for lo in range(0, Q.shape[0], _QUERY_BLOCK):
+            block = Q[lo:lo + _QUERY_BLOCK]
+            scores = self._emb.scores_batch(block)
+            out.extend(self._select(np.array(scores[:, j]), q, top_k) for j, q in enumerate(block))
+        return out
+
+    def _select(self, scores: np.ndarray, q: np.ndarray, top_k: int) -> List[VectorHit]:
+        """Top-k of one query's `scores` (modified in place), with tombstones and rescoring."""
+        assert self._emb is not None
+        live = len(scores)
+        if self._deleted is not None:
+            scores[self._deleted] = -np.inf
+            live -= len(self._deleted)
+        top_k = min(top_k, live)
+        rescore = self._emb.full is not None and self.rescore_candidates > 0
+        idxs = _top_indices(scores, min(max(top_k, self.rescore_candidates), live) if rescore else top_k)
+        if rescore and len(idxs):
+            # Exact pass: gather only the candidate rows from the full-precision matrix
+            order = np.sort(idxs)
+            exact = np.asarray(self._emb.full[order], dtype=np.float32) @ q
+            scores = np.full(scores.shape, -np.inf, dtype=np.float32)
+            scores[order] = exact
+            idxs = _top_indices(scores, min(top_k, len(order)))
         return [VectorHit(int(i), float(scores[i])) for i in idxs]
 
+    def _search_rows(self, q: np.ndarray, rows: np.ndarray, top_k: int) -> List[VectorHit]:
+        assert self._emb is not None
+        if self._deleted is not None:
+            rows = rows[~np.isin(rows, self._deleted)]
+        # Few rows: score them at full precision directly (no approximate pass to rescore)
+        scores = self._emb.take(rows) @ q
+        top = _top_indices(scores, min(top_k, len(rows)))
+        return [VectorHit(int(rows[i]), float(scores[i])) for i in top]
+
+# Queries scored per matrix-matrix product in `search_batch` (bounds the (N, B) score block).
+_QUERY_BLOCK = 64
+
+def _top_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    if top_k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if top_k >= len(scores):
+        return np.argsort(-scores)
+    idxs = np.argpartition(-scores, top_k)[:top_k]
+    return idxs[np.argsort(-scores[idxs])]
+
 class HNSWIndex(VectorIndex):
-    def __init__(self, dim: int, space: str = "cosine") -> None:
+    """hnswlib graph over embedding rows (row number = label).
+
+    `add` appends rows, growing the graph as needed, so a graph loaded from a pack can be
+    extended by `pack update` without a rebuild. `save`/`load` persist the graph file.
+    """
+
+    def __init__(self, dim: int, space: str = "cosine", ef: int = 50, M: int = 16, ef_construction: int = 200) -> None:
         try:
             import hnswlib  # type: ignore
         except Exception as e:  # pragma: no cover
             raise ImportError("hnswlib not installed. pip install -e '.[hnsw]'") from e
         self._hnswlib = hnswlib
         self._dim = dim
+        self.space = space
+        self.ef = int(ef)
+        self._ef_live = self.ef  # ef currently set on the graph (>= self.ef)
+        self._ef_needs: List[int] = []  # k of in-flight queries with k > ef
+        self._ef_lock = threading.Lock()
+        self.M = int(M)
+        self.ef_construction = int(ef_construction)
         self._index = hnswlib.Index(space=space, dim=dim)
-        self._count = 0
+        self._initialized = False
+        self._n = 0  # labels assigned so far (including deleted ones)
+        self._count = 0  # live rows
 
-    def add(self, embeddings: np.ndarray) -> None:
-        n = embeddings.shape[0]
-        self._index.init_index(max_elements=n, ef_construction=200, M=16)
-        self._index.add_items(embeddings, ids=list(range(n)))
-        self._index.set_ef(50)
-        self._count = n
+    @classmethod
+    def load(cls, path: Path, dim: int, space: str = "cosine", ef: int = 50) -> "HNSWIndex":
+        index = cls(dim, space=space, ef=ef)
+        index._index.load_index(str(path))
+        index._index.set_ef(index.ef)
+        index.M = int(index._index.M)
+        index.ef_construction = int(index._index.ef_construction)
+        index._initialized = True
+        index._n = index._count = int(index._index.element_count)
+        return index
+
+    @property
+    def n_rows(self) -> int:
+        return self._n
+
+    def save(self, path: Path) -> None:
+        self._index.save_index(str(path))
+
+    def add(self, embeddings: Union[np.ndarray, StoredEmbeddings]) -> None:
+        emb = StoredEmbeddings.wrap(embeddings)
+        assert emb is not None
+        n = emb.n_rows
+        if not self._initialized:
+            self._index.init_index(max_elements=max(n, 1), ef_construction=self.ef_construction, M=self.M)
+            self._index.set_ef(self.ef)
+            self._initialized = True
+        elif n:
+            self._index.resize_index(self._n + n)
+        for lo in range(0, n, BLOCK_ROWS):
+            hi = min(lo + BLOCK_ROWS, n)
+            self._index.add_items(emb.rows(lo, hi), ids=np.arange(self._n + lo, self._n + hi))
+        self._n += n
+        self._count += n
+
+    def mark_deleted(self, rows: np.ndarray) -> None:
+        for i in np.asarray(rows).tolist():
+            self._index.mark_deleted(int(i))
+        self._count -= len(rows)
 
     def search(self, query_vec: np.ndarray, top_k: int) -> List[VectorHit]:
-        if self._count == 0:
+        top_k = min(top_k, self._count)
+        if top_k <= 0:
             return []
-        labels, distances = self._index.knn_query(query_vec, k=top_k)
+        # hnswlib needs ef >= k to return k results. ef is shared by every thread searching
+        # this graph: a large-k query raises it to max(ef, k) and, once no such query is in
+        # flight, it goes back to the configured ef, never below what a running query needs.
+        q = np.asarray(query_vec, dtype=np.float32)
+        if top_k <= self.ef:
+            labels, distances = self._index.knn_query(q, k=top_k)
+        else:
+            self._raise_ef(top_k)
+            try:
+                labels, distances = self._index.knn_query(q, k=top_k)
+            finally:
+                self._release_ef(top_k)
         labels = labels.reshape(-1)
         distances = distances.reshape(-1)
         # For cosine space, hnswlib returns distance; convert to similarity-ish score
@@ -68,3 +197,18 @@ class HNSWIndex(VectorIndex):
             hits.append(VectorHit(int(i), score))
         hits.sort(key=lambda h: h.score, reverse=True)
         return hits
+
+    def _raise_ef(self, k: int) -> None:
+        with self._ef_lock:
+            self._ef_needs.append(k)
+            if k > self._ef_live:
+                self._ef_live = k
+                self._index.set_ef(k)
+
+    def _release_ef(self, k: int) -> None:
+        with self._ef_lock:
+            self._ef_needs.remove(k)
+            ef = max(self._ef_needs, default=self.ef)
+            if ef != self._ef_live:
+                self._ef_live = ef
+                self._index.set_ef(ef)
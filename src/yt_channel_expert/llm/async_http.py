@@ -0,0 +1,163 @@
+from __future__ import annotations
+import asyncio
+import ssl
+from typing import AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+class AsyncHTTPError(Exception):
+    """Non-2xx response; `body` holds the (possibly truncated) error payload."""
+
+    def __init__(self, status: int, body: str) -> None:
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.body = body
+
+class AsyncResponse:
+    """An HTTP/1.1 response read from an asyncio stream.
+
+    Handles `Content-Length`, `Transfer-Encoding: chunked` and read-until-close bodies.
+    Every read is bounded by `timeout_s`, like a socket timeout in `urllib`.
+    """
+
+    def __init__(
+        self,
+        status: int,
+        headers: Dict[str, str],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        timeout_s: float,
+    ) -> None:
+        self.status = status
+        self.headers = headers
+        self._reader = reader
+        self._writer = writer
+        self._timeout_s = timeout_s
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        if "chunked" in self.headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line = await self._read(self._reader.readline())
+                if not size_line:
+                    raise ConnectionError("connection closed before end of body")
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    # Trailers (if any) end with a blank line
+                    while (await self._read(self._reader.readline())).strip():
+                        pass
+                    return
+                yield await self._read(self._reader.readexactly(size))
+                await self._read(self._reader.readexactly(2))
+        elif "content-length" in self.headers:
+            remaining = int(self.headers["content-length"])
+            while remaining > 0:
+                data = await self._read(self._reader.read(min(remaining, 65536)))
+                if not data:
+                    raise ConnectionError("connection closed before end of body")
+                remaining -= len(data)
+                yield data
+        else:
+            while True:
+                data = await self._read(self._reader.read(65536))
+                if not data:
+                    return
+                yield data
+
+    async def iter_lines(self) -> AsyncIterator[str]:
+        """Body split on newlines (decoded, without the line ending)."""
+        pending = b""
+        async for data in self.iter_bytes():
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield line.rstrip(b"\r").decode("utf-8", errors="ignore")
+        if pending:
+            yield pending.rstrip(b"\r").decode("utf-8", errors="ignore")
+
+    async def read(self) -> bytes:
+        return b"".join([data async for data in self.iter_bytes()])
+
+    async def close(self) -> None:
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, ssl.SSLError):
+            pass
+
+    async def _read(self, op):
+        return await asyncio.wait_for(op, self._timeout_s)
+
+async def post(
+    url: str,
+    body: bytes,
+    *,
+    headers: Optional[Dict[str, str]] = None,
+    timeout_s: float = 60.0,
+    verify_tls: bool = True,
+) -> AsyncResponse:
+    """POST `body` to `url` over a fresh asyncio connection and return once headers arrive.
+
+    Connections are not reused (`Connection: close`), so each call pays a TCP/TLS handshake.
+    Interim 1xx responses are skipped. The caller reads the body from the returned response
+    and must `close()` it. Raises `AsyncHTTPError` for non-2xx statuses.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported URL scheme: {url}")
+    https = parts.scheme == "https"
+    host = parts.hostname or "localhost"
+    port = parts.port or (443 if https else 80)
+    ssl_ctx: Optional[ssl.SSLContext] = None
+    if https:
+        ssl_ctx = ssl.create_default_context() if verify_tls else ssl._create_unverified_context()  # noqa: S323 (opt-in via verify_tls=False)
+
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port, ssl=ssl_ctx, server_hostname=host if https else None),
+        timeout_s,
+    )
+    try:
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        head = {
+            "Host": parts.netloc,
+            "Content-Length": str(len(body)),
+            "Connection": "close",
+            **(headers or {}),
+        }
+        request = f"POST {path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in head.items()) + "\r\n"
+        writer.write(request.encode("latin-1") + body)
+        await asyncio.wait_for(writer.drain(), timeout_s)
+
+        status, resp_headers = await asyncio.wait_for(_read_head(reader), timeout_s)
+        resp = AsyncResponse(status, resp_headers, reader, writer, timeout_s)
+    except BaseException:
+        writer.close()
+        raise
+    if status >= 400:
+        try:
+            detail = (await resp.read()).decode("utf-8", errors="ignore")
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            detail = ""
+        finally:
+            await resp.close()
+        raise AsyncHTTPError(status, detail)
+    return resp
+
+async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    """Status and headers of the final response, skipping interim 1xx ones (e.g. 100 Continue)."""
+    while True:
+        status, headers = await _read_one_head(reader)
+        if not 100 <= status < 200:
+            return status, headers
+
+async def _read_one_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    status_line = (await reader.readline()).decode("latin-1").strip()
+    fields = status_line.split(" ", 2)
+    if len(fields) < 2 or not fields[0].startswith("HTTP/"):
+        raise ConnectionError(f"bad HTTP status line: {status_line!r}")
+    headers: Dict[str, str] = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return int(fields[1]), headers
@@ -1,6 +1,7 @@
 from __future__ import annotations
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Iterator, List, Optional, TypedDict, Literal
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, TypedDict, Literal
 
 Role = Literal["system", "user", "assistant", "tool"]
 
@@ -42,3 +43,33 @@ class LLMBackend(ABC):
     ) -> Iterator[str]:
         """Default streaming: yield the full completion once."""
         yield self.generate(messages, tools=tools, tool_choice=tool_choice, response_format=response_format)
+
+    async def agenerate(
+        self,
+        messages: List[Message],
+        *,
+        tools: Optional[list[dict]] = None,
+        tool_choice: Optional[object] = None,
+        response_format: Optional[dict] = None,
+    ) -> str:
+        """Async `generate`. Default: run the blocking call on a worker thread."""
+        return await asyncio.to_thread(
+            self.generate, messages, tools=tools, tool_choice=tool_choice, response_format=response_format
+        )
+
+    async def astream_generate(
+        self,
+        messages: List[Message],
+        *,
+        tools: Optional[list[dict]] = None,
+        tool_choice: Optional[object] = None,
+        response_format: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        """Async `stream_generate`. Default: pull the blocking iterator on a worker thread."""
+        it = self.stream_generate(messages, tools=tools, tool_choice=tool_choice, response_format=response_format)
+        done = object()
+        while True:
+            delta = await asyncio.to_thread(next, it, done)
+            if delta is done:
+                return
+            yield delta
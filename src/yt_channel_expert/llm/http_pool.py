@@ -0,0 +1,151 @@
+from __future__ import annotations
+import http.client
+import ssl
+import threading
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+# Errors that mean a reused keep-alive connection was closed by the server while idle
+_STALE = (http.client.RemoteDisconnected, http.client.CannotSendRequest, BrokenPipeError, ConnectionResetError)
+
+class PooledResponse:
+    """A response whose connection goes back to the pool once the body is fully read.
+
+    Closing early (e.g. abandoning a stream) drops the connection instead, since the
+    unread remainder would corrupt the next request on it.
+    """
+
+    def __init__(self, pool: "HTTPConnectionPool", conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        self._pool = pool
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._resp = resp
+        self.status = resp.status
+
+    def read(self) -> bytes:
+        try:
+            return self._resp.read()
+        finally:
+            self.close()
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Body lines, line endings kept. Read with `read1` rather than `readline`, which
+        ends quietly on a truncated chunked body; here it raises `http.client.IncompleteRead`."""
+        try:
+            pending = b""
+            while True:
+                data = self._resp.read1(1 << 16)
+                if not data:
+                    break
+                *lines, pending = (pending + data).split(b"\n")
+                for line in lines:
+                    yield line + b"\n"
+            if self._resp.length:  # Content-Length body cut short
+                raise http.client.IncompleteRead(pending, self._resp.length)
+            self._resp.read()  # marks a fully read body closed, so the connection is reusable
+            if pending:
+                yield pending
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        reusable = self._resp.isclosed() and not self._resp.will_close
+        if not reusable:
+            self._resp.close()
+        self._pool._release(conn, reusable)
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+class HTTPConnectionPool:
+    """Thread-safe pool of persistent (keep-alive) connections to one host.
+
+    Up to `max_size` idle connections are kept for reuse; callers beyond that get a fresh
+    connection that is closed after use, so requests never wait on the pool. A reused
+    connection the server has already closed is retried once on a new one.
+    """
+
+    def __init__(self, base_url: str, *, max_size: int = 8, timeout_s: float = 60.0, verify_tls: bool = True) -> None:
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {base_url}")
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if self.https else 80)
+        self.prefix = parts.path.rstrip("/")
+        self.max_size = max(0, max_size)
+        self.timeout_s = timeout_s
+        self._ssl_ctx: Optional[ssl.SSLContext] = None
+        if self.https and not verify_tls:
+            self._ssl_ctx = ssl._create_unverified_context()  # noqa: S323 (opt-in via verify_tls=False)
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout_s: Optional[float] = None,
+    ) -> PooledResponse:
+        """Send a request and return once the response headers arrive.
+
+        `timeout_s` overrides the pool default for this request (connect and each read).
+        """
+        timeout = self.timeout_s if timeout_s is None else timeout_s
+        conn, reused = self._acquire(timeout)
+        try:
+            resp = self._send(conn, method, path, body, headers or {})
+        except _STALE:
+            conn.close()
+            if not reused:
+                raise
+            conn, _ = self._new(timeout), False
+            try:
+                resp = self._send(conn, method, path, body, headers or {})
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+        return PooledResponse(self, conn, resp)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _send(self, conn, method, path, body, headers) -> http.client.HTTPResponse:
+        conn.request(method, self.prefix + path, body=body, headers=headers)
+        return conn.getresponse()
+
+    def _acquire(self, timeout: float):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return self._new(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _new(self, timeout: float) -> http.client.HTTPConnection:
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self._ssl_ctx)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _release(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            with self._lock:
+                if len(self._idle) < self.max_size:
+                    self._idle.append(conn)
+                    return
+        conn.close()
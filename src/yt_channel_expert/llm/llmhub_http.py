@@ -1,11 +1,16 @@
 from __future__ import annotations
-from typing import Any, Dict, Iterator, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
+import http.client
 import json
-import urllib.request
-import urllib.error
-import ssl
 
+from . import async_http
 from .base import LLMBackend, Message
+from .http_pool import HTTPConnectionPool, PooledResponse
+
+# Connection failures while a response body is being read (sync and async alike); both
+# paths raise them as RuntimeError, like failures to send the request.
+_TRANSPORT_ERRORS = (OSError, EOFError, asyncio.TimeoutError, http.client.HTTPException)
 
 class LLMHubHTTPBackend(LLMBackend):
     """Calls a running llmhub-node HTTP server.
@@ -28,6 +33,11 @@ class LLMHubHTTPBackend(LLMBackend):
 
     This backend returns only `text` from `GenerateOutput`. If toolCalls are returned,
     it raises (tool execution is not implemented in this repo yet).
+
+    Connections: `generate`/`stream_generate` share a keep-alive pool (`extra["pool_size"]`,
+    default 8) across threads. `agenerate`/`astream_generate` do not use it: each async
+    call opens, and closes, its own connection (see `async_http.post`), so it pays a
+    TCP/TLS handshake per request.
     """
 
     def __init__(
@@ -52,6 +62,13 @@ class LLMHubHTTPBackend(LLMBackend):
         self.timeout_s = timeout_s
         self.verify_tls = verify_tls
         self.extra = extra or {}
+        # Keep-alive connections shared by all threads using this backend
+        self._pool = HTTPConnectionPool(
+            self.base_url,
+            max_size=int(self.extra.get("pool_size", 8)),
+            timeout_s=timeout_s,
+            verify_tls=verify_tls,
+        )
 
         # Last-call metadata (best-effort)
         self.last_usage: Optional[Dict[str, Any]] = None
@@ -59,7 +76,111 @@ class LLMHubHTTPBackend(LLMBackend):
         self.last_tool_calls: Optional[List[Dict[str, Any]]] = None
 
     def generate(self, messages: List[Message], *, tools=None, tool_choice=None, response_format=None) -> str:
-        url = self.base_url + "/generate"
+        data = self._payload(messages, tools, tool_choice, response_format)
+        try:
+            resp = self._pool.request("POST", "/generate", body=data, headers={"Content-Type": "application/json"})
+            body = resp.read().decode("utf-8")
+        except Exception as e:
+            raise RuntimeError(f"llmhub request failed: {e}") from e
+        _raise_for_status(resp, body)
+        return self._parse_generate_body(body)
+
+    def stream_generate(self, messages: List[Message], *, tools=None, tool_choice=None, response_format=None) -> Iterator[str]:
+        data = self._payload(messages, tools, tool_choice, response_format)
+        try:
+            resp = self._pool.request(
+                "POST",
+                "/generate/stream",
+                body=data,
+                headers={
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream",
+                    "Cache-Control": "no-cache",
+                },
+            )
+            error_body = resp.read().decode("utf-8", errors="ignore") if resp.status >= 400 else None
+        except Exception as e:
+            raise RuntimeError(f"llmhub request failed: {e}") from e
+        if error_body is not None:
+            _raise_for_status(resp, error_body)
+
+        sse = _SSEBuffer()
+        try:
+            for raw in resp:
+                event_data = sse.feed(raw.decode("utf-8", errors="ignore").rstrip("\r\n"))
+                if event_data is not None:
+                    yield from self._handle_sse_event(event_data)
+            event_data = sse.flush()
+            if event_data is not None:
+                yield from self._handle_sse_event(event_data)
+        except _TRANSPORT_ERRORS as e:
+            raise RuntimeError(f"llmhub stream failed: {e}") from e
+        finally:
+            resp.close()
+
+    def close(self) -> None:
+        """Close idle pooled connections."""
+        self._pool.close()
+
+    async def agenerate(self, messages: List[Message], *, tools=None, tool_choice=None, response_format=None) -> str:
+        """`generate` on the event loop: no thread is held while the server works."""
+        data = self._payload(messages, tools, tool_choice, response_format)
+        try:
+            resp = await async_http.post(
+                self.base_url + "/generate",
+                data,
+                headers={"Content-Type": "application/json"},
+                timeout_s=self.timeout_s,
+                verify_tls=self.verify_tls,
+            )
+            try:
+                body = (await resp.read()).decode("utf-8")
+            finally:
+                await resp.close()
+        except async_http.AsyncHTTPError as e:
+            raise RuntimeError(f"llmhub HTTPError {e.status}: {e.body}") from e
+        except Exception as e:
+            raise RuntimeError(f"llmhub request failed: {e}") from e
+        return self._parse_generate_body(body)
+
+    async def astream_generate(
+        self, messages: List[Message], *, tools=None, tool_choice=None, response_format=None
+    ) -> AsyncIterator[str]:
+        data = self._payload(messages, tools, tool_choice, response_format)
+        try:
+            resp = await async_http.post(
+                self.base_url + "/generate/stream",
+                data,
+                headers={
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream",
+                    "Cache-Control": "no-cache",
+                },
+                timeout_s=self.timeout_s,
+                verify_tls=self.verify_tls,
+            )
+        except async_http.AsyncHTTPError as e:
+            raise RuntimeError(f"llmhub HTTPError {e.status}: {e.body}") from e
+        except Exception as e:
+            raise RuntimeError(f"llmhub request failed: {e}") from e
+
+        sse = _SSEBuffer()
+        try:
+            async for line in resp.iter_lines():
+                event_data = sse.feed(line)
+                if event_data is not None:
+                    for out in self._handle_sse_event(event_data):
+                        yield out
+            event_data = sse.flush()
+            if event_data is not None:
+                for out in self._handle_sse_event(event_data):
+                    yield out
+        except _TRANSPORT_ERRORS as e:
+            raise RuntimeError(f"llmhub stream failed: {e}") from e
+        finally:
+            await resp.close()
+
+    def _payload(self, messages: List[Message], tools, tool_choice, response_format) -> bytes:
         payload: Dict[str, Any] = {
             "provider": self.provider,
             "model": self.model,
@@ -77,22 +198,9 @@ class LLMHubHTTPBackend(LLMBackend):
             payload["responseFormat"] = response_format
 
         payload.update(self.extra.get("request_overrides", {}))
+        return json.dumps(payload).encode("utf-8")
 
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(url, data=data, method="POST", headers={"Content-Type": "application/json"})
-        ctx = None
-        if url.startswith("https://") and not self.verify_tls:
-            ctx = ssl._create_unverified_context()  # noqa: SslCertVerificationDisabled
-
-        try:
-            with urllib.request.urlopen(req, timeout=self.timeout_s, context=ctx) as resp:
-                body = resp.read().decode("utf-8")
-        except urllib.error.HTTPError as e:
-            detail = e.read().decode("utf-8", errors="ignore") if hasattr(e, "read") else str(e)
-            raise RuntimeError(f"llmhub HTTPError {e.code}: {detail}") from e
-        except Exception as e:
-            raise RuntimeError(f"llmhub request failed: {e}") from e
-
+    def _parse_generate_body(self, body: str) -> str:
         obj: Any
         try:
             obj = json.loads(body)
@@ -107,72 +215,6 @@ class LLMHubHTTPBackend(LLMBackend):
 
         return _normalize_generate_output(obj)
 
-    def stream_generate(self, messages: List[Message], *, tools=None, tool_choice=None, response_format=None) -> Iterator[str]:
-        url = self.base_url + "/generate/stream"
-        payload: Dict[str, Any] = {
-            "provider": self.provider,
-            "model": self.model,
-            "messages": messages,
-            "temperature": self.temperature,
-            "maxTokens": self.max_tokens,
-        }
-        if self.top_p is not None:
-            payload["topP"] = self.top_p
-        if tools is not None:
-            payload["tools"] = tools
-        if tool_choice is not None:
-            payload["toolChoice"] = tool_choice
-        if response_format is not None:
-            payload["responseFormat"] = response_format
-
-        payload.update(self.extra.get("request_overrides", {}))
-
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            method="POST",
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "text/event-stream",
-                "Cache-Control": "no-cache",
-            },
-        )
-        ctx = None
-        if url.startswith("https://") and not self.verify_tls:
-            ctx = ssl._create_unverified_context()  # noqa: SslCertVerificationDisabled
-
-        try:
-            resp = urllib.request.urlopen(req, timeout=self.timeout_s, context=ctx)
-        except urllib.error.HTTPError as e:
-            detail = e.read().decode("utf-8", errors="ignore") if hasattr(e, "read") else str(e)
-            raise RuntimeError(f"llmhub HTTPError {e.code}: {detail}") from e
-
-        buf: List[str] = []
-        try:
-            for raw in resp:
-                line = raw.decode("utf-8", errors="ignore").rstrip("\n")
-                if not line:
-                    if buf:
-                        event_data = "\n".join(buf)
-                        buf.clear()
-                        for out in self._handle_sse_event(event_data):
-                            yield out
-                    continue
-                if line.startswith(":"):
-                    continue
-                if line.startswith("data:"):
-                    buf.append(line[len("data:"):].lstrip())
-            if buf:
-                event_data = "\n".join(buf)
-                for out in self._handle_sse_event(event_data):
-                    yield out
-        finally:
-            try:
-                resp.close()
-            except Exception:
-                pass
-
     def _handle_sse_event(self, event_data: str) -> List[str]:
         if event_data.strip() == "[DONE]":
             return []
@@ -198,6 +240,32 @@ class LLMHubHTTPBackend(LLMBackend):
             raise RuntimeError(f"llmhub stream error: {obj.get('error')}")
         return []
 
+def _raise_for_status(resp: PooledResponse, body: str) -> None:
+    if resp.status >= 400:
+        raise RuntimeError(f"llmhub HTTPError {resp.status}: {body}")
+
+class _SSEBuffer:
+    """Collects `data:` lines of a server-sent-events stream into whole events."""
+
+    def __init__(self) -> None:
+        self._buf: List[str] = []
+
+    def feed(self, line: str) -> Optional[str]:
+        """Add one line; returns the event's data when `line` ends an event."""
+        if not line:
+            return self.flush()
+        if line.startswith("data:"):
+            self._buf.append(line[len("data:"):].lstrip())
+        # Comments (":...") and other fields are ignored
+        return None
+
+    def flush(self) -> Optional[str]:
+        if not self._buf:
+            return None
+        event_data = "\n".join(self._buf)
+        self._buf.clear()
+        return event_data
+
 def _normalize_generate_output(obj: Any) -> str:
     """Normalize llmhub-node `GenerateOutput` into assistant text."""
     if isinstance(obj, str):
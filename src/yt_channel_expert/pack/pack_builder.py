@@ -1,43 +1,110 @@
 from __future__ import annotations
+import hashlib
 import json
 import os
 import sqlite3
 import tempfile
 import zipfile
-from dataclasses import asdict
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 from tqdm import tqdm
 
 from ..config import PackConfig
+from ..errors import PackBuildError
 from ..types import Channel, Video, TranscriptSegment, MicroChunk, Section
 from ..ingestion.manifest import load_manifest
 from ..ingestion.transcripts import load_transcript_file
 from ..processing.normalize import normalize_segments
 from ..processing.chapters import parse_chapters_from_description
 from ..processing.chunking import build_micro_chunks
+from ..processing.summaries import build_episode_summary
 from ..processing.sections import (
     build_sections_from_chapters,
     auto_chapter_sections,
     assign_chunks_to_sections,
 )
+from ..embeddings.embedder import Embedder
 from ..embeddings.factory import make_embedder
-from ..index.vector_index import BruteForceIndex
 from ..index.bm25 import BM25
+from ..index.ivfpq import IVFPQIndex
+from ..index.quantize import StoredEmbeddings, quantize_rows
+from ..index.vector_index import HNSWIndex
+from .pack_reader import PackReader
 from .schema import create_schema, SCHEMA_VERSION
 
 def _now_iso() -> str:
     from datetime import datetime, timezone
     return datetime.now(timezone.utc).isoformat()
 
+@dataclass
+class _ProcessedVideo:
+    segments: List[TranscriptSegment]
+    sections: List[Section]
+    chunks: List[MicroChunk]
+    # Set when auto-chaptering already embedded the chunks; reused for the chunk matrix.
+    chunk_embeddings: Optional[np.ndarray] = None
+
+class _VectorRows:
+    """DB ids of the embedding rows written so far, in row order.
+
+    Texts are not kept: they are streamed back from SQLite when the matrices are written.
+    Chunk vectors that auto-chaptering already computed are spilled to `spill_path` as raw
+    float32 rows (row numbers in `spilled_rows`), so memory does not grow with the channel.
+    """
+
+    def __init__(self, spill_path: Path, dim: int) -> None:
+        self.chunk_ids: List[int] = []
+        self.section_ids: List[int] = []
+        self.video_ids: List[str] = []  # videos with rows, in processing order
+        self.spilled_rows: List[int] = []
+        self.spill_path = spill_path
+        self.dim = int(dim)
+        self._spill = open(spill_path, "wb")
+
+    def spill(self, first_row: int, vecs: np.ndarray) -> None:
+        self._spill.write(np.ascontiguousarray(vecs, dtype=np.float32).tobytes())
+        self.spilled_rows.extend(range(first_row, first_row + vecs.shape[0]))
+
+    def spilled(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """(row numbers, vectors) of spilled chunk rows; the vectors are memory-mapped."""
+        self._spill.close()
+        rows = np.asarray(self.spilled_rows, dtype=np.int64)
+        if not rows.size:
+            return rows, None
+        return rows, np.memmap(self.spill_path, dtype=np.float32, mode="r", shape=(rows.size, self.dim))
+
+@dataclass
+class PackUpdateResult:
+    pack_path: Path
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    unchanged: int
+
 class PackBuilder:
-    def __init__(self, cfg: PackConfig) -> None:
+    """Build (or update) a Channel Pack from an input folder.
+
+    `workers > 1` parses, chunks and auto-chapters videos in a process pool. Results are
+    consumed in input order and all SQLite writes stay in this process, so row ids and
+    pack contents match a serial build.
+
+    `clock` returns the ISO timestamps written to the manifest and channel row (default:
+    now, UTC); pass a fixed one for reproducible packs.
+    """
+
+    def __init__(self, cfg: PackConfig, workers: int = 1, clock: Optional[Callable[[], str]] = None) -> None:
         self.cfg = cfg
-        self.embedder = make_embedder(cfg.embedding)
+        self.workers = max(1, int(workers))
+        self.clock = clock or _now_iso
+        self.embedder = make_embedder(cfg.embedding, cached=True)
 
     def build_from_folder(self, input_dir: Path, out_pack_path: Path) -> Path:
+        _check_ann_deps(self._ann_kind(None))
         channel, videos = load_manifest(input_dir)
         transcripts_dir = input_dir / "transcripts"
 
@@ -49,127 +116,550 @@ class PackBuilder:
 
             conn = sqlite3.connect(str(db_path))
             create_schema(conn)
-            self._insert_channel(conn, channel)
-            self._insert_videos(conn, videos)
-
-            # Collect text items for embeddings
-            all_chunk_texts: List[str] = []
-            chunk_rows: List[Tuple[MicroChunk, Video]] = []
-            all_section_texts: List[str] = []
-            section_rows: List[Tuple[Section, Video]] = []
-
-            for v in tqdm(videos, desc="Processing videos"):
-                tpath = self._find_transcript(transcripts_dir, v.video_id)
-                segments: List[TranscriptSegment] = []
-                if tpath and tpath.exists():
-                    segments = load_transcript_file(tpath, v.video_id)
-                    segments = normalize_segments(segments)
-                    self._insert_segments(conn, v.video_id, segments)
-
-                # Skip if no transcript
-                if not segments:
-                    continue
-
-                # Build micro-chunks
-                chunks = build_micro_chunks(
-                    segments,
-                    chunk_sec=self.cfg.chunking.micro_chunk_sec,
-                    overlap_sec=self.cfg.chunking.micro_overlap_sec,
-                )
+            self._upsert_channel(conn, channel)
+            self._insert_videos(conn, videos, self._content_hashes(transcripts_dir, videos))
+
+            rows = _VectorRows(tmp_path / "chunk_vecs.spill", self.embedder.dim)
+            for v, pv in tqdm(self._process_videos(videos, transcripts_dir), total=len(videos), desc="Processing videos"):
+                self._add_video(conn, v, pv, rows)
+
+            # Build embeddings and indices, streaming texts back from SQLite
+            section_ids = np.asarray(rows.section_ids, dtype=np.int64)
+            chunk_ids = np.asarray(rows.chunk_ids, dtype=np.int64)
+            self._write_matrix(
+                vectors_dir / "section_embeddings.npy", None, section_ids.size, self._section_texts(conn, section_ids)
+            )
+            self._write_matrix(
+                vectors_dir / "chunk_embeddings.npy", None, chunk_ids.size, self._chunk_texts(conn, chunk_ids), rows.spilled()
+            )
+            episode_ids = np.asarray(self._insert_episode_summaries(conn, rows.video_ids), dtype=np.int64)
+            self._write_matrix(
+                vectors_dir / "episode_embeddings.npy", None, episode_ids.size, self._episode_texts(conn, episode_ids)
+            )
+            bm25: Optional[BM25] = None
+            if chunk_ids.size and self.cfg.retrieval.use_bm25:
+                bm25 = BM25()
+                bm25.add_documents(self._chunk_texts(conn, chunk_ids))
+            self._write_vectors(vectors_dir, conn, episode_ids, section_ids, chunk_ids, bm25)
+            ann = self._write_ann(vectors_dir, None)
 
-                # Build sections from chapters or auto
-                chapters = parse_chapters_from_description(v.description)
-                video_end_ms = max(s.end_ms for s in segments)
-                sections: List[Section] = []
-                if chapters:
-                    sections = build_sections_from_chapters(v.video_id, chapters, video_end_ms)
-                else:
-                    # Auto-chapter requires embeddings; we use hash embedder here too (works but not semantic).
-                    chunk_emb = self.embedder.embed_texts([c.text for c in chunks])
-                    sections = auto_chapter_sections(
-                        video_id=v.video_id,
-                        chunks=chunks,
-                        chunk_embeddings=chunk_emb,
-                        target_section_sec=self.cfg.chunking.target_section_sec,
-                        max_section_sec=self.cfg.chunking.max_section_sec,
-                    )
-
-                sec_ids = self._insert_sections(conn, v.video_id, sections)
-                # Assign chunks to sections by index order (sec_ids align with insertion order)
-                chunks = assign_chunks_to_sections(chunks, sections)
-                self._insert_chunks(conn, v.video_id, chunks, sec_ids)
-
-                # Collect for embedding matrices
-                for s in sections:
-                    all_section_texts.append(f"{v.title}\n{s.title}\n{s.summary or ''}")
-                    section_rows.append((s, v))
-                for c in chunks:
-                    all_chunk_texts.append(c.text)
-                    chunk_rows.append((c, v))
-
-            # Build embeddings and indices
-            if all_section_texts:
-                section_emb = self.embedder.embed_texts(all_section_texts)
-                np.save(vectors_dir / "section_embeddings.npy", section_emb)
-            if all_chunk_texts:
-                chunk_emb = self.embedder.embed_texts(all_chunk_texts)
-                np.save(vectors_dir / "chunk_embeddings.npy", chunk_emb)
-
-            # Optional BM25 corpora
-            bm25 = BM25()
-            if all_chunk_texts and self.cfg.retrieval.use_bm25:
-                bm25.add_documents(all_chunk_texts)
-                # Persist BM25 tokens minimally by storing docs as joined tokens (toy)
-                # Production: store DF + doc lens.
-                with open(vectors_dir / "bm25_docs.json", "w", encoding="utf-8") as f:
-                    json.dump(all_chunk_texts, f)
-
-            # Write manifest
             manifest = {
                 "pack_version": 1,
                 "schema_version": SCHEMA_VERSION,
-                "created_at": _now_iso(),
+                "created_at": self.clock(),
                 "channel_id": channel.channel_id,
                 "channel_title": channel.title,
                 "embedding_dim": int(self.embedder.dim),
                 "embedding_model_id": self.cfg.embedding.model_name,
                 "video_count": len(videos),
-                "note": "This is a spec scaffold. Replace hash embeddings + toy bm25 persistence for production.",
+                "chunk_count": int(chunk_ids.size),
+                "section_count": int(section_ids.size),
+                "episode_count": int(episode_ids.size),
+                "bm25": bm25.params() if bm25 is not None else None,
+                "embedding_storage": self._embedding_storage(),
+                "ann_index": ann,
+                "build_signature": self._build_signature(),
+                "note": "This is a spec scaffold. Replace hash embeddings for production.",
             }
-            (tmp_path / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-
-            # Bundle
-            out_pack_path.parent.mkdir(parents=True, exist_ok=True)
-            with zipfile.ZipFile(out_pack_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-                z.write(tmp_path / "manifest.json", arcname="manifest.json")
-                z.write(db_path, arcname="pack.sqlite")
-                for p in vectors_dir.rglob("*"):
-                    z.write(p, arcname=str(p.relative_to(tmp_path)))
+            _finalize_db(conn)
+            self._bundle(out_pack_path, manifest, db_path, vectors_dir)
 
         return out_pack_path
 
-    def _find_transcript(self, transcripts_dir: Path, video_id: str) -> Path | None:
-        for ext in (".srt", ".vtt", ".json"):
-            p = transcripts_dir / f"{video_id}{ext}"
-            if p.exists():
-                return p
+    def update_pack(self, pack_path: Path, input_dir: Path, out_pack_path: Optional[Path] = None) -> PackUpdateResult:
+        """Bring an existing pack in line with `input_dir`, processing only what changed.
+
+        Videos are compared by content hash (metadata that feeds chunk/section text plus the
+        transcript bytes). New and changed videos are processed and their rows, embeddings
+        and BM25 postings appended; the old rows of changed videos and all rows of videos no
+        longer in the input are deleted from the DB and their embedding rows tombstoned
+        (row id -1). Tombstoned rows are dropped on the next full build.
+        """
+        out_pack_path = out_pack_path or pack_path
+        channel, videos = load_manifest(input_dir)
+        transcripts_dir = input_dir / "transcripts"
+        hashes = self._content_hashes(transcripts_dir, videos)
+
+        with PackReader(pack_path, extract=True) as pr:
+            assert pr.paths is not None
+            manifest = dict(pr.paths.manifest)
+            self._check_updatable(manifest, channel)
+            _check_ann_deps(self._ann_kind(manifest))
+            conn = pr.connect()
+            create_schema(conn)  # picks up indexes added since the pack was built
+
+            known = {
+                vid: (h, bool(dead))
+                for vid, h, dead in conn.execute("SELECT video_id, content_hash, tombstoned FROM video")
+            }
+            live = {vid for vid, (_, dead) in known.items() if not dead}
+            incoming = {v.video_id for v in videos}
+            todo = [v for v in videos if v.video_id not in live or known[v.video_id][0] != hashes[v.video_id]]
+            added = [v.video_id for v in todo if v.video_id not in live]
+            changed = [v.video_id for v in todo if v.video_id in live]
+            removed = sorted(live - incoming)
+
+            dead_chunk_ids, dead_section_ids, dead_episode_ids = self._delete_video_rows(conn, changed + removed)
+            self._upsert_channel(conn, channel)
+            self._insert_videos(conn, videos, hashes)
+            conn.executemany("UPDATE video SET tombstoned = 1 WHERE video_id = ?", [(vid,) for vid in removed])
+            conn.commit()
+
+            section_emb, chunk_emb = pr.load_stored_embeddings()
+            section_ids, chunk_ids = pr.load_row_ids()
+            episode_emb, episode_ids, _ = pr.load_episodes()
+            # Packs from before the episode tier get summaries for their untouched videos too
+            backfill: List[str] = []
+            if episode_ids is None:
+                backfill = [vid for vid in sorted(live) if vid not in set(changed) | set(removed)]
+            episode_ids = _tombstone(episode_ids, dead_episode_ids)
+            bm25 = pr.load_bm25()
+            section_ids = _tombstone(section_ids, dead_section_ids)
+            dead_chunk_rows = np.flatnonzero(np.isin(np.asarray(chunk_ids), dead_chunk_ids)) if chunk_ids is not None else None
+            chunk_ids = _tombstone(chunk_ids, dead_chunk_ids)
+
+            with tempfile.TemporaryDirectory() as tmp:
+                tmp_path = Path(tmp)
+                vectors_dir = tmp_path / "vectors"
+                vectors_dir.mkdir()
+                rows = _VectorRows(tmp_path / "chunk_vecs.spill", self.embedder.dim)
+                for v, pv in tqdm(self._process_videos(todo, transcripts_dir), total=len(todo), desc="Processing new/changed videos"):
+                    self._add_video(conn, v, pv, rows)
+
+                new_section_ids = np.asarray(rows.section_ids, dtype=np.int64)
+                new_chunk_ids = np.asarray(rows.chunk_ids, dtype=np.int64)
+                self._write_matrix(
+                    vectors_dir / "section_embeddings.npy",
+                    section_emb,
+                    new_section_ids.size,
+                    self._section_texts(conn, new_section_ids),
+                )
+                self._write_matrix(
+                    vectors_dir / "chunk_embeddings.npy",
+                    chunk_emb,
+                    new_chunk_ids.size,
+                    self._chunk_texts(conn, new_chunk_ids),
+                    rows.spilled(),
+                )
+                new_episode_ids = np.asarray(self._insert_episode_summaries(conn, backfill + rows.video_ids), dtype=np.int64)
+                self._write_matrix(
+                    vectors_dir / "episode_embeddings.npy",
+                    episode_emb,
+                    new_episode_ids.size,
+                    self._episode_texts(conn, new_episode_ids),
+                )
+                episode_ids = np.concatenate([episode_ids, new_episode_ids])
+                section_ids = np.concatenate([section_ids, new_section_ids])
+                chunk_ids = np.concatenate([chunk_ids, new_chunk_ids])
+                if self.cfg.retrieval.use_bm25 and (bm25 is not None or new_chunk_ids.size):
+                    if bm25 is None:
+                        bm25 = BM25()  # pack had no chunk rows yet
+                    bm25.append_documents(self._chunk_texts(conn, new_chunk_ids), drop_docs=dead_chunk_rows)
+                self._write_vectors(vectors_dir, conn, episode_ids, section_ids, chunk_ids, bm25)
+                ann = self._write_ann(vectors_dir, pr)
+                live_videos = conn.execute("SELECT COUNT(*) FROM video WHERE tombstoned = 0").fetchone()[0]
+                manifest.update({
+                    "updated_at": self.clock(),
+                    "channel_title": channel.title,
+                    "video_count": int(live_videos),
+                    "chunk_count": int((chunk_ids >= 0).sum()),
+                    "section_count": int((section_ids >= 0).sum()),
+                    "episode_count": int((episode_ids >= 0).sum()),
+                    "bm25": bm25.params() if bm25 is not None else None,
+                    "embedding_storage": self._embedding_storage(),
+                    "ann_index": ann,
+                })
+                _finalize_db(conn)
+                self._bundle(out_pack_path, manifest, pr.paths.db_path, vectors_dir)
+
+        return PackUpdateResult(
+            pack_path=out_pack_path,
+            added=added,
+            changed=changed,
+            removed=removed,
+            unchanged=len(videos) - len(todo),
+        )
+
+    def _build_signature(self) -> Dict:
+        """Build settings that shape pack contents; an update must use the same ones."""
+        return {
+            "embedding": {
+                "backend": self.cfg.embedding.backend,
+                "model_name": self.cfg.embedding.model_name,
+                "dim": int(self.embedder.dim),
+            },
+            "chunking": self.cfg.chunking.model_dump(),
+            "use_bm25": self.cfg.retrieval.use_bm25,
+            # Update re-encodes stored rows, which are already decoded from this storage
+            "embedding_storage": self._embedding_storage(),
+        }
+
+    def _embedding_storage(self) -> Dict:
+        return {
+            "dtype": self.cfg.embedding.storage_dtype,
+            "full_precision": self.cfg.embedding.storage_dtype == "float32" or self.cfg.embedding.keep_full_precision,
+        }
+
+    def _check_updatable(self, manifest: Dict, channel: Channel) -> None:
+        if int(manifest.get("schema_version", 1)) < 2:
+            raise PackBuildError("Pack predates incremental updates (schema_version < 2); rebuild it with `ytce pack build`.")
+        if manifest.get("build_signature") != self._build_signature():
+            raise PackBuildError(
+                "Embedding/chunking/storage config differs from the one the pack was built with; "
+                "pass the original --config or rebuild with `ytce pack build`."
+            )
+        if manifest.get("channel_id") != channel.channel_id:
+            raise PackBuildError(f"Pack is for channel {manifest.get('channel_id')}, input is {channel.channel_id}")
+
+    def _content_hashes(self, transcripts_dir: Path, videos: Sequence[Video]) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        for v in videos:
+            h = hashlib.sha256()
+            # title feeds section embedding text, description feeds chapters
+            h.update(json.dumps([v.title, v.description]).encode("utf-8"))
+            tpath = _find_transcript(transcripts_dir, v.video_id)
+            if tpath is not None:
+                h.update(tpath.suffix.lower().encode("utf-8"))
+                h.update(tpath.read_bytes())
+            out[v.video_id] = h.hexdigest()
+        return out
+
+    def _process_videos(self, videos: Sequence[Video], transcripts_dir: Path) -> Iterator[Tuple[Video, Optional[_ProcessedVideo]]]:
+        """Yield (video, processed) in input order, fanning out to worker processes if configured."""
+        if self.workers <= 1 or len(videos) <= 1:
+            for v in videos:
+                yield v, _process_video(self.cfg, self.embedder, v, transcripts_dir)
+            return
+        # Bounded window of in-flight videos: keeps workers busy without buffering the
+        # whole channel's segments in memory while the writer catches up.
+        window = self.workers * 4
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.cfg.model_dump_json(),),
+        ) as ex:
+            pending: Deque[Tuple[Video, Future]] = deque()
+            it = iter(videos)
+            for v in it:
+                pending.append((v, ex.submit(_process_video_in_worker, v, transcripts_dir)))
+                if len(pending) >= window:
+                    break
+            while pending:
+                v, fut = pending.popleft()
+                nxt = next(it, None)
+                if nxt is not None:
+                    pending.append((nxt, ex.submit(_process_video_in_worker, nxt, transcripts_dir)))
+                yield v, fut.result()
+
+    def _add_video(self, conn: sqlite3.Connection, v: Video, pv: Optional[_ProcessedVideo], rows: _VectorRows) -> None:
+        if pv is None:
+            return
+        self._insert_segments(conn, v.video_id, pv.segments)
+        sec_ids = self._insert_sections(conn, v.video_id, pv.sections)
+        chunk_ids = self._insert_chunks(conn, v.video_id, pv.chunks, sec_ids)
+
+        # Record embedding rows; texts are read back from the DB when the matrices are written
+        if pv.chunk_embeddings is not None:
+            rows.spill(len(rows.chunk_ids), pv.chunk_embeddings)
+        rows.section_ids.extend(sec_ids)
+        rows.chunk_ids.extend(chunk_ids)
+        rows.video_ids.append(v.video_id)
+
+    def _section_texts(self, conn: sqlite3.Connection, section_ids: np.ndarray) -> Iterator[str]:
+        sql = (
+            "SELECT s.section_id, v.title, s.title, s.summary FROM section s JOIN video v ON v.video_id = s.video_id "
+            "WHERE s.section_id IN ({})"
+        )
+        for sid, vtitle, stitle, summary in _rows_by_ids(conn, sql, section_ids):
+            yield f"{vtitle}\n{stitle}\n{summary or ''}"
+
+    def _episode_texts(self, conn: sqlite3.Connection, episode_ids: np.ndarray) -> Iterator[str]:
+        sql = "SELECT summary_id, text FROM summary WHERE summary_id IN ({})"
+        for _sid, text in _rows_by_ids(conn, sql, episode_ids):
+            yield text
+
+    def _insert_episode_summaries(self, conn: sqlite3.Connection, video_ids: Sequence[str]) -> List[int]:
+        """Write an extractive 'episode_short' summary for each video with sections; return summary ids.
+
+        Built from the DB rows (section titles and each section's first chunk), so updates
+        can also summarize videos that were processed by an earlier build.
+        """
+        ids: List[int] = []
+        for vid in video_ids:
+            title, description = conn.execute("SELECT title, description FROM video WHERE video_id = ?", (vid,)).fetchone()
+            sections = [
+                (stitle, text or "")
+                for stitle, text in conn.execute(
+                    """
+                    SELECT s.title,
+                           (SELECT mc.text FROM micro_chunk mc WHERE mc.section_id = s.section_id ORDER BY mc.chunk_id LIMIT 1)
+                    FROM section s WHERE s.video_id = ? ORDER BY s.section_id
+                    """,
+                    (vid,),
+                )
+            ]
+            if not sections:
+                continue
+            cur = conn.execute(
+                "INSERT INTO summary(video_id,kind,text) VALUES (?,?,?)",
+                (vid, "episode_short", build_episode_summary(title, description, sections)),
+            )
+            ids.append(int(cur.lastrowid))
+        conn.commit()
+        return ids
+
+    def _chunk_texts(self, conn: sqlite3.Connection, chunk_ids: np.ndarray) -> Iterator[str]:
+        sql = "SELECT chunk_id, text FROM micro_chunk WHERE chunk_id IN ({})"
+        for _cid, text in _rows_by_ids(conn, sql, chunk_ids):
+            yield text
+
+    def _embed_batch(self) -> int:
+        """Texts per `embed_texts` call: `_EMBED_BATCH`, or enough to give every encode
+        worker a few model batches."""
+        ec = self.cfg.embedding
+        return max(_EMBED_BATCH, ec.workers * ec.batch_size * 4) if ec.workers > 1 else _EMBED_BATCH
+
+    def _write_matrix(
+        self,
+        path: Path,
+        base: Optional[StoredEmbeddings],
+        n_new: int,
+        texts: Iterator[str],
+        precomputed: Optional[Tuple[np.ndarray, Optional[np.ndarray]]] = None,
+    ) -> None:
+        """Write `base` rows followed by the embeddings of `n_new` `texts` into a memory-mapped `.npy`.
+
+        Texts are embedded `_embed_batch()` at a time and each batch is written straight to
+        disk, so peak memory is one batch regardless of channel size. Progress and
+        throughput (texts/s) are reported with tqdm. `precomputed` is
+        (row numbers relative to the first new row, vectors) for rows that need no embedding.
+        The matrix is then converted to `embedding.storage_dtype` (see `_quantize_matrix`).
+        """
+        spill_rows, spill_vecs = precomputed if precomputed is not None else (np.zeros(0, dtype=np.int64), None)
+        n_base = 0 if base is None else base.n_rows
+        if n_base + n_new == 0:
+            return
+        dim = self.embedder.dim
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n_base + n_new, dim))
+        for i in range(0, n_base, _EMBED_BATCH):
+            j = min(i + _EMBED_BATCH, n_base)
+            out[i:j] = base.rows(i, j)
+        row = 0
+        progress = tqdm(total=n_new, unit="text", unit_scale=True, desc=f"Embedding {path.stem}", disable=n_new == 0)
+        for batch in _batched(texts, self._embed_batch()):
+            lo, hi = row, row + len(batch)
+            s_lo, s_hi = np.searchsorted(spill_rows, [lo, hi])
+            have = spill_rows[s_lo:s_hi] - lo
+            need = np.setdiff1d(np.arange(len(batch)), have, assume_unique=True)
+            if have.size:
+                out[n_base + lo + have] = spill_vecs[s_lo:s_hi]
+            if need.size:
+                out[n_base + lo + need] = self.embedder.embed_texts([batch[j] for j in need.tolist()])
+            row = hi
+            progress.update(len(batch))
+        progress.close()
+        out.flush()
+        del out
+        self._quantize_matrix(path)
+
+    def _quantize_matrix(self, path: Path) -> None:
+        """Re-encode a float32 `<name>.npy` as `embedding.storage_dtype`, block by block.
+
+        int8 rows get per-row scales in `<name>_scales.npy`; with `keep_full_precision` the
+        float32 matrix is kept as `<name>_full.npy` for exact rescoring.
+        """
+        dtype = self.cfg.embedding.storage_dtype
+        if dtype == "float32":
+            return
+        full_path = path.with_name(path.stem + "_full.npy")
+        os.replace(path, full_path)
+        full = np.load(full_path, mmap_mode="r")
+        n = int(full.shape[0])
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.dtype(dtype), shape=full.shape)
+        scales = np.zeros(n, dtype=np.float32) if dtype == "int8" else None
+        for i in range(0, n, _EMBED_BATCH):
+            j = min(i + _EMBED_BATCH, n)
+            q, s = quantize_rows(full[i:j], dtype)
+            out[i:j] = q
+            if scales is not None and s is not None:
+                scales[i:j] = s
+        out.flush()
+        del out, full
+        if scales is not None:
+            np.save(path.with_name(path.stem + "_scales.npy"), scales)
+        if not self.cfg.embedding.keep_full_precision:
+            full_path.unlink()
+
+    def _section_chunk_ranges(self, conn: sqlite3.Connection, section_ids: np.ndarray, chunk_ids: np.ndarray) -> np.ndarray:
+        """(S, 2) int64: [start, end) chunk rows of each section row.
+
+        A section's chunks are written consecutively (videos are processed one at a time
+        and chunks are assigned to sections in time order), so one range per section
+        covers them. Tombstoned and chunkless sections get an empty range.
+        """
+        live = np.flatnonzero(chunk_ids >= 0)
+        sql = "SELECT chunk_id, section_id FROM micro_chunk WHERE chunk_id IN ({})"
+        owners = [-1 if sid is None else sid for _cid, sid in _rows_by_ids(conn, sql, chunk_ids[live])]
+        return _owner_ranges(live, _rows_of(section_ids, owners), section_ids.size)
+
+    def _episode_section_ranges(self, conn: sqlite3.Connection, episode_ids: np.ndarray, section_ids: np.ndarray) -> np.ndarray:
+        """(E, 2) int64: [start, end) section rows of each episode row (sections of a video
+        are consecutive for the same reason chunks of a section are)."""
+        live_ep = episode_ids[episode_ids >= 0]
+        ep_sql = "SELECT summary_id, video_id FROM summary WHERE summary_id IN ({})"
+        ep_by_video = {vid: sid for sid, vid in _rows_by_ids(conn, ep_sql, live_ep)}
+        live = np.flatnonzero(section_ids >= 0)
+        sql = "SELECT section_id, video_id FROM section WHERE section_id IN ({})"
+        owners = [ep_by_video.get(vid, -1) for _sid, vid in _rows_by_ids(conn, sql, section_ids[live])]
+        return _owner_ranges(live, _rows_of(episode_ids, owners), episode_ids.size)
+
+    def _write_vectors(
+        self,
+        vectors_dir: Path,
+        conn: sqlite3.Connection,
+        episode_ids: np.ndarray,
+        section_ids: np.ndarray,
+        chunk_ids: np.ndarray,
+        bm25: Optional[BM25],
+    ) -> None:
+        # Embedding row i <-> DB primary key (-1 = tombstoned), persisted next to the matrices.
+        # The *_ranges arrays map each row to the rows of the tier below it, for coarse-to-fine retrieval.
+        if episode_ids.size:
+            np.save(vectors_dir / "episode_ids.npy", episode_ids)
+            np.save(vectors_dir / "episode_section_ranges.npy", self._episode_section_ranges(conn, episode_ids, section_ids))
+        if section_ids.size:
+            np.save(vectors_dir / "section_ids.npy", section_ids)
+            np.save(vectors_dir / "section_chunk_ranges.npy", self._section_chunk_ranges(conn, section_ids, chunk_ids))
+        if chunk_ids.size:
+            np.save(vectors_dir / "chunk_ids.npy", chunk_ids)
+        # Optional BM25 inverted index over chunk rows (same row order as chunk_embeddings)
+        if bm25 is not None:
+            for name, arr in bm25.to_arrays().items():
+                np.save(vectors_dir / f"bm25_{name}.npy", arr)
+
+    def _write_ann(self, vectors_dir: Path, base: Optional[PackReader]) -> Optional[Dict]:
+        """Write the prebuilt vector index selected by `retrieval.vector_index`.
+
+        "ivfpq" indexes chunk rows; "hnsw" writes one graph per matrix. On update (`base` =
+        the old pack) an index of the same kind is extended with the appended rows rather
+        than rebuilt; tombstoned rows stay in it and are filtered at query time.
+        With `vector_index` unset, a build writes none and an update keeps the old pack's kind.
+        Returns the manifest `ann_index` entry (None when no index is written).
+        """
+        kind = self._ann_kind(base.paths.manifest if base is not None and base.paths is not None else None)
+        if kind == "ivfpq":
+            return self._write_ivfpq(vectors_dir, base.load_ivfpq() if base is not None else None)
+        if kind == "hnsw":
+            return self._write_hnsw(vectors_dir, base)
         return None
 
-    def _insert_channel(self, conn: sqlite3.Connection, ch: Channel) -> None:
+    def _ann_kind(self, base_manifest: Optional[Dict]) -> Optional[str]:
+        """Index kind to write: the configured one, else (on update) the old pack's."""
+        kind = self.cfg.retrieval.vector_index
+        if kind is None and base_manifest is not None:
+            kind = (base_manifest.get("ann_index") or {}).get("kind")
+        return kind
+
+    def _write_ivfpq(self, vectors_dir: Path, base: Optional[IVFPQIndex]) -> Optional[Dict]:
+        rc = self.cfg.retrieval
+        emb = _load_local_stored(vectors_dir, "chunk_embeddings")
+        if emb is None:
+            return None
+        if base is not None and base.n_rows <= emb.n_rows:
+            index = base
+            index.add(emb.slice(base.n_rows))
+        else:
+            index = IVFPQIndex.train(emb, nlist=rc.ivf_nlist, m=rc.pq_m)
+        for name, arr in index.to_arrays().items():
+            np.save(vectors_dir / f"chunk_ivfpq_{name}.npy", arr)
+        return {"kind": "ivfpq", **index.params()}
+
+    def _write_hnsw(self, vectors_dir: Path, base: Optional[PackReader]) -> Optional[Dict]:
+        rc = self.cfg.retrieval
+        written = False
+        for name in ("section", "chunk"):
+            emb = _load_local_stored(vectors_dir, f"{name}_embeddings")
+            if emb is None:
+                continue
+            index = base.load_hnsw(name, ef=rc.hnsw_ef) if base is not None else None
+            if index is not None and index.n_rows <= emb.n_rows:
+                index.add(emb.slice(index.n_rows))
+            else:
+                index = HNSWIndex(self.embedder.dim, ef=rc.hnsw_ef, M=rc.hnsw_m, ef_construction=rc.hnsw_ef_construction)
+                index.add(emb)
+            index.save(vectors_dir / f"{name}_hnsw.bin")
+            written = True
+        if not written:
+            return None
+        return {
+            "kind": "hnsw",
+            "space": "cosine",
+            "dim": int(self.embedder.dim),
+            "M": rc.hnsw_m,
+            "ef_construction": rc.hnsw_ef_construction,
+        }
+
+    def _bundle(self, out_pack_path: Path, manifest: Dict, db_path: Path, vectors_dir: Path) -> None:
+        # Bundle. The DB and .npy matrices are stored uncompressed so readers can
+        # use them in place (mmap at the zip offset) instead of extracting.
+        # Written beside the target and renamed, so an existing pack is replaced atomically.
+        out_pack_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_out = tempfile.mkstemp(dir=out_pack_path.parent, prefix=f".{out_pack_path.name}.")
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_out, "w", compression=zipfile.ZIP_DEFLATED) as z:
+                z.writestr("manifest.json", json.dumps(manifest, indent=2))
+                z.write(db_path, arcname="pack.sqlite", compress_type=zipfile.ZIP_STORED)
+                for p in sorted(vectors_dir.rglob("*")):
+                    compress_type = zipfile.ZIP_STORED if p.suffix == ".npy" else zipfile.ZIP_DEFLATED
+                    z.write(p, arcname="vectors/" + p.relative_to(vectors_dir).as_posix(), compress_type=compress_type)
+            os.replace(tmp_out, out_pack_path)
+        except BaseException:
+            if os.path.exists(tmp_out):
+                os.unlink(tmp_out)
+            raise
+
+    def _upsert_channel(self, conn: sqlite3.Connection, ch: Channel) -> None:
+        now = self.clock()
         conn.execute(
-            "INSERT OR REPLACE INTO channel(channel_id,title,description,source,created_at,last_sync_at) VALUES (?,?,?,?,?,?)",
-            (ch.channel_id, ch.title, ch.description, ch.source, _now_iso(), _now_iso()),
+            """
+            INSERT INTO channel(channel_id,title,description,source,created_at,last_sync_at) VALUES (?,?,?,?,?,?)
+            ON CONFLICT(channel_id) DO UPDATE SET
+              title=excluded.title, description=excluded.description,
+              source=excluded.source, last_sync_at=excluded.last_sync_at
+            """,
+            (ch.channel_id, ch.title, ch.description, ch.source, now, now),
         )
         conn.commit()
 
-    def _insert_videos(self, conn: sqlite3.Connection, videos: List[Video]) -> None:
+    def _insert_videos(self, conn: sqlite3.Connection, videos: List[Video], hashes: Dict[str, str]) -> None:
         for v in videos:
             conn.execute(
-                "INSERT OR REPLACE INTO video(video_id,channel_id,title,description,published_at,duration_sec,url) VALUES (?,?,?,?,?,?,?)",
-                (v.video_id, v.channel_id, v.title, v.description, v.published_at, v.duration_sec, v.url),
+                "INSERT OR REPLACE INTO video(video_id,channel_id,title,description,published_at,duration_sec,url,content_hash,tombstoned) VALUES (?,?,?,?,?,?,?,?,0)",
+                (v.video_id, v.channel_id, v.title, v.description, v.published_at, v.duration_sec, v.url, hashes[v.video_id]),
             )
         conn.commit()
 
+    def _delete_video_rows(self, conn: sqlite3.Connection, video_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Delete the derived rows of `video_ids`; return the (chunk_ids, section_ids, summary_ids) removed."""
+        chunk_ids: List[int] = []
+        section_ids: List[int] = []
+        summary_ids: List[int] = []
+        for vid in video_ids:
+            chunk_ids += [r[0] for r in conn.execute("SELECT chunk_id FROM micro_chunk WHERE video_id = ?", (vid,))]
+            section_ids += [r[0] for r in conn.execute("SELECT section_id FROM section WHERE video_id = ?", (vid,))]
+            summary_ids += [r[0] for r in conn.execute("SELECT summary_id FROM summary WHERE video_id = ?", (vid,))]
+            conn.execute("DELETE FROM summary WHERE video_id = ?", (vid,))
+            conn.execute("DELETE FROM micro_chunk WHERE video_id = ?", (vid,))
+            conn.execute("DELETE FROM section WHERE video_id = ?", (vid,))
+            conn.execute("DELETE FROM transcript_segment WHERE video_id = ?", (vid,))
+        conn.commit()
+        return (
+            np.asarray(chunk_ids, dtype=np.int64),
+            np.asarray(section_ids, dtype=np.int64),
+            np.asarray(summary_ids, dtype=np.int64),
+        )
+
     def _insert_segments(self, conn: sqlite3.Connection, video_id: str, segments: List[TranscriptSegment]) -> None:
         conn.executemany(
             "INSERT INTO transcript_segment(video_id,start_ms,end_ms,text,speaker) VALUES (?,?,?,?,?)",
@@ -178,25 +668,177 @@ class PackBuilder:
         conn.commit()
 
     def _insert_sections(self, conn: sqlite3.Connection, video_id: str, sections: List[Section]) -> List[int]:
-        ids: List[int] = []
-        for s in sections:
-            cur = conn.execute(
-                "INSERT INTO section(video_id,start_ms,end_ms,title,summary) VALUES (?,?,?,?,?)",
-                (s.video_id, s.start_ms, s.end_ms, s.title, s.summary),
-            )
-            ids.append(int(cur.lastrowid))
+        first = _next_id(conn, "section", "section_id")
+        ids = list(range(first, first + len(sections)))
+        conn.executemany(
+            "INSERT INTO section(section_id,video_id,start_ms,end_ms,title,summary) VALUES (?,?,?,?,?,?)",
+            [(i, s.video_id, s.start_ms, s.end_ms, s.title, s.summary) for i, s in zip(ids, sections)],
+        )
         conn.commit()
         return ids
 
-    def _insert_chunks(self, conn: sqlite3.Connection, video_id: str, chunks: List[MicroChunk], section_ids: List[int]) -> None:
+    def _insert_chunks(self, conn: sqlite3.Connection, video_id: str, chunks: List[MicroChunk], section_ids: List[int]) -> List[int]:
+        first = _next_id(conn, "micro_chunk", "chunk_id")
+        ids = list(range(first, first + len(chunks)))
         rows = []
-        for c in chunks:
+        for i, c in zip(ids, chunks):
             sec_db_id = None
             if c.section_id is not None and 0 <= c.section_id < len(section_ids):
                 sec_db_id = section_ids[c.section_id]
-            rows.append((c.video_id, sec_db_id, c.start_ms, c.end_ms, c.text))
+            rows.append((i, c.video_id, sec_db_id, c.start_ms, c.end_ms, c.text))
         conn.executemany(
-            "INSERT INTO micro_chunk(video_id,section_id,start_ms,end_ms,text) VALUES (?,?,?,?,?)",
+            "INSERT INTO micro_chunk(chunk_id,video_id,section_id,start_ms,end_ms,text) VALUES (?,?,?,?,?,?)",
             rows,
         )
         conn.commit()
+        return ids
+
+def _next_id(conn: sqlite3.Connection, table: str, key: str) -> int:
+    """First id AUTOINCREMENT would assign in `table`, so a batch can take a contiguous
+    range and be inserted with one `executemany` (the builder is the only writer)."""
+    row = conn.execute(
+        f"SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0), "
+        f"COALESCE((SELECT MAX({key}) FROM {table}), 0))",
+        (table,),
+    ).fetchone()
+    return int(row[0]) + 1
+
+def _check_ann_deps(kind: Optional[str]) -> None:
+    """Fail before any work if the index kind needs an optional dependency that is missing."""
+    if kind != "hnsw":
+        return
+    try:
+        import hnswlib  # type: ignore  # noqa: F401
+    except ImportError as e:
+        raise PackBuildError("vector_index 'hnsw' needs hnswlib: pip install -e '.[hnsw]'") from e
+
+def _find_transcript(transcripts_dir: Path, video_id: str) -> Path | None:
+    for ext in (".srt", ".vtt", ".json"):
+        p = transcripts_dir / f"{video_id}{ext}"
+        if p.exists():
+            return p
+    return None
+
+def _process_video(cfg: PackConfig, embedder: Embedder, v: Video, transcripts_dir: Path) -> Optional[_ProcessedVideo]:
+    """Parse, normalize, chunk and section one video. Pure: touches no DB, so it can run in a worker."""
+    tpath = _find_transcript(transcripts_dir, v.video_id)
+    if not tpath:
+        return None
+    segments = normalize_segments(load_transcript_file(tpath, v.video_id))
+    # Skip if no transcript
+    if not segments:
+        return None
+
+    # Build micro-chunks
+    chunks = build_micro_chunks(
+        segments,
+        chunk_sec=cfg.chunking.micro_chunk_sec,
+        overlap_sec=cfg.chunking.micro_overlap_sec,
+    )
+
+    # Build sections from chapters or auto
+    chapters = parse_chapters_from_description(v.description)
+    video_end_ms = max(s.end_ms for s in segments)
+    sections: List[Section] = []
+    chunk_emb: Optional[np.ndarray] = None
+    if chapters:
+        sections = build_sections_from_chapters(v.video_id, chapters, video_end_ms)
+    else:
+        # Auto-chapter requires embeddings; we use hash embedder here too (works but not semantic).
+        chunk_emb = embedder.embed_texts([c.text for c in chunks])
+        sections = auto_chapter_sections(
+            video_id=v.video_id,
+            chunks=chunks,
+            chunk_embeddings=chunk_emb,
+            target_section_sec=cfg.chunking.target_section_sec,
+            max_section_sec=cfg.chunking.max_section_sec,
+        )
+
+    # Assign chunks to sections by index order (sec_ids align with insertion order)
+    chunks = assign_chunks_to_sections(chunks, sections)
+    return _ProcessedVideo(segments=segments, sections=sections, chunks=chunks, chunk_embeddings=chunk_emb)
+
+# Per-process state for `workers > 1` builds (set by the pool initializer).
+_WORKER: Optional[Tuple[PackConfig, Embedder]] = None
+
+def _init_worker(cfg_json: str) -> None:
+    global _WORKER
+    cfg = PackConfig.model_validate_json(cfg_json)
+    _WORKER = (cfg, make_embedder(cfg.embedding, cached=True))
+
+def _process_video_in_worker(v: Video, transcripts_dir: Path) -> Optional[_ProcessedVideo]:
+    assert _WORKER is not None
+    cfg, embedder = _WORKER
+    return _process_video(cfg, embedder, v, transcripts_dir)
+
+# Texts embedded (and written to the memory-mapped matrix) per batch while building.
+_EMBED_BATCH = 1024
+# SQLite caps bound parameters per statement; keep IN (...) lists below it.
+_SQL_BATCH = 500
+
+def _batched(it: Iterable[str], n: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for x in it:
+        batch.append(x)
+        if len(batch) == n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _rows_by_ids(conn: sqlite3.Connection, sql: str, ids: np.ndarray) -> Iterator[tuple]:
+    """Yield rows of `sql` (first column = id, `{}` = IN placeholders) in the order of `ids`."""
+    id_list = ids.tolist()
+    for i in range(0, len(id_list), _SQL_BATCH):
+        batch = id_list[i:i + _SQL_BATCH]
+        found = {r[0]: r for r in conn.execute(sql.format(",".join("?" * len(batch))), batch)}
+        for x in batch:
+            yield found[x]
+
+def _finalize_db(conn: sqlite3.Connection) -> None:
+    # Fold the WAL back into pack.sqlite so the bundled file is self-contained.
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+
+def _load_if_exists(path: Path) -> Optional[np.ndarray]:
+    return np.load(path, mmap_mode="r") if path.exists() else None
+
+def _load_local_stored(vectors_dir: Path, name: str) -> Optional[StoredEmbeddings]:
+    """A matrix just written to `vectors_dir`, memory-mapped with its scales/full copy."""
+    mat = _load_if_exists(vectors_dir / f"{name}.npy")
+    if mat is None:
+        return None
+    return StoredEmbeddings(
+        matrix=mat,
+        scales=_load_if_exists(vectors_dir / f"{name}_scales.npy"),
+        full=_load_if_exists(vectors_dir / f"{name}_full.npy"),
+    )
+
+def _rows_of(ids: np.ndarray, keys: Sequence[int]) -> np.ndarray:
+    """Row of each key in `ids` (DB primary keys by row, -1 = tombstoned); -1 if absent."""
+    keys_arr = np.asarray(keys, dtype=np.int64)
+    if not ids.size:
+        return np.full(keys_arr.shape, -1, dtype=np.int64)
+    sorter = np.argsort(ids)
+    pos = np.minimum(np.searchsorted(ids, keys_arr, sorter=sorter), ids.size - 1)
+    return np.where((keys_arr >= 0) & (ids[sorter[pos]] == keys_arr), sorter[pos], -1)
+
+def _owner_ranges(child_rows: np.ndarray, owner_rows: np.ndarray, n_owners: int) -> np.ndarray:
+    """(n_owners, 2) [start, end) spanning the child rows of each owner row (-1 = no owner)."""
+    ranges = np.zeros((n_owners, 2), dtype=np.int64)
+    found = owner_rows >= 0
+    if not found.any():
+        return ranges
+    starts = np.full(n_owners, np.iinfo(np.int64).max, dtype=np.int64)
+    ends = np.zeros(n_owners, dtype=np.int64)
+    np.minimum.at(starts, owner_rows[found], child_rows[found])
+    np.maximum.at(ends, owner_rows[found], child_rows[found] + 1)
+    has = ends > 0
+    ranges[has, 0] = starts[has]
+    ranges[has, 1] = ends[has]
+    return ranges
+
+def _tombstone(ids: Optional[np.ndarray], dead: np.ndarray) -> np.ndarray:
+    out = np.array(ids if ids is not None else [], dtype=np.int64)
+    out[np.isin(out, dead)] = -1
+    return out
@@ -1,6 +1,11 @@
 from __future__ import annotations
+import hashlib
+import io
 import json
+import os
+import shutil
 import sqlite3
+import struct
 import tempfile
 import zipfile
 from dataclasses import dataclass
@@ -9,7 +14,17 @@ from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
+from ..config import default_cache_dir
 from ..errors import PackReadError
+from ..index.bm25 import BM25, BM25_ARRAYS, BM25_DERIVED_ARRAYS
+from ..index.ivfpq import IVFPQ_ARRAYS, IVFPQIndex
+from ..index.quantize import StoredEmbeddings
+from ..index.vector_index import HNSWIndex
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIG = b"PK\x03\x04"
+# File in each content-hash cache dir naming the pack file it was materialized from
+_SOURCE_MARKER = "source"
 
 @dataclass
 class PackPaths:
@@ -19,51 +34,289 @@ class PackPaths:
     manifest: Dict
 
 class PackReader:
-    def __init__(self, pack_path: Path):
-        self.pack_path = pack_path
+    """Read a Channel Pack.
+
+    By default the pack is used in place: `.npy` entries stored uncompressed are
+    memory-mapped at their offset inside the zip, and `pack.sqlite` is materialized
+    once per pack content hash under the cache dir (`YTCE_CACHE_DIR`) and opened
+    read-only. Cache dirs left by earlier contents of the same pack file are removed
+    when it is opened. Pass `extract=True` for the legacy extract-everything behaviour.
+    """
+
+    def __init__(self, pack_path: Path, extract: bool = False, cache_dir: Optional[Path] = None):
+        self.pack_path = Path(pack_path)
+        self.extract = extract
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir() / "packs"
         self._tmp: Optional[tempfile.TemporaryDirectory] = None
+        self._zip: Optional[zipfile.ZipFile] = None
         self.paths: Optional[PackPaths] = None
+        self.content_hash: Optional[str] = None
 
     def __enter__(self) -> "PackReader":
-        self._tmp = tempfile.TemporaryDirectory()
-        root = Path(self._tmp.name)
-        with zipfile.ZipFile(self.pack_path, "r") as z:
-            z.extractall(root)
-        manifest_path = root / "manifest.json"
-        if not manifest_path.exists():
-            raise PackReadError("manifest.json missing in pack")
-        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
-        db_path = root / "pack.sqlite"
-        if not db_path.exists():
-            raise PackReadError("pack.sqlite missing in pack")
-        vectors_dir = root / "vectors"
-        self.paths = PackPaths(root=root, db_path=db_path, vectors_dir=vectors_dir, manifest=manifest)
+        try:
+            self._zip = zipfile.ZipFile(self.pack_path, "r")
+        except (OSError, zipfile.BadZipFile) as e:
+            raise PackReadError(f"Cannot open pack {self.pack_path}: {e}") from e
+        try:
+            names = set(self._zip.namelist())
+            if "manifest.json" not in names:
+                raise PackReadError("manifest.json missing in pack")
+            if "pack.sqlite" not in names:
+                raise PackReadError("pack.sqlite missing in pack")
+            manifest = json.loads(self._zip.read("manifest.json").decode("utf-8"))
+            self.content_hash = _content_hash(self._zip)
+
+            if self.extract:
+                self._tmp = tempfile.TemporaryDirectory()
+                root = Path(self._tmp.name)
+                self._zip.extractall(root)
+                db_path = root / "pack.sqlite"
+            else:
+                root = self.cache_dir / self.content_hash
+                db_path = self._cached_member("pack.sqlite")
+                self._claim_cache_dir(root)
+            self.paths = PackPaths(root=root, db_path=db_path, vectors_dir=root / "vectors", manifest=manifest)
+        except BaseException:
+            self.__exit__(None, None, None)  # __exit__ does not run when __enter__ raises
+            raise
         return self
 
     def __exit__(self, exc_type, exc, tb) -> None:
+        if self._zip is not None:
+            self._zip.close()
+        self._zip = None
         if self._tmp is not None:
             self._tmp.cleanup()
         self._tmp = None
         self.paths = None
 
-    def connect(self) -> sqlite3.Connection:
+    def connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
         if not self.paths:
             raise PackReadError("PackReader not opened")
-        return sqlite3.connect(str(self.paths.db_path))
+        if self.extract:
+            return sqlite3.connect(str(self.paths.db_path), check_same_thread=check_same_thread)
+        # The cached DB is keyed by content hash and never modified after materialization.
+        uri = self.paths.db_path.resolve().as_uri() + "?mode=ro&immutable=1"
+        return sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
 
     def load_embeddings(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
-        if not self.paths:
-            raise PackReadError("PackReader not opened")
-        sec_path = self.paths.vectors_dir / "section_embeddings.npy"
-        chunk_path = self.paths.vectors_dir / "chunk_embeddings.npy"
-        sec = np.load(sec_path) if sec_path.exists() else None
-        ch = np.load(chunk_path) if chunk_path.exists() else None
+        sec = self.load_array("vectors/section_embeddings.npy")
+        ch = self.load_array("vectors/chunk_embeddings.npy")
         return sec, ch
 
+    def load_stored_embeddings(self) -> Tuple[Optional[StoredEmbeddings], Optional[StoredEmbeddings]]:
+        """Return (sections, chunks) with their int8 scales and full-precision copies, if any."""
+        return self._load_stored("section_embeddings"), self._load_stored("chunk_embeddings")
+
+    def _load_stored(self, name: str) -> Optional[StoredEmbeddings]:
+        mat = self.load_array(f"vectors/{name}.npy")
+        if mat is None:
+            return None
+        return StoredEmbeddings(
+            matrix=mat,
+            scales=self.load_array(f"vectors/{name}_scales.npy"),
+            full=self.load_array(f"vectors/{name}_full.npy"),
+        )
+
+    def load_row_ids(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Return (section_ids, chunk_ids): the DB primary key of each embedding row."""
+        sec = self.load_array("vectors/section_ids.npy")
+        ch = self.load_array("vectors/chunk_ids.npy")
+        return sec, ch
+
+    def load_episodes(self) -> Tuple[Optional[StoredEmbeddings], Optional[np.ndarray], Optional[np.ndarray]]:
+        """Return the episode tier: (summary embeddings, summary_id of each row, [start, end)
+        section rows of each row). All None for packs built before the tier existed."""
+        return (
+            self._load_stored("episode_embeddings"),
+            self.load_array("vectors/episode_ids.npy"),
+            self.load_array("vectors/episode_section_ranges.npy"),
+        )
+
+    def load_section_chunk_ranges(self) -> Optional[np.ndarray]:
+        """Return the (S, 2) [start, end) chunk-row range of each section row, if persisted."""
+        return self.load_array("vectors/section_chunk_ranges.npy")
+
+    def load_array(self, name: str) -> Optional[np.ndarray]:
+        """Load a `.npy` entry, memory-mapped from the pack file when it is stored uncompressed."""
+        z = self._require_open()
+        try:
+            info = z.getinfo(name)
+        except KeyError:
+            return None
+        if info.compress_type == zipfile.ZIP_STORED:
+            arr = self._memmap_stored(info)
+            if arr is not None:
+                return arr
+        with z.open(info) as f:
+            return np.load(io.BytesIO(f.read()), allow_pickle=False)
+
+    def load_bm25(self) -> Optional[BM25]:
+        """Load the persisted BM25 inverted index (memory-mapped, no tokenization).
+
+        Packs from before the index was persisted only carry `bm25_docs.json`; those are
+        re-tokenized here.
+        """
+        z = self._require_open()
+        names = set(z.namelist())
+        required = [n for n in BM25_ARRAYS if n not in BM25_DERIVED_ARRAYS]
+        if all(f"vectors/bm25_{n}.npy" in names for n in required):
+            arrays = {n: self.load_array(f"vectors/bm25_{n}.npy") for n in BM25_ARRAYS}
+            params = (self.paths.manifest.get("bm25") if self.paths else None) or {}
+            return BM25.from_arrays(arrays, params)
+        docs = self.load_bm25_docs()
+        if docs is None:
+            return None
+        bm = BM25()
+        bm.add_documents(docs)
+        return bm
+
+    def load_ivfpq(
+        self,
+        nprobe: int = 8,
+        rescore_candidates: int = 0,
+        refine: Optional[StoredEmbeddings] = None,
+    ) -> Optional[IVFPQIndex]:
+        """Load the prebuilt IVF-PQ index over chunk rows (memory-mapped), if the pack has one."""
+        z = self._require_open()
+        ann = (self.paths.manifest.get("ann_index") if self.paths else None) or {}
+        names = set(z.namelist())
+        if ann.get("kind") != "ivfpq" or not all(f"vectors/chunk_ivfpq_{n}.npy" in names for n in IVFPQ_ARRAYS):
+            return None
+        arrays = {n: self.load_array(f"vectors/chunk_ivfpq_{n}.npy") for n in IVFPQ_ARRAYS}
+        return IVFPQIndex.from_arrays(arrays, ann, nprobe=nprobe, rescore_candidates=rescore_candidates, refine=refine)
+
+    def load_hnsw(self, name: str, ef: int = 50) -> Optional[HNSWIndex]:
+        """Load the prebuilt HNSW graph for `name` ("section" or "chunk"), if the pack has one.
+
+        hnswlib reads graphs from a file, so the entry is materialized once under the
+        content-hash cache dir. Returns None when `hnswlib` is not installed.
+        """
+        z = self._require_open()
+        assert self.paths is not None
+        ann = self.paths.manifest.get("ann_index") or {}
+        member = f"vectors/{name}_hnsw.bin"
+        if ann.get("kind") != "hnsw" or member not in z.namelist():
+            return None
+        try:
+            import hnswlib  # type: ignore  # noqa: F401
+        except ImportError:
+            return None
+        path = self.paths.root / member if self.extract else self._cached_member(member)
+        return HNSWIndex.load(path, dim=int(ann["dim"]), space=ann.get("space", "cosine"), ef=ef)
+
+    def members(self) -> List[str]:
+        """Names of the entries in the pack archive."""
+        return self._require_open().namelist()
+
     def load_bm25_docs(self) -> Optional[List[str]]:
-        if not self.paths:
+        z = self._require_open()
+        if "vectors/bm25_docs.json" not in z.namelist():
+            return None
+        return json.loads(z.read("vectors/bm25_docs.json").decode("utf-8"))
+
+    def _require_open(self) -> zipfile.ZipFile:
+        if self._zip is None or not self.paths:
             raise PackReadError("PackReader not opened")
-        p = self.paths.vectors_dir / "bm25_docs.json"
-        if not p.exists():
+        return self._zip
+
+    def _data_offset(self, info: zipfile.ZipInfo) -> int:
+        # The central directory does not record where the member data starts; the local
+        # header's filename/extra lengths may differ from the central ones, so read them.
+        with open(self.pack_path, "rb") as f:
+            f.seek(info.header_offset)
+            header = f.read(_LOCAL_HEADER.size)
+        fields = _LOCAL_HEADER.unpack(header)
+        if fields[0] != _LOCAL_HEADER_SIG:
+            raise PackReadError(f"Corrupt local header for {info.filename}")
+        name_len, extra_len = fields[-2], fields[-1]
+        return info.header_offset + _LOCAL_HEADER.size + name_len + extra_len
+
+    def _memmap_stored(self, info: zipfile.ZipInfo) -> Optional[np.ndarray]:
+        offset = self._data_offset(info)
+        with open(self.pack_path, "rb") as f:
+            f.seek(offset)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            else:
+                return None
+            array_offset = f.tell()
+        if dtype.hasobject:
             return None
-        return json.loads(p.read_text(encoding="utf-8"))
+        if int(np.prod(shape)) == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(
+            self.pack_path,
+            dtype=dtype,
+            mode="r",
+            offset=array_offset,
+            shape=shape,
+            order="F" if fortran_order else "C",
+        )
+
+    def _cached_member(self, name: str) -> Path:
+        """Materialize one member under the content-hash cache dir (once) and return its path."""
+        z = self._require_zip()
+        target = self.cache_dir / str(self.content_hash) / name
+        if target.exists():
+            return target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as out, z.open(name) as src:
+                while True:
+                    buf = src.read(1 << 20)
+                    if not buf:
+                        break
+                    out.write(buf)
+            os.replace(tmp_name, target)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        return target
+
+    def _claim_cache_dir(self, root: Path) -> None:
+        """Mark `root` as this pack file's cache and drop the ones its older contents left.
+
+        Readers still holding a removed dir keep working on POSIX (files stay open); a
+        later `_cached_member` on it re-materializes the member.
+        """
+        source = str(self.pack_path.resolve())
+        marker = root / _SOURCE_MARKER
+        try:
+            if not marker.exists() or marker.read_text(encoding="utf-8") != source:
+                marker.write_text(source, encoding="utf-8")
+        except OSError:
+            return
+        for d in self.cache_dir.iterdir():
+            if d == root or not d.is_dir():
+                continue
+            try:
+                owner = (d / _SOURCE_MARKER).read_text(encoding="utf-8")
+            except OSError:
+                continue
+            if owner == source:
+                shutil.rmtree(d, ignore_errors=True)
+
+    def _require_zip(self) -> zipfile.ZipFile:
+        if self._zip is None:
+            raise PackReadError("PackReader not opened")
+        return self._zip
+
+def _content_hash(z: zipfile.ZipFile) -> str:
+    """Fingerprint pack contents from the zip central directory (no data is read).
+
+    `manifest.json` is excluded since it carries a build timestamp.
+    """
+    h = hashlib.sha256()
+    for info in sorted(z.infolist(), key=lambda i: i.filename):
+        if info.filename == "manifest.json":
+            continue
+        h.update(f"{info.filename}\0{info.CRC:08x}\0{info.file_size}\n".encode("utf-8"))
+    return h.hexdigest()[:32]
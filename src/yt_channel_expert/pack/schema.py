@@ -1,7 +1,7 @@
 from __future__ import annotations
 import sqlite3
 
-SCHEMA_VERSION = 1
+SCHEMA_VERSION = 2
 
 def create_schema(conn: sqlite3.Connection) -> None:
     cur = conn.cursor()
@@ -27,6 +27,8 @@ def create_schema(conn: sqlite3.Connection) -> None:
           published_at TEXT DEFAULT '',
           duration_sec INTEGER DEFAULT 0,
           url TEXT DEFAULT '',
+          content_hash TEXT DEFAULT '',  -- hash of the inputs its rows were built from
+          tombstoned INTEGER DEFAULT 0,  -- 1 once removed from the channel by `pack update`
           FOREIGN KEY(channel_id) REFERENCES channel(channel_id)
         );
 
@@ -68,6 +70,12 @@ def create_schema(conn: sqlite3.Connection) -> None:
           text TEXT NOT NULL,
           FOREIGN KEY(video_id) REFERENCES video(video_id)
         );
+
+        CREATE INDEX IF NOT EXISTS idx_transcript_segment_video ON transcript_segment(video_id);
+        CREATE INDEX IF NOT EXISTS idx_section_video ON section(video_id);
+        CREATE INDEX IF NOT EXISTS idx_micro_chunk_video ON micro_chunk(video_id);
+        CREATE INDEX IF NOT EXISTS idx_micro_chunk_section ON micro_chunk(section_id);
+        CREATE INDEX IF NOT EXISTS idx_summary_video ON summary(video_id);
         """
     )
     conn.commit()
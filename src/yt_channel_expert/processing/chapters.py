@@ -7,6 +7,10 @@ from typing import List, Tuple
 # 1:02:03 Something
 _CHAPTER = re.compile(r"^(?P<ts>(?:\d\d:)?\d\d:\d\d)\s+(?P<title>.+?)\s*$")
 
+def is_chapter_line(line: str) -> bool:
+    """True if `line` is a description chapter marker like "01:23 Title"."""
+    return _CHAPTER.match(line.strip()) is not None
+
 def parse_chapters_from_description(description: str) -> List[Tuple[int, str]]:
     """Return list of (start_ms, title) sorted by time."""
     chapters: List[Tuple[int, str]] = []
@@ -1,35 +1,53 @@
 from __future__ import annotations
-from typing import List
+from typing import Iterable, Iterator, List
 from ..types import TranscriptSegment, MicroChunk
 
 def build_micro_chunks(
-    segments: List[TranscriptSegment],
+    segments: Iterable[TranscriptSegment],
     chunk_sec: int = 45,
     overlap_sec: int = 15,
 ) -> List[MicroChunk]:
-    if not segments:
-        return []
+    """Sliding `chunk_sec` windows every `chunk_sec - overlap_sec` seconds over the segments.
+
+    `segments` may be any iterable, in any order; they are sorted by start time first.
+    """
     segs = sorted(segments, key=lambda s: s.start_ms)
-    start_ms = segs[0].start_ms
-    end_ms = segs[-1].end_ms
+    return list(iter_micro_chunks(segs, chunk_sec=chunk_sec, overlap_sec=overlap_sec))
+
+def iter_micro_chunks(
+    segments: Iterable[TranscriptSegment],
+    chunk_sec: int = 45,
+    overlap_sec: int = 15,
+) -> Iterator[MicroChunk]:
+    """`build_micro_chunks` over segments already sorted by `start_ms`, streamed.
 
+    Each window is yielded as soon as a segment starting at or after its end arrives, so
+    chunking can run while a transcript is still being parsed. Segments enter an active
+    list once, in start order, and leave it once the window start passes their end, so
+    the work is linear in segments plus output text.
+    """
+    it = iter(segments)
+    pending = next(it, None)
+    if pending is None:
+        return
+    video_id = pending.video_id
     step_ms = max(1, (chunk_sec - overlap_sec) * 1000)
     window_ms = chunk_sec * 1000
 
-    chunks: List[MicroChunk] = []
-    t = start_ms
-    while t < end_ms:
-        w_start = t
+    active: List[TranscriptSegment] = []
+    end_ms = pending.end_ms  # end of the last segment seen; final once input is exhausted
+    t = pending.start_ms
+    while True:
         w_end = t + window_ms
-        buf = []
-        for s in segs:
-            if s.end_ms <= w_start:
-                continue
-            if s.start_ms >= w_end:
-                break
-            buf.append(s.text)
-        text = " ".join(buf).strip()
+        while pending is not None and pending.start_ms < w_end:
+            active.append(pending)
+            end_ms = pending.end_ms
+            pending = next(it, None)
+        if pending is None and t >= end_ms:
+            return
+        active = [s for s in active if s.end_ms > t]
+        text = " ".join(s.text for s in active).strip()
         if text:
-            chunks.append(MicroChunk(video_id=segs[0].video_id, start_ms=w_start, end_ms=min(w_end, end_ms), text=text))
+            # While input remains, a later segment starts past w_end, so w_end is within the video
+            yield MicroChunk(video_id=video_id, start_ms=t, end_ms=w_end if pending is not None else min(w_end, end_ms), text=text)
         t += step_ms
-    return chunks
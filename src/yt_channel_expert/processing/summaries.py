@@ -0,0 +1,46 @@
+from __future__ import annotations
+import re
+from typing import List, Tuple
+
+from .chapters import is_chapter_line
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def _lead(text: str, max_chars: int) -> str:
+    """First sentence(s) of `text` within `max_chars`, cut at a word boundary if needed."""
+    text = " ".join(text.split())
+    out = ""
+    for sent in _SENTENCE_END.split(text):
+        if out and len(out) + 1 + len(sent) > max_chars:
+            break
+        out = f"{out} {sent}".strip()
+    if len(out) > max_chars:
+        out = out[:max_chars].rsplit(" ", 1)[0]
+    return out
+
+def build_episode_summary(
+    title: str,
+    description: str,
+    sections: List[Tuple[str, str]],
+    max_chars: int = 1500,
+) -> str:
+    """Extractive episode summary, map-reduce style over sections.
+
+    Map: each section contributes its title and the lead of its first micro-chunk.
+    Reduce: the video description (minus chapter lines) plus the section lines, within
+    `max_chars`; the per-section budget shrinks with the section count so every section
+    is represented.
+
+    Args:
+      sections: (section title, first chunk text) in time order.
+    """
+    desc_lines = [ln.strip() for ln in description.splitlines() if ln.strip() and not is_chapter_line(ln)]
+    parts = [title]
+    desc = _lead(" ".join(desc_lines), max_chars // 4)
+    if desc:
+        parts.append(desc)
+    budget = max(40, (max_chars - sum(len(p) + 1 for p in parts)) // max(1, len(sections)))
+    for stitle, text in sections:
+        lead = _lead(text, max(0, budget - len(stitle) - 2))
+        parts.append(f"{stitle}: {lead}" if lead else stitle)
+    return "\n".join(parts)[:max_chars]
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ..config import default_cache_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answer (
+  key BLOB PRIMARY KEY,      -- sha256(scope, normalized question)
+  scope BLOB NOT NULL,       -- sha256(content hash, llm config, evidence)
+  pack TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+  qvec BLOB,                 -- float32 question embedding, for near-duplicate lookup
+  result TEXT NOT NULL,      -- AnswerResult fields as JSON
+  created_at REAL NOT NULL,
+  last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_answer_scope ON answer(scope);
+CREATE INDEX IF NOT EXISTS idx_answer_pack ON answer(pack);
+CREATE INDEX IF NOT EXISTS idx_answer_last_used ON answer(last_used);
+"""
+
+_PUNCT = re.compile(r"[^\w\s]")
+
+def normalize_question(question: str) -> str:
+    """Casefold, drop punctuation and collapse whitespace: "What gear?" == "what gear"."""
+    return " ".join(_PUNCT.sub(" ", question.casefold()).split())
+
+@dataclass(frozen=True)
+class AnswerKey:
+    pack: str
+    content_hash: str
+    scope: bytes
+    exact: bytes
+
+    @classmethod
+    def make(cls, pack: str, content_hash: str, llm_key: str, question: str, evidence: Sequence[str]) -> "AnswerKey":
+        """Key an answer by the pack version, LLM config, retrieved evidence and question.
+
+        Identical evidence under the same pack and LLM config is the scope; a question
+        only matches answers generated from exactly that evidence. Evidence is compared
+        as a set, since rank order among the same chunks does not change what the answer
+        can cite.
+        """
+        h = hashlib.sha256()
+        h.update(f"{content_hash}\0{llm_key}\0".encode("utf-8"))
+        h.update("\0".join(sorted(evidence)).encode("utf-8"))
+        scope = h.digest()
+        exact = hashlib.sha256(scope + normalize_question(question).encode("utf-8")).digest()
+        return cls(pack=pack, content_hash=content_hash, scope=scope, exact=exact)
+
+class AnswerCache:
+    """Generated answers persisted in a local SQLite file.
+
+    Lookups hit on the exact key, or (with `similarity` set) on any answer in the same
+    scope whose question embedding has cosine similarity >= `similarity`. Entries expire
+    after `ttl_s` seconds, and past `max_entries` the least recently used are evicted.
+    Rows for a pack are dropped the first time the pack is seen with a different
+    content hash, so a rebuilt pack never serves answers from its old contents.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_entries: int = 10000,
+        ttl_s: Optional[float] = 7 * 24 * 3600,
+        similarity: Optional[float] = None,
+    ) -> None:
+        self.path = Path(path) if path is not None else default_cache_dir() / "answers.sqlite"
+        self.max_entries = int(max_entries)
+        self.ttl_s = ttl_s
+        self.similarity = similarity
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._checked: Set[Tuple[str, str]] = set()
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def get(self, key: AnswerKey, qvec: Optional[np.ndarray] = None) -> Optional[Tuple[dict, str]]:
+        """Return (result, "exact" | "similar"), or None on a miss."""
+        now = time.time()
+        oldest = now - self.ttl_s if self.ttl_s is not None else float("-inf")
+        with self._lock:
+            self._invalidate_stale(key)
+            row = self._conn.execute(
+                "SELECT key, result FROM answer WHERE key = ? AND created_at >= ?", (key.exact, oldest)
+            ).fetchone()
+            kind = "exact"
+            if row is None and self.similarity is not None and qvec is not None:
+                row, kind = self._nearest(key.scope, qvec, oldest), "similar"
+            if row is None:
+                return None
+            self._conn.execute("UPDATE answer SET last_used = ? WHERE key = ?", (now, row[0]))
+            self._conn.commit()
+        return json.loads(row[1]), kind
+
+    def put(self, key: AnswerKey, result: dict, qvec: Optional[np.ndarray] = None) -> None:
+        now = time.time()
+        vec = _unit(qvec).tobytes() if qvec is not None else None
+        with self._lock:
+            self._invalidate_stale(key)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answer(key, scope, pack, content_hash, qvec, result, created_at, last_used) "
+                "VALUES (?,?,?,?,?,?,?,?)",
+                (key.exact, key.scope, key.pack, key.content_hash, vec, json.dumps(result), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM answer").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _nearest(self, scope: bytes, qvec: np.ndarray, oldest: float):
+        rows = self._conn.execute(
+            "SELECT key, result, qvec FROM answer WHERE scope = ? AND qvec IS NOT NULL AND created_at >= ?",
+            (scope, oldest),
+        ).fetchall()
+        q = _unit(qvec)
+        rows = [r for r in rows if len(r[2]) == q.nbytes]
+        if not rows:
+            return None
+        sims = np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows]) @ q
+        best = int(np.argmax(sims))
+        return rows[best][:2] if sims[best] >= self.similarity else None
+
+    def _invalidate_stale(self, key: AnswerKey) -> None:
+        if (key.pack, key.content_hash) in self._checked:
+            return
+        self._conn.execute("DELETE FROM answer WHERE pack = ? AND content_hash != ?", (key.pack, key.content_hash))
+        self._conn.commit()
+        self._checked.add((key.pack, key.content_hash))
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_s is not None:
+            self._conn.execute("DELETE FROM answer WHERE created_at < ?", (now - self.ttl_s,))
+        excess = int(self._conn.execute("SELECT COUNT(*) FROM answer").fetchone()[0]) - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM answer WHERE key IN (SELECT key FROM answer ORDER BY last_used, rowid LIMIT ?)", (excess,)
+            )
+
+def _unit(v: np.ndarray) -> np.ndarray:
+    v = np.asarray(v, dtype=np.float32).ravel()
+    n = float(np.linalg.norm(v))
+    return v / n if n > 0 else v
@@ -1,11 +1,21 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Generator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from ..config import PackConfig
 from ..embeddings.factory import make_embedder
-from ..pack.pack_reader import PackReader
+from ..llm.base import Message
 from ..llm.factory import make_llm
-from .retriever import PackRetriever
+from .answer_cache import AnswerCache, AnswerKey
+from .federated import FederatedSession
+from .retriever import RetrievalContext
+from .session import PackSession
 from .prompts import build_messages
 from .citations import has_citations
 
@@ -18,52 +28,193 @@ class AnswerResult:
 class Answerer:
     def __init__(self, cfg: PackConfig):
         self.cfg = cfg
-        self.embedder = make_embedder(cfg.embedding)
+        self.embedder = make_embedder(cfg.embedding, query_cache=True)
         self.llm = make_llm(cfg.llm)
-
-    def answer(self, pack_path: str, question: str) -> AnswerResult:
-        from pathlib import Path
-        pack_path = str(pack_path)
-        with PackReader(Path(pack_path)) as pr:
-            conn = pr.connect()
-            manifest = pr.paths.manifest if pr.paths else {}
-            channel_title = manifest.get("channel_title", "Unknown Channel")
-
-            sec_emb, chunk_emb = pr.load_embeddings()
-            bm25_docs = pr.load_bm25_docs()
-
-            retriever = PackRetriever(conn, self.embedder, sec_emb, chunk_emb, bm25_docs=bm25_docs)
-            ctx = retriever.retrieve(
-                question,
-                top_sections=self.cfg.retrieval.top_sections,
-                top_chunks=self.cfg.retrieval.top_chunks,
-                bm25_top_k=self.cfg.retrieval.bm25_top_k,
+        self.answer_cache: Optional[AnswerCache] = None
+        if cfg.answer_cache.enabled:
+            ac = cfg.answer_cache
+            self.answer_cache = AnswerCache(
+                Path(ac.path) if ac.path else None,
+                max_entries=ac.max_entries,
+                ttl_s=ac.ttl_s,
+                similarity=ac.similarity,
             )
+        self._llm_key = hashlib.sha256(cfg.llm.model_dump_json().encode("utf-8")).hexdigest()
 
-            messages = build_messages(question, channel_title, ctx.section_summaries, ctx.chunks)
-            response_format = {"type": "text"}
-
-            draft = self.llm.generate(messages, response_format=response_format)
-
-            ok = has_citations(draft) if ctx.chunks else False
-            if ctx.chunks and not ok:
-                # Regenerate with stronger reminder
-                messages2 = list(messages)
-                messages2.append({
-                    "role": "system",
-                    "content": [{"type": "text", "text": "REMINDER: Every paragraph must include at least one citation like [video_id @ mm:ss-mm:ss]."}],
-                })
-                draft = self.llm.generate(messages2, response_format=response_format)
-                ok = has_citations(draft)
-
-            return AnswerResult(
-                answer=draft,
-                citations_present=ok,
-                debug={
-                    "sections": ctx.section_summaries,
-                    "top_chunks": [
-                        {"video_id": c.video_id, "ts": (c.start_ms, c.end_ms), "score": c.score}
-                        for c in ctx.chunks
-                    ],
-                },
-            )
+    def warmup(self) -> None:
+        """Load the embedding model and run a first batch, so a serving process pays
+        those costs at startup instead of on its first question."""
+        self.embedder.warmup()
+
+    def open_session(self, pack_path: Union[str, Path]) -> PackSession:
+        """Open a pack once for answering many questions against hot indices."""
+        return PackSession(pack_path, self.embedder, retrieval=self.cfg.retrieval)
+
+    def open_federated_session(self, pack_paths: Sequence[Union[str, Path]]) -> FederatedSession:
+        """Open several packs (same embedding model) to answer from all of them at once."""
+        return FederatedSession(pack_paths, self.embedder, retrieval=self.cfg.retrieval)
+
+    def answer(self, pack: Union[str, Path, PackSession, FederatedSession], question: str) -> AnswerResult:
+        if isinstance(pack, (PackSession, FederatedSession)):
+            return self._answer(pack, question)
+        with self.open_session(pack) as session:
+            return self._answer(session, question)
+
+    def answer_batch(
+        self,
+        pack: Union[str, Path, PackSession, FederatedSession],
+        questions: Sequence[str],
+        max_concurrency: int = 4,
+    ) -> List[AnswerResult]:
+        """Answer many questions: retrieval runs as one batch (one embedding call, batched
+        search), then generation goes out on up to `max_concurrency` threads. Results are
+        in question order."""
+        if not isinstance(pack, (PackSession, FederatedSession)):
+            with self.open_session(pack) as session:
+                return self.answer_batch(session, questions, max_concurrency)
+        qvecs = self._similarity_vecs(questions)
+        contexts = pack.retrieve_batch(questions, query_vecs=qvecs)
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as ex:
+            return list(ex.map(
+                lambda i: self._answer_from(pack, questions[i], contexts[i], None if qvecs is None else qvecs[i]),
+                range(len(questions)),
+            ))
+
+    async def aanswer(self, pack: Union[str, Path, PackSession, FederatedSession], question: str) -> AnswerResult:
+        """Async `answer`. Retrieval (SQLite + NumPy) runs on a worker thread; generation
+        awaits `llm.agenerate`, so backends with native async I/O hold no thread while
+        the model works and one event loop can keep many questions in flight."""
+        if not isinstance(pack, (PackSession, FederatedSession)):
+            session = await asyncio.to_thread(self.open_session, pack)
+            try:
+                return await self.aanswer(session, question)
+            finally:
+                session.close()
+        ctx, qvec = await asyncio.to_thread(self._retrieve, pack, question)
+        key, res = await asyncio.to_thread(self._lookup, pack, question, ctx, qvec)
+        if res is None:
+            steps = _draft_steps(question, pack.channel_title, ctx)
+            messages = next(steps)
+            try:
+                while True:
+                    messages = steps.send(await self.llm.agenerate(messages, response_format=_RESPONSE_FORMAT))
+            except StopIteration as done:
+                res = done.value
+            await asyncio.to_thread(self._remember, key, qvec, res)
+        return res
+
+    def _answer(self, session: Union[PackSession, FederatedSession], question: str) -> AnswerResult:
+        ctx, qvec = self._retrieve(session, question)
+        return self._answer_from(session, question, ctx, qvec)
+
+    def _answer_from(
+        self,
+        session: Union[PackSession, FederatedSession],
+        question: str,
+        ctx: RetrievalContext,
+        qvec: Optional[np.ndarray],
+    ) -> AnswerResult:
+        key, res = self._lookup(session, question, ctx, qvec)
+        if res is None:
+            res = self._generate(session.channel_title, question, ctx)
+            self._remember(key, qvec, res)
+        return res
+
+    def _retrieve(
+        self, session: Union[PackSession, FederatedSession], question: str
+    ) -> Tuple[RetrievalContext, Optional[np.ndarray]]:
+        qvecs = self._similarity_vecs([question])
+        qvec = None if qvecs is None else qvecs[0]
+        return session.retrieve(question, query_vec=qvec), qvec
+
+    def _lookup(
+        self,
+        session: Union[PackSession, FederatedSession],
+        question: str,
+        ctx: RetrievalContext,
+        qvec: Optional[np.ndarray],
+    ) -> Tuple[Optional[AnswerKey], Optional[AnswerResult]]:
+        key = self._cache_key(session, question, ctx)
+        return key, self._cached(key, qvec)
+
+    def _similarity_vecs(self, questions: Sequence[str]) -> Optional[np.ndarray]:
+        """Question embeddings, computed up front only when the answer cache needs them
+        for near-duplicate lookup (retrieval then reuses them)."""
+        if self.answer_cache is None or self.answer_cache.similarity is None or not questions:
+            return None
+        return np.asarray(self.embedder.embed_texts(list(questions)))
+
+    def _cache_key(
+        self, session: Union[PackSession, FederatedSession], question: str, ctx: RetrievalContext
+    ) -> Optional[AnswerKey]:
+        if self.answer_cache is None:
+            return None
+        parts = session.sessions if isinstance(session, FederatedSession) else [session]
+        return AnswerKey.make(
+            pack="|".join(str(s.pack_path.resolve()) for s in parts),
+            content_hash="|".join(s.content_hash or "" for s in parts),
+            llm_key=self._llm_key,
+            question=question,
+            evidence=[f"{c.video_id}:{c.chunk_id}" for c in ctx.chunks],
+        )
+
+    def _cached(self, key: Optional[AnswerKey], qvec: Optional[np.ndarray]) -> Optional[AnswerResult]:
+        if key is None or self.answer_cache is None:
+            return None
+        hit = self.answer_cache.get(key, qvec)
+        if hit is None:
+            return None
+        data, kind = hit
+        return AnswerResult(
+            answer=data["answer"],
+            citations_present=data["citations_present"],
+            debug={**data["debug"], "answer_cache": kind},
+        )
+
+    def _remember(self, key: Optional[AnswerKey], qvec: Optional[np.ndarray], res: AnswerResult) -> None:
+        if key is not None and self.answer_cache is not None:
+            self.answer_cache.put(key, asdict(res), qvec)
+
+    def _generate(self, channel_title: str, question: str, ctx: RetrievalContext) -> AnswerResult:
+        steps = _draft_steps(question, channel_title, ctx)
+        messages = next(steps)
+        try:
+            while True:
+                messages = steps.send(self.llm.generate(messages, response_format=_RESPONSE_FORMAT))
+        except StopIteration as done:
+            return done.value
+
+_RESPONSE_FORMAT = {"type": "text"}
+
+def _draft_steps(question: str, channel_title: str, ctx: RetrievalContext) -> Generator[List[Message], str, AnswerResult]:
+    """The generation policy shared by `answer` and `aanswer`: yields the messages to send
+    to the LLM, is sent back each draft, and returns the result."""
+    messages = build_messages(question, channel_title, ctx.section_summaries, ctx.chunks)
+    draft = yield messages
+    ok = has_citations(draft) if ctx.chunks else False
+    if ctx.chunks and not ok:
+        # Regenerate with stronger reminder
+        draft = yield _with_citation_reminder(messages)
+        ok = has_citations(draft)
+    return _result(draft, ok, ctx)
+
+def _with_citation_reminder(messages: List[Message]) -> List[Message]:
+    messages2 = list(messages)
+    messages2.append({
+        "role": "system",
+        "content": [{"type": "text", "text": "REMINDER: Every paragraph must include at least one citation like [video_id @ mm:ss-mm:ss]."}],
+    })
+    return messages2
+
+def _result(draft: str, ok: bool, ctx: RetrievalContext) -> AnswerResult:
+    return AnswerResult(
+        answer=draft,
+        citations_present=ok,
+        debug={
+            "sections": ctx.section_summaries,
+            "top_chunks": [
+                {"video_id": c.video_id, "ts": (c.start_ms, c.end_ms), "score": c.score}
+                for c in ctx.chunks
+            ],
+        },
+    )
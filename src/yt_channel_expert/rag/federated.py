@@ -0,0 +1,110 @@
+from __future__ import annotations
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..config import RetrievalConfig
+from ..embeddings.embedder import Embedder
+from ..errors import PackReadError
+from ..types import RetrievedChunk
+from .retriever import RetrievalContext
+from .session import PackSession
+
+def group_packs_by_model(pack_paths: Sequence[Union[str, Path]]) -> Dict[str, List[Path]]:
+    """Group pack paths by the `embedding_model_id` in their manifests (read from the zip only)."""
+    groups: Dict[str, List[Path]] = {}
+    for p in pack_paths:
+        try:
+            with zipfile.ZipFile(p, "r") as z:
+                manifest = json.loads(z.read("manifest.json").decode("utf-8"))
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            raise PackReadError(f"Cannot read manifest of {p}: {e}") from e
+        groups.setdefault(str(manifest.get("embedding_model_id", "")), []).append(Path(p))
+    return groups
+
+class FederatedSession:
+    """Several packs searched as one: the question is embedded once, each pack is searched
+    on a thread pool (SQLite lookups and NumPy matmuls release the GIL), and the hits are
+    merged into one context.
+
+    Hybrid scores are normalized within each pack's result list, so merged chunks are
+    ranked by their raw query similarity instead; that is only meaningful when every
+    pack uses the same embedding model, so mixed packs are refused (see
+    `group_packs_by_model` to split them).
+    """
+
+    def __init__(
+        self,
+        pack_paths: Sequence[Union[str, Path]],
+        embedder: Embedder,
+        retrieval: Optional[RetrievalConfig] = None,
+        max_workers: int = 8,
+    ) -> None:
+        if not pack_paths:
+            raise PackReadError("FederatedSession needs at least one pack")
+        groups = group_packs_by_model(pack_paths)
+        if len(groups) > 1:
+            detail = "; ".join(f"{model or '?'}: {', '.join(p.name for p in paths)}" for model, paths in groups.items())
+            raise PackReadError(f"Packs use different embedding models and cannot be searched together ({detail})")
+        self.embedder = embedder
+        self.retrieval = retrieval or RetrievalConfig()
+        self.sessions: List[PackSession] = []
+        try:
+            for p in pack_paths:
+                self.sessions.append(PackSession(p, embedder, retrieval=self.retrieval))
+        except BaseException:
+            self.close()
+            raise
+        self._pool: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.sessions))))
+
+    @property
+    def channel_title(self) -> str:
+        return ", ".join(s.channel_title for s in self.sessions)
+
+    def retrieve(self, question: str, query_vec: Optional[np.ndarray] = None) -> RetrievalContext:
+        qvec = query_vec if query_vec is not None else self.embedder.embed_texts([question])[0]
+        assert self._pool is not None
+        results = list(self._pool.map(lambda s: self._search_one(s, question, qvec), self.sessions))
+
+        chunks = sorted((c for _, cs in results for c in cs), key=lambda c: c.score, reverse=True)
+        # Sections carry no comparable score; interleave each pack's ranked list
+        per_pack = [[f"{s.channel_title}: {text}" for text in ctx.section_summaries] for s, (ctx, _) in zip(self.sessions, results)]
+        sections: List[str] = []
+        for rank in range(max((len(x) for x in per_pack), default=0)):
+            sections.extend(x[rank] for x in per_pack if rank < len(x))
+        return RetrievalContext(
+            section_summaries=sections[:self.retrieval.top_sections],
+            chunks=chunks[:self.retrieval.top_chunks],
+        )
+
+    def retrieve_batch(self, questions: Sequence[str], query_vecs: Optional[np.ndarray] = None) -> List[RetrievalContext]:
+        """`retrieve` per question, with all questions embedded in one call."""
+        if not questions:
+            return []
+        Q = np.asarray(query_vecs) if query_vecs is not None else np.asarray(self.embedder.embed_texts(list(questions)))
+        return [self.retrieve(q, query_vec=Q[i]) for i, q in enumerate(questions)]
+
+    def _search_one(self, session: PackSession, question: str, qvec: np.ndarray) -> Tuple[RetrievalContext, List[RetrievedChunk]]:
+        ctx = session.retrieve(question, query_vec=qvec)
+        sims = session.retriever.chunk_similarities(qvec, [int(c.chunk_id) for c in ctx.chunks])
+        return ctx, [replace(c, score=float(s)) for c, s in zip(ctx.chunks, sims)]
+
+    def close(self) -> None:
+        pool = getattr(self, "_pool", None)
+        if pool is not None:
+            pool.shutdown(wait=True)
+            self._pool = None
+        for s in self.sessions:
+            s.close()
+        self.sessions = []
+
+    def __enter__(self) -> "FederatedSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -1,14 +1,15 @@
 from __future__ import annotations
 import sqlite3
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
 from ..embeddings.embedder import Embedder
-from ..index.vector_index import BruteForceIndex, HNSWIndex
+from ..index.vector_index import BruteForceIndex, HNSWIndex, VectorHit, VectorIndex
 from ..index.bm25 import BM25
-from ..index.hybrid import HybridRetriever
+from ..index.hybrid import HybridHit, HybridRetriever
+from ..index.quantize import StoredEmbeddings
 from ..types import RetrievedChunk
 
 @dataclass
@@ -21,29 +22,72 @@ class PackRetriever:
         self,
         conn: sqlite3.Connection,
         embedder: Embedder,
-        section_embeddings: Optional[np.ndarray],
-        chunk_embeddings: Optional[np.ndarray],
+        section_embeddings: Union[np.ndarray, StoredEmbeddings, None],
+        chunk_embeddings: Union[np.ndarray, StoredEmbeddings, None],
         bm25_docs: Optional[List[str]] = None,
         use_hnsw: bool = False,
+        section_ids: Optional[np.ndarray] = None,
+        chunk_ids: Optional[np.ndarray] = None,
+        bm25: Optional[BM25] = None,
+        rescore_candidates: int = 0,
+        section_index: Optional[VectorIndex] = None,
+        chunk_index: Optional[VectorIndex] = None,
+        section_chunk_ranges: Optional[np.ndarray] = None,
+        episode_embeddings: Union[np.ndarray, StoredEmbeddings, None] = None,
+        episode_ids: Optional[np.ndarray] = None,
+        episode_section_ranges: Optional[np.ndarray] = None,
     ) -> None:
         self.conn = conn
         self.embedder = embedder
 
-        # Indices
-        if section_embeddings is not None:
-            self.section_index = BruteForceIndex()
-            self.section_index.add(section_embeddings)
-        else:
-            self.section_index = None
+        # Embedding row -> DB primary key. Legacy packs without a persisted mapping
+        # were written in primary-key order.
+        if section_ids is None:
+            section_ids = _ordered_ids(conn, "SELECT section_id FROM section ORDER BY section_id")
+        if chunk_ids is None:
+            chunk_ids = _ordered_ids(conn, "SELECT chunk_id FROM micro_chunk ORDER BY chunk_id")
+        self.section_ids = section_ids
+        self.chunk_ids = chunk_ids
+        self.chunk_embeddings = StoredEmbeddings.wrap(chunk_embeddings)
+        self._chunk_id_order: Optional[np.ndarray] = None
 
-        if chunk_embeddings is not None:
-            self.chunk_index = BruteForceIndex()
-            self.chunk_index.add(chunk_embeddings)
-        else:
-            self.chunk_index = None
+        # Indices (search the stored matrices in place; float16/int8 packs are rescored
+        # against their full-precision copy when one was kept). Prebuilt indices from the
+        # pack (HNSW, IVF-PQ) replace the brute-force scan; `use_hnsw` builds HNSW graphs
+        # here instead, falling back to brute force without hnswlib.
+        self.section_index: Optional[VectorIndex] = section_index
+        if self.section_index is None:
+            self.section_index = _make_index(section_embeddings, rescore_candidates, use_hnsw)
+        self.chunk_index: Optional[VectorIndex] = chunk_index
+        if self.chunk_index is None:
+            self.chunk_index = _make_index(chunk_embeddings, rescore_candidates, use_hnsw)
+
+        # Rows tombstoned by `pack update` (id -1) must never be returned.
+        if self.section_index is not None and (self.section_ids < 0).any():
+            self.section_index.mark_deleted(np.flatnonzero(self.section_ids < 0))
+        if self.chunk_index is not None and (self.chunk_ids < 0).any():
+            self.chunk_index.mark_deleted(np.flatnonzero(self.chunk_ids < 0))
 
-        self.bm25: Optional[BM25] = None
-        if bm25_docs is not None:
+        # Coarse-to-fine retrieval scores only the rows under the top episodes/sections,
+        # straight from the stored matrices (an ANN index cannot be restricted to a row subset).
+        self.section_chunk_ranges = section_chunk_ranges
+        self._chunk_scan: Optional[BruteForceIndex] = None
+        if section_chunk_ranges is not None:
+            self._chunk_scan = _scan_index(self.chunk_index, chunk_embeddings, self.chunk_ids, rescore_candidates)
+
+        # Episode tier: one summary row per video, filtering sections (and their chunks)
+        self.episode_ids = episode_ids
+        self.episode_section_ranges = episode_section_ranges
+        self.episode_index: Optional[BruteForceIndex] = None
+        self._section_scan: Optional[BruteForceIndex] = None
+        if episode_ids is not None and episode_section_ranges is not None:
+            self.episode_index = _brute_force(episode_embeddings, rescore_candidates)
+            if self.episode_index is not None and (episode_ids < 0).any():
+                self.episode_index.mark_deleted(np.flatnonzero(episode_ids < 0))
+            self._section_scan = _scan_index(self.section_index, section_embeddings, self.section_ids, rescore_candidates)
+
+        self.bm25: Optional[BM25] = bm25
+        if bm25 is None and bm25_docs is not None:
             bm = BM25()
             bm.add_documents(bm25_docs)
             self.bm25 = bm
@@ -54,56 +98,218 @@ class PackRetriever:
         top_sections: int = 5,
         top_chunks: int = 10,
         bm25_top_k: int = 20,
+        hierarchical: bool = False,
+        top_episodes: int = 0,
+        query_vec: Optional[np.ndarray] = None,
     ) -> RetrievalContext:
-        qvec = self.embedder.embed_texts([question])[0]
+        """Retrieve section summaries and hybrid-ranked chunks for `question`.
+
+        With `top_episodes > 0`, episode summaries are searched first and only the
+        sections and chunks of the best `top_episodes` videos are scored. With
+        `hierarchical`, chunks are further restricted to the `top_sections` best sections.
+        Tiers the pack lacks (or that select no rows) fall back to searching everything.
+        `query_vec` skips embedding the question (e.g. when one vector serves many packs).
+        """
+        qvec = query_vec if query_vec is not None else self.embedder.embed_texts([question])[0]
+
+        section_cands: Optional[np.ndarray] = None
+        if top_episodes > 0 and self.episode_index is not None and self.episode_section_ranges is not None:
+            ep_hits = self.episode_index.search(qvec, top_k=top_episodes)
+            section_cands = _expand_ranges(self.episode_section_ranges, [h.idx for h in ep_hits])
 
-        section_ids: List[int] = []
-        section_summaries: List[str] = []
+        section_hits: List[VectorHit] = []
         if self.section_index is not None:
-            hits = self.section_index.search(qvec, top_k=top_sections)
-            section_ids = [h.idx for h in hits]
-            # Resolve section rows by rank order
-            for sid in section_ids:
-                row = self.conn.execute(
-                    "SELECT title, start_ms, end_ms, video_id FROM section ORDER BY section_id LIMIT 1 OFFSET ?",
-                    (sid,),
-                ).fetchone()
-                if row:
-                    title, start_ms, end_ms, video_id = row
-                    section_summaries.append(f"{video_id} {title} ({start_ms//1000}s–{end_ms//1000}s)")
-
-        # Retrieve chunks, optionally restricted to selected sections (by section_id ordering)
-        chunks: List[RetrievedChunk] = []
+            if section_cands is not None and self._section_scan is not None:
+                section_hits = self._section_scan.search(qvec, top_k=top_sections, rows=section_cands)
+            else:
+                section_hits = self.section_index.search(qvec, top_k=top_sections)
+        section_rows = [h.idx for h in section_hits]
+
         if self.chunk_index is None:
-            return RetrievalContext(section_summaries=section_summaries, chunks=chunks)
+            return self._contexts([section_hits], [[]])[0]
 
         # Hybrid merge between vector and BM25 over chunks
-        hybrid = HybridRetriever(self.chunk_index, bm25=self.bm25, alpha=0.7)
-        hits = hybrid.search(qvec, question, top_k=top_chunks, bm25_top_k=bm25_top_k)
-
-        for h in hits:
-            # Resolve chunk by rank using OFFSET (toy). Production: store chunk_id mapping to embedding row.
-            row = self.conn.execute(
-                """
-                SELECT mc.video_id, v.title, v.url, mc.start_ms, mc.end_ms, mc.text
-                FROM micro_chunk mc
-                JOIN video v ON v.video_id = mc.video_id
-                ORDER BY mc.chunk_id
-                LIMIT 1 OFFSET ?
-                """,
-                (h.idx,),
-            ).fetchone()
-            if not row:
-                continue
-            video_id, title, url, start_ms, end_ms, text = row
-            chunks.append(RetrievedChunk(
-                video_id=video_id,
-                title=title,
-                url=url,
-                start_ms=int(start_ms),
-                end_ms=int(end_ms),
-                text=text,
-                score=float(h.score),
-            ))
-
-        return RetrievalContext(section_summaries=section_summaries, chunks=chunks)
+        candidates: Optional[np.ndarray] = None
+        if self.section_chunk_ranges is not None:
+            if hierarchical:
+                candidates = _expand_ranges(self.section_chunk_ranges, section_rows)
+            elif section_cands is not None:
+                candidates = _expand_ranges(self.section_chunk_ranges, section_cands)
+        if candidates is not None and self._chunk_scan is not None:
+            hybrid = HybridRetriever(self._chunk_scan, bm25=self.bm25, alpha=0.7)
+            hits = hybrid.search(qvec, question, top_k=top_chunks, bm25_top_k=bm25_top_k, candidates=candidates)
+        else:
+            hybrid = HybridRetriever(self.chunk_index, bm25=self.bm25, alpha=0.7)
+            hits = hybrid.search(qvec, question, top_k=top_chunks, bm25_top_k=bm25_top_k)
+        return self._contexts([section_hits], [hits])[0]
+
+    def retrieve_batch(
+        self,
+        questions: Sequence[str],
+        top_sections: int = 5,
+        top_chunks: int = 10,
+        bm25_top_k: int = 20,
+        hierarchical: bool = False,
+        top_episodes: int = 0,
+        query_vecs: Optional[np.ndarray] = None,
+    ) -> List[RetrievalContext]:
+        """`retrieve` for many questions: one `embed_texts` call, matrix-matrix vector
+        search, one BM25 pass over the batch and one DB lookup for all hits.
+
+        With episode or hierarchical restriction each question has its own candidate set,
+        so those (small) restricted scans run per question on the batch's query vectors.
+        """
+        if not questions:
+            return []
+        Q = query_vecs if query_vecs is not None else np.asarray(self.embedder.embed_texts(list(questions)))
+        restricted = (top_episodes > 0 and self.episode_index is not None) or (
+            hierarchical and self.section_chunk_ranges is not None
+        )
+        if restricted:
+            return [
+                self.retrieve(q, top_sections, top_chunks, bm25_top_k, hierarchical, top_episodes, query_vec=Q[i])
+                for i, q in enumerate(questions)
+            ]
+        n = len(questions)
+        section_hits = self.section_index.search_batch(Q, top_k=top_sections) if self.section_index else [[] for _ in range(n)]
+        chunk_hits: Sequence[Sequence[Union[HybridHit, VectorHit]]] = [[] for _ in range(n)]
+        if self.chunk_index is not None:
+            hybrid = HybridRetriever(self.chunk_index, bm25=self.bm25, alpha=0.7)
+            chunk_hits = hybrid.search_batch(Q, list(questions), top_k=top_chunks, bm25_top_k=bm25_top_k)
+        return self._contexts(section_hits, chunk_hits)
+
+    def _contexts(
+        self,
+        section_hits: Sequence[Sequence[VectorHit]],
+        chunk_hits: Sequence[Sequence[Union[HybridHit, VectorHit]]],
+    ) -> List[RetrievalContext]:
+        """Resolve per-question section/chunk hits (row indices) to contexts, with one
+        primary-key lookup per table for the whole batch."""
+        sec_ids = [[int(self.section_ids[h.idx]) for h in hits] for hits in section_hits]
+        chunk_ids = [[int(self.chunk_ids[h.idx]) for h in hits] for hits in chunk_hits]
+        sec_rows = self._fetch_sections([i for ids in sec_ids for i in ids])
+        chunk_rows = self._fetch_chunks([i for ids in chunk_ids for i in ids])
+        out: List[RetrievalContext] = []
+        for s_ids, c_ids, hits in zip(sec_ids, chunk_ids, chunk_hits):
+            section_summaries: List[str] = []
+            for sid in s_ids:
+                if sid not in sec_rows:
+                    continue
+                title, start_ms, end_ms, video_id = sec_rows[sid]
+                section_summaries.append(f"{video_id} {title} ({start_ms//1000}s–{end_ms//1000}s)")
+            chunks: List[RetrievedChunk] = []
+            for cid, hit in zip(c_ids, hits):
+                if cid not in chunk_rows:
+                    continue
+                chunk_id, video_id, title, url, start_ms, end_ms, text = chunk_rows[cid]
+                chunks.append(RetrievedChunk(
+                    video_id=video_id,
+                    title=title,
+                    url=url,
+                    start_ms=int(start_ms),
+                    end_ms=int(end_ms),
+                    text=text,
+                    score=float(hit.score),
+                    chunk_id=int(chunk_id),
+                ))
+            out.append(RetrievalContext(section_summaries=section_summaries, chunks=chunks))
+        return out
+
+    def chunk_similarities(self, query_vec: np.ndarray, chunk_ids: Sequence[int]) -> np.ndarray:
+        """Dot product of `query_vec` with the stored embedding of each chunk id.
+
+        Unlike hybrid scores (normalized per result list) these are comparable across
+        packs built with the same embedding model.
+        """
+        if self.chunk_embeddings is None or not len(chunk_ids):
+            return np.zeros(len(chunk_ids), dtype=np.float32)
+        if self._chunk_id_order is None:
+            self._chunk_id_order = np.argsort(self.chunk_ids)
+        order = self._chunk_id_order
+        ids = np.asarray(chunk_ids, dtype=np.int64)
+        rows = order[np.searchsorted(self.chunk_ids, ids, sorter=order)]
+        q = np.asarray(query_vec, dtype=np.float32).reshape(-1)
+        return self.chunk_embeddings.take(rows) @ q
+
+    def _fetch_sections(self, section_ids: Sequence[int]) -> Dict[int, Tuple]:
+        """(title, start_ms, end_ms, video_id) by section id (one primary-key lookup)."""
+        rows = _fetch_by_ids(
+            self.conn,
+            "SELECT section_id, title, start_ms, end_ms, video_id FROM section WHERE section_id IN ({})",
+            section_ids,
+        )
+        return {i: row[1:] for i, row in rows.items()}
+
+    def _fetch_chunks(self, chunk_ids: Sequence[int]) -> Dict[int, Tuple]:
+        return _fetch_by_ids(
+            self.conn,
+            """
+            SELECT mc.chunk_id, mc.video_id, v.title, v.url, mc.start_ms, mc.end_ms, mc.text
+            FROM micro_chunk mc
+            JOIN video v ON v.video_id = mc.video_id
+            WHERE mc.chunk_id IN ({})
+            """,
+            chunk_ids,
+        )
+
+def _expand_ranges(ranges: np.ndarray, rows: Sequence[int]) -> Optional[np.ndarray]:
+    """Rows covered by the [start, end) `ranges` of `rows` (ascending), or None if none."""
+    if not len(rows):
+        return None
+    picked = np.asarray(ranges[np.sort(np.asarray(rows, dtype=np.int64))])
+    if not (picked[:, 1] - picked[:, 0]).sum():
+        return None
+    return np.concatenate([np.arange(lo, hi, dtype=np.int64) for lo, hi in picked.tolist() if hi > lo])
+
+def _scan_index(
+    index: Optional[VectorIndex],
+    emb: Union[np.ndarray, StoredEmbeddings, None],
+    ids: np.ndarray,
+    rescore_candidates: int,
+) -> Optional[BruteForceIndex]:
+    """A BruteForceIndex over `emb` for row-subset search: `index` itself if it is one."""
+    if isinstance(index, BruteForceIndex):
+        return index
+    scan = _brute_force(emb, rescore_candidates)
+    if scan is not None and (ids < 0).any():
+        scan.mark_deleted(np.flatnonzero(ids < 0))
+    return scan
+
+def _make_index(
+    emb: Union[np.ndarray, StoredEmbeddings, None], rescore_candidates: int, use_hnsw: bool
+) -> Optional[VectorIndex]:
+    stored = StoredEmbeddings.wrap(emb)
+    if stored is not None and use_hnsw:
+        try:
+            index = HNSWIndex(dim=int(stored.matrix.shape[1]))
+        except ImportError:
+            pass
+        else:
+            index.add(stored)
+            return index
+    return _brute_force(stored, rescore_candidates)
+
+def _brute_force(emb: Union[np.ndarray, StoredEmbeddings, None], rescore_candidates: int) -> Optional[BruteForceIndex]:
+    stored = StoredEmbeddings.wrap(emb)
+    if stored is None:
+        return None
+    index = BruteForceIndex(rescore_candidates=rescore_candidates)
+    index.add(stored.matrix, scales=stored.scales, full=stored.full)
+    return index
+
+def _ordered_ids(conn: sqlite3.Connection, sql: str) -> np.ndarray:
+    return np.fromiter((r[0] for r in conn.execute(sql)), dtype=np.int64)
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds.
+_MAX_IN_PARAMS = 500
+
+def _fetch_by_ids(conn: sqlite3.Connection, sql: str, ids: Sequence[int]) -> Dict[int, Tuple]:
+    """Run `sql` (with one `IN ({})` placeholder) for `ids`; rows keyed by their first column."""
+    uniq = list(dict.fromkeys(ids))
+    out: Dict[int, Tuple] = {}
+    for i in range(0, len(uniq), _MAX_IN_PARAMS):
+        batch = uniq[i:i + _MAX_IN_PARAMS]
+        q = sql.format(",".join("?" * len(batch)))
+        for row in conn.execute(q, batch):
+            out[int(row[0])] = tuple(row)
+    return out
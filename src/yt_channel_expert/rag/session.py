@@ -0,0 +1,113 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from ..config import RetrievalConfig
+from ..embeddings.embedder import Embedder
+from ..pack.pack_reader import PackReader
+from .retriever import PackRetriever, RetrievalContext
+
+class PackSession:
+    """A pack opened once, with its SQLite connection, manifest and indices kept hot.
+
+    Building the session pays the pack-open and index-load costs; every `retrieve`
+    after that only embeds the question and searches.
+    """
+
+    def __init__(
+        self,
+        pack_path: Union[str, Path],
+        embedder: Embedder,
+        retrieval: Optional[RetrievalConfig] = None,
+    ) -> None:
+        self.pack_path = Path(pack_path)
+        self.retrieval = retrieval or RetrievalConfig()
+        self._reader: Optional[PackReader] = PackReader(self.pack_path)
+        self._reader.__enter__()
+        try:
+            # Sessions are meant to be shared by server threads; the DB is read-only.
+            self.conn = self._reader.connect(check_same_thread=False)
+            self.manifest: Dict = self._reader.paths.manifest if self._reader.paths else {}
+            sec_emb, chunk_emb = self._reader.load_stored_embeddings()
+            bm25 = self._reader.load_bm25() if self.retrieval.use_bm25 else None
+            sec_ids, chunk_ids = self._reader.load_row_ids()
+            ep_emb, ep_ids, ep_ranges = self._reader.load_episodes()
+            section_index = chunk_index = None
+            kind = self.retrieval.vector_index or (self.manifest.get("ann_index") or {}).get("kind")
+            if kind == "hnsw":
+                section_index = self._reader.load_hnsw("section", ef=self.retrieval.hnsw_ef)
+                chunk_index = self._reader.load_hnsw("chunk", ef=self.retrieval.hnsw_ef)
+            elif kind == "ivfpq":
+                chunk_index = self._reader.load_ivfpq(
+                    nprobe=self.retrieval.nprobe,
+                    rescore_candidates=self.retrieval.rescore_candidates,
+                    refine=chunk_emb,
+                )
+            self.retriever = PackRetriever(
+                self.conn,
+                embedder,
+                sec_emb,
+                chunk_emb,
+                bm25=bm25,
+                section_ids=sec_ids,
+                chunk_ids=chunk_ids,
+                rescore_candidates=self.retrieval.rescore_candidates,
+                section_index=section_index,
+                chunk_index=chunk_index,
+                section_chunk_ranges=self._reader.load_section_chunk_ranges(),
+                episode_embeddings=ep_emb,
+                episode_ids=ep_ids,
+                episode_section_ranges=ep_ranges,
+            )
+        except BaseException:
+            self._reader.__exit__(None, None, None)
+            raise
+
+    @property
+    def channel_title(self) -> str:
+        return self.manifest.get("channel_title", "Unknown Channel")
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        return self._reader.content_hash if self._reader else None
+
+    @property
+    def embedding_model_id(self) -> str:
+        return str(self.manifest.get("embedding_model_id", ""))
+
+    def retrieve(self, question: str, query_vec: Optional[np.ndarray] = None) -> RetrievalContext:
+        return self.retriever.retrieve(
+            question,
+            top_sections=self.retrieval.top_sections,
+            top_chunks=self.retrieval.top_chunks,
+            bm25_top_k=self.retrieval.bm25_top_k,
+            hierarchical=self.retrieval.hierarchical,
+            top_episodes=self.retrieval.top_episodes,
+            query_vec=query_vec,
+        )
+
+    def retrieve_batch(self, questions: Sequence[str], query_vecs: Optional[np.ndarray] = None) -> List[RetrievalContext]:
+        return self.retriever.retrieve_batch(
+            questions,
+            top_sections=self.retrieval.top_sections,
+            top_chunks=self.retrieval.top_chunks,
+            bm25_top_k=self.retrieval.bm25_top_k,
+            hierarchical=self.retrieval.hierarchical,
+            top_episodes=self.retrieval.top_episodes,
+            query_vecs=query_vecs,
+        )
+
+    def close(self) -> None:
+        if self._reader is None:
+            return
+        self.conn.close()
+        self._reader.__exit__(None, None, None)
+        self._reader = None
+
+    def __enter__(self) -> "PackSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -52,6 +52,7 @@ class RetrievedChunk:
     end_ms: int
     text: str
     score: float
+    chunk_id: Optional[int] = None
 
 def ms_to_timestamp(ms: int) -> str:
     # hh:mm:ss
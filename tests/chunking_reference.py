@@ -0,0 +1,25 @@
+"""The original rescan-every-window micro-chunker (quadratic), kept as a test oracle.
+
+Used by tests/test_chunking.py and, for timing, by scripts/bench_micro_chunks.py.
+"""
+from yt_channel_expert.types import MicroChunk
+
+def rescan_chunks(segments, chunk_sec: int = 45, overlap_sec: int = 15):
+    segs = sorted(segments, key=lambda s: s.start_ms)
+    end_ms = segs[-1].end_ms
+    step_ms = max(1, (chunk_sec - overlap_sec) * 1000)
+    out, t = [], segs[0].start_ms
+    while t < end_ms:
+        w_end = t + chunk_sec * 1000
+        buf = []
+        for s in segs:
+            if s.end_ms <= t:
+                continue
+            if s.start_ms >= w_end:
+                break
+            buf.append(s.text)
+        text = " ".join(buf).strip()
+        if text:
+            out.append(MicroChunk(video_id=segs[0].video_id, start_ms=t, end_ms=min(w_end, end_ms), text=text))
+        t += step_ms
+    return out
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+import pytest
+
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.pack.pack_builder import PackBuilder
+
+DEMO = Path(__file__).resolve().parents[1] / "examples" / "demo_channel"
+
+@pytest.fixture(autouse=True)
+def _cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("YTCE_CACHE_DIR", str(tmp_path / "ytce-cache"))
+
+@pytest.fixture
+def demo_pack(tmp_path) -> Path:
+    return PackBuilder(PackConfig()).build_from_folder(DEMO, tmp_path / "demo.pack")
@@ -0,0 +1,75 @@
+import asyncio
+
+import numpy as np
+
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.pack.pack_builder import PackBuilder
+from yt_channel_expert.rag import answer_cache
+from yt_channel_expert.rag.answer_cache import AnswerCache, AnswerKey
+from yt_channel_expert.rag.answerer import Answerer
+
+from conftest import DEMO
+
+def _cached_answerer(tmp_path, **kw):
+    cfg = PackConfig()
+    cfg.answer_cache.enabled = True
+    cfg.answer_cache.path = str(tmp_path / "answers.sqlite")
+    for k, v in kw.items():
+        setattr(cfg.answer_cache, k, v)
+    answerer = Answerer(cfg)
+    calls = []
+    generate = answerer.llm.generate
+    answerer.llm.generate = lambda messages, **kw: calls.append(messages) or generate(messages, **kw)
+    return answerer, calls
+
+def test_repeated_question_skips_generation(demo_pack, tmp_path):
+    answerer, calls = _cached_answerer(tmp_path)
+    with answerer.open_session(demo_pack) as session:
+        first = answerer.answer(session, "What gear does he use?")
+        again = answerer.answer(session, "what gear does he use")
+        batch = answerer.answer_batch(session, ["What gear does he use?", "camera checklist"])
+        async_hit = asyncio.run(answerer.aanswer(session, "What gear does he use!"))
+    assert len(calls) == 2
+    assert async_hit.debug["answer_cache"] == "exact" and async_hit.answer == first.answer
+    assert "answer_cache" not in first.debug and again.debug["answer_cache"] == "exact"
+    assert again.answer == batch[0].answer == first.answer
+    assert batch[0].debug["answer_cache"] == "exact" and "answer_cache" not in batch[1].debug
+
+def test_rebuilt_pack_invalidates_its_answers(tmp_path):
+    pack = tmp_path / "demo.pack"
+    PackBuilder(PackConfig()).build_from_folder(DEMO, pack)
+    answerer, calls = _cached_answerer(tmp_path)
+    answerer.answer(pack, "What tools are used?")
+    assert answerer.answer(pack, "What tools are used?").debug["answer_cache"] == "exact"
+
+    cfg = PackConfig()
+    cfg.chunking.micro_chunk_sec = 30
+    PackBuilder(cfg).build_from_folder(DEMO, pack)
+    assert "answer_cache" not in answerer.answer(pack, "What tools are used?").debug
+    assert len(calls) == 2 and len(answerer.answer_cache) == 1
+
+def test_near_duplicate_needs_same_evidence(tmp_path):
+    cache = AnswerCache(tmp_path / "a.sqlite", similarity=0.9)
+    key = AnswerKey.make("p", "h1", "llm", "what gear does he use", ["v:1", "v:2"])
+    v = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    cache.put(key, {"answer": "a"}, qvec=v)
+    para = AnswerKey.make("p", "h1", "llm", "which gear is used", ["v:1", "v:2"])
+    other = AnswerKey.make("p", "h1", "llm", "which gear is used", ["v:3"])
+    assert cache.get(para, qvec=np.array([0.95, 0.1, 0.0])) == ({"answer": "a"}, "similar")
+    assert cache.get(para, qvec=np.array([0.0, 1.0, 0.0])) is None
+    assert cache.get(other, qvec=v) is None
+
+def test_ttl_and_lru_eviction(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    cache = AnswerCache(tmp_path / "a.sqlite", max_entries=2, ttl_s=100)
+    keys = [AnswerKey.make("p", "h", "llm", f"q{i}", []) for i in range(3)]
+    cache.put(keys[0], {"i": 0})
+    now[0] += 1
+    cache.put(keys[1], {"i": 1})
+    now[0] += 1
+    assert cache.get(keys[0]) is not None  # keys[1] is now least recently used
+    cache.put(keys[2], {"i": 2})
+    assert cache.get(keys[1]) is None and len(cache) == 2
+    now[0] += 150
+    assert cache.get(keys[0]) is None and cache.get(keys[2]) is None
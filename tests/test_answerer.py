@@ -0,0 +1,34 @@
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.rag.answerer import Answerer
+
+def test_session_answers_many_questions(demo_pack):
+    answerer = Answerer(PackConfig())
+    with answerer.open_session(demo_pack) as session:
+        retriever = session.retriever
+        first = answerer.answer(session, "What tools are used?")
+        second = answerer.answer(session, "What is the workflow?")
+        assert session.retriever is retriever
+    assert first.citations_present and second.citations_present
+    assert answerer.answer(demo_pack, "What tools are used?").answer == first.answer
+
+def test_retrieved_chunks_resolve_by_row_mapping(demo_pack):
+    with Answerer(PackConfig()).open_session(demo_pack) as session:
+        ctx = session.retrieve("tools workflow checklist")
+        assert ctx.chunks
+        for c in ctx.chunks:
+            row = session.conn.execute(
+                "SELECT video_id, start_ms, text FROM micro_chunk WHERE chunk_id = ?", (c.chunk_id,)
+            ).fetchone()
+            assert row == (c.video_id, c.start_ms, c.text)
+
+def test_batch_matches_single_questions(demo_pack):
+    questions = ["What tools are used?", "camera checklist", "What is the workflow?"]
+    answerer = Answerer(PackConfig())
+    with answerer.open_session(demo_pack) as session:
+        singles = [session.retrieve(q) for q in questions]
+        batch = session.retrieve_batch(questions)
+        answers = answerer.answer_batch(session, questions, max_concurrency=2)
+    for one, many in zip(singles, batch):
+        assert [round(c.score, 5) for c in one.chunks] == [round(c.score, 5) for c in many.chunks]
+        assert len(one.section_summaries) == len(many.section_summaries)
+    assert [a.answer for a in answers] == [answerer.answer(demo_pack, q).answer for q in questions]
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from yt_channel_expert.llm import async_http
+
+_BODY = b"line one\nline two\r\nlast"
+
+def _chunked(data, size=5):
+    parts = [data[i:i + size] for i in range(0, len(data), size)]
+    return b"".join(b"%x\r\n%s\r\n" % (len(p), p) for p in parts) + b"0\r\nX-Trailer: 1\r\n\r\n"
+
+_RESPONSES = {
+    "content_length": b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(_BODY), _BODY),
+    "chunked": b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n" + _chunked(_BODY),
+    "close_delimited": b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n\r\n" + _BODY,
+    "interim_1xx": b"HTTP/1.1 100 Continue\r\n\r\nHTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(_BODY), _BODY),
+    "error": b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 8\r\n\r\noverload",
+    "truncated": b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\nshort",
+}
+
+async def _serve(raw):
+    """One-shot server that reads the request head and body, writes `raw`, and closes."""
+    async def handle(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = next(int(ln.split(b":")[1]) for ln in head.split(b"\r\n") if ln.lower().startswith(b"content-length"))
+        await reader.readexactly(length)
+        writer.write(raw)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/x"
+
+async def _fetch(raw, lines=False):
+    server, url = await _serve(raw)
+    async with server:
+        resp = await async_http.post(url, b"{}", timeout_s=5)
+        try:
+            return [ln async for ln in resp.iter_lines()] if lines else await resp.read()
+        finally:
+            await resp.close()
+
+@pytest.mark.parametrize("kind", ["content_length", "chunked", "close_delimited", "interim_1xx"])
+def test_body_framings(kind):
+    assert asyncio.run(_fetch(_RESPONSES[kind])) == _BODY
+    assert asyncio.run(_fetch(_RESPONSES[kind], lines=True)) == ["line one", "line two", "last"]
+
+def test_error_status_raises_with_body():
+    with pytest.raises(async_http.AsyncHTTPError) as err:
+        asyncio.run(_fetch(_RESPONSES["error"]))
+    assert err.value.status == 503 and err.value.body == "overload"
+
+def test_truncated_body_raises():
+    with pytest.raises(ConnectionError):
+        asyncio.run(_fetch(_RESPONSES["truncated"]))
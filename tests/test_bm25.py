@@ -0,0 +1,77 @@
+import math
+import random
+
+from yt_channel_expert.index.bm25 import BM25, _tokenize
+from yt_channel_expert.pack.pack_reader import PackReader
+
+def _reference_search(texts, query, top_k, k1=1.5, b=0.75):
+    """The original scan-every-document implementation."""
+    docs = [_tokenize(t) for t in texts]
+    df = {}
+    for doc in docs:
+        for term in set(doc):
+            df[term] = df.get(term, 0) + 1
+    avgdl = sum(len(d) for d in docs) / max(1, len(docs))
+    N = len(docs)
+    scores = [0.0] * N
+    for i, doc in enumerate(docs):
+        tf = {}
+        for t in doc:
+            tf[t] = tf.get(t, 0) + 1
+        for term in _tokenize(query):
+            if term not in tf:
+                continue
+            idf = math.log(1 + (N - df[term] + 0.5) / (df[term] + 0.5))
+            f = tf[term]
+            denom = f + k1 * (1 - b + b * (len(doc) / (avgdl + 1e-9)))
+            scores[i] += idf * (f * (k1 + 1) / (denom + 1e-9))
+    idxs = sorted(range(N), key=lambda i: scores[i], reverse=True)[:top_k]
+    return [(i, scores[i]) for i in idxs if scores[i] > 0]
+
+def _corpus(seed=0, n_docs=300):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(120)] + ["gear", "camera", "the", "a"]
+    return [" ".join(rng.choice(vocab) for _ in range(rng.randint(0, 40))) for _ in range(n_docs)]
+
+def test_bm25_matches_reference_scores():
+    texts = _corpus()
+    bm = BM25()
+    bm.add_documents(texts)
+    for query in ["gear camera", "the the w3", "w1 w2 w3 w4 w5", "missing", "camera"]:
+        for top_k in (1, 5, 50, 1000):
+            got = [(h.idx, h.score) for h in bm.search(query, top_k)]
+            assert got == _reference_search(texts, query, top_k)
+
+def test_bm25_index_loads_from_pack(demo_pack):
+    with PackReader(demo_pack) as pr:
+        bm = pr.load_bm25()
+        conn = pr.connect()
+        texts = [r[0] for r in conn.execute("SELECT text FROM micro_chunk ORDER BY chunk_id")]
+    assert bm is not None and bm.n_docs == len(texts)
+    got = [(h.idx, h.score) for h in bm.search("tools workflow", 10)]
+    assert got == _reference_search(texts, "tools workflow", 10)
+
+def test_bm25_pruned_search_matches_reference_on_skewed_corpus():
+    rng = random.Random(7)
+    vocab = [f"w{i}" for i in range(400)]
+    weights = [1 / (i + 1) for i in range(400)]
+    texts = [" ".join(rng.choices(vocab, weights, k=rng.randint(3, 60))) for _ in range(2000)]
+    bm = BM25()
+    bm.add_documents(texts)
+    for _ in range(10):
+        query = " ".join(rng.choices(vocab, weights, k=rng.randint(1, 6)))
+        for top_k in (1, 10):
+            got = [(h.idx, h.score) for h in bm.search(query, top_k)]
+            assert got == _reference_search(texts, query, top_k)
+
+def test_bm25_candidate_search_matches_full_ranking_restricted():
+    texts = _corpus(seed=3)
+    bm = BM25()
+    bm.add_documents(texts)
+    cand = list(range(40, 90))
+    for query in ["gear camera", "w1 w2 w3"]:
+        got = [h.idx for h in bm.search(query, 10, candidates=cand)]
+        assert set(got) <= set(cand)
+        # idf/avgdl stay corpus-wide, so compare ranking against the full index restricted to cand
+        full = [(h.idx, h.score) for h in bm.search(query, len(texts))]
+        assert got == [i for i, _ in full if i in cand][:10]
@@ -1,5 +1,9 @@
+import random
+
 from yt_channel_expert.types import TranscriptSegment
-from yt_channel_expert.processing.chunking import build_micro_chunks
+from yt_channel_expert.processing.chunking import build_micro_chunks, iter_micro_chunks
+
+from chunking_reference import rescan_chunks
 
 def test_micro_chunking():
     segs = [
@@ -10,3 +14,23 @@ def test_micro_chunking():
     chunks = build_micro_chunks(segs, chunk_sec=15, overlap_sec=5)
     assert len(chunks) >= 2
     assert chunks[0].start_ms == 0
+
+def _random_segments(n, seed):
+    rng = random.Random(seed)
+    segs, t = [], rng.randint(0, 5000)
+    for i in range(n):
+        t += rng.choice([0, 200, 1500, 4000, 90_000])  # ties, dense captions, long gaps
+        dur = rng.choice([0, 800, 3000, 12_000, 200_000])  # incl. segments spanning many windows
+        segs.append(TranscriptSegment(video_id="v", start_ms=t, end_ms=t + dur, text=rng.choice(["a", "b c", " ", f"w{i}"])))
+    rng.shuffle(segs)
+    return segs
+
+def test_streaming_chunker_matches_reference():
+    for seed in range(10):
+        segs = _random_segments(150, seed)
+        for chunk_sec, overlap_sec in ((45, 15), (10, 0), (30, 29)):
+            expected = rescan_chunks(segs, chunk_sec, overlap_sec)
+            assert build_micro_chunks(iter(segs), chunk_sec, overlap_sec) == expected
+            ordered = sorted(segs, key=lambda s: s.start_ms)
+            assert list(iter_micro_chunks(iter(ordered), chunk_sec, overlap_sec)) == expected
+    assert build_micro_chunks([]) == []
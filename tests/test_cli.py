@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+
+from typer.testing import CliRunner
+
+from yt_channel_expert.cli.main import app
+
+# Modules the lightweight commands must not pull in (each costs tens of ms at startup)
+_HEAVY = ["numpy", "pydantic", "sqlite3", "tqdm", "yaml", "yt_channel_expert.pack", "yt_channel_expert.rag"]
+
+_PROBE = """
+import json, sys
+from typer.testing import CliRunner
+from yt_channel_expert.cli.main import app
+res = CliRunner().invoke(app, sys.argv[1:])
+assert res.exit_code == 0, res.output
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+def _heavy_imports(*args):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(heavy=_HEAVY), *args], capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def test_help_and_info_skip_heavy_imports(demo_pack):
+    assert _heavy_imports("--help") == []
+    assert _heavy_imports("pack", "info", "--pack", str(demo_pack)) == []
+
+def test_package_import_time_budget():
+    """The CLI's own modules (not typer/rich) must stay cheap to import."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import yt_channel_expert.cli.main"],
+        capture_output=True, text=True, check=True,
+    )
+    own_us = 0
+    for line in out.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip().startswith("yt_channel_expert"):
+            own_us += int(fields[0].split(":")[1])
+    assert own_us < 30_000, f"yt_channel_expert modules took {own_us / 1000:.1f} ms to import"
+
+def test_pack_info_prints_manifest(demo_pack):
+    res = CliRunner().invoke(app, ["pack", "info", "--pack", str(demo_pack)])
+    assert res.exit_code == 0 and "embedding_model_id" in res.output
@@ -0,0 +1,77 @@
+import sqlite3
+
+import numpy as np
+
+from yt_channel_expert.embeddings.cache import CachedEmbedder, EmbeddingCache
+from yt_channel_expert.embeddings.hash_embedder import HashEmbedder
+
+class _Counting(HashEmbedder):
+    def __init__(self, dim: int = 64):
+        super().__init__(dim=dim)
+        self.seen = []
+
+    def embed_texts(self, texts):
+        self.seen += list(texts)
+        return super().embed_texts(texts)
+
+def test_cached_embedder_only_embeds_new_texts(tmp_path):
+    inner = _Counting()
+    emb = CachedEmbedder(inner, "hash:test", EmbeddingCache(tmp_path / "emb.sqlite"))
+    first = emb.embed_texts(["alpha beta", "gamma", "alpha beta"])
+    assert inner.seen == ["alpha beta", "gamma"]
+
+    # A fresh process-level wrapper over the same file reuses what was stored
+    inner2 = _Counting()
+    emb2 = CachedEmbedder(inner2, "hash:test", EmbeddingCache(tmp_path / "emb.sqlite"))
+    second = emb2.embed_texts(["gamma", "delta", "alpha beta"])
+    assert inner2.seen == ["delta"]
+    assert np.array_equal(second[[0, 2]], first[[1, 0]])
+    assert np.array_equal(second, HashEmbedder(dim=64).embed_texts(["gamma", "delta", "alpha beta"]))
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite", max_bytes=10 * 64 * 4)
+    emb = CachedEmbedder(HashEmbedder(dim=64), "hash:test", cache)
+    emb.embed_texts([f"text {i}" for i in range(20)])
+    assert cache.total_bytes() <= 10 * 64 * 4
+    keys = [EmbeddingCache.key("hash:test", 64, f"text {i}") for i in range(20)]
+    assert set(cache.get_many(keys, 64)) <= set(keys[10:])
+
+def test_size_tracking_and_read_only_hits(tmp_path, monkeypatch):
+    from yt_channel_expert.embeddings import cache as cache_mod
+
+    now = [1000]
+    monkeypatch.setattr(cache_mod.time, "time", lambda: now[0])
+    cache = EmbeddingCache(tmp_path / "emb.sqlite", max_bytes=6 * 64 * 4)
+    keys = [EmbeddingCache.key("hash:test", 64, f"text {i}") for i in range(8)]
+    vecs = HashEmbedder(dim=64).embed_texts([f"text {i}" for i in range(8)])
+    cache.put_many(keys[:4], vecs[:4])
+    cache.put_many(keys[:2], vecs[:2])  # re-put: no double counting
+    assert cache.total_bytes() == 4 * 64 * 4
+
+    now[0] += 1
+    watcher = sqlite3.connect(str(tmp_path / "emb.sqlite"))
+    before = watcher.execute("PRAGMA data_version").fetchone()[0]
+    assert set(cache.get_many(keys[:1], 64)) == {keys[0]}  # touch keys[0], buffered
+    assert watcher.execute("PRAGMA data_version").fetchone()[0] == before
+
+    now[0] += 1
+    cache.put_many(keys[4:8], vecs[4:8])  # over budget: evicts least recently used
+    remaining = set(cache.get_many(keys, 64))
+    assert keys[0] in remaining and keys[1] not in remaining
+    sums = watcher.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embedding").fetchone()[0]
+    assert cache.total_bytes() == sums <= 6 * 64 * 4
+
+def test_query_cache_is_lru_over_normalized_text():
+    from yt_channel_expert.embeddings.query_cache import QueryCachedEmbedder
+
+    inner = _Counting()
+    emb = QueryCachedEmbedder(inner, "hash:test", max_entries=2)
+    a = emb.embed_texts(["what  gear?", " what gear? ", "camera"])
+    assert inner.seen == ["what gear?", "camera"]
+    assert np.array_equal(a[0], a[1])
+    assert np.array_equal(a, HashEmbedder(dim=64).embed_texts(["what gear?", "what gear?", "camera"]))
+
+    emb.embed_texts(["what gear?"])        # hit; "camera" becomes least recent
+    emb.embed_texts(["lens"])              # evicts "camera"
+    emb.embed_texts(["camera", "what gear?"])
+    assert inner.seen == ["what gear?", "camera", "lens", "camera"]
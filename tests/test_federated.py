@@ -0,0 +1,37 @@
+import pytest
+
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.errors import PackReadError
+from yt_channel_expert.pack.pack_builder import PackBuilder
+from yt_channel_expert.rag.answerer import Answerer
+from yt_channel_expert.rag.federated import group_packs_by_model
+
+from conftest import DEMO
+
+def test_federated_merges_by_query_similarity(demo_pack, tmp_path):
+    other = PackBuilder(PackConfig()).build_from_folder(DEMO, tmp_path / "other.pack")
+    answerer = Answerer(PackConfig())
+    question = "camera checklist"
+    with answerer.open_session(demo_pack) as single:
+        ctx = single.retrieve(question)
+        qvec = answerer.embedder.embed_texts([question])[0]
+        sims = single.retriever.chunk_similarities(qvec, [c.chunk_id for c in ctx.chunks])
+
+    with answerer.open_federated_session([demo_pack, other]) as fed:
+        merged = fed.retrieve(question)
+        ans = answerer.answer(fed, question)
+    scores = [c.score for c in merged.chunks]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == pytest.approx(float(sims.max()))
+    # Both packs hold the same channel, so merged hits come from the single-pack candidates
+    assert len(merged.chunks) == PackConfig().retrieval.top_chunks
+    assert {c.chunk_id for c in merged.chunks} <= {c.chunk_id for c in ctx.chunks}
+    assert ans.answer
+
+def test_federated_refuses_mixed_embedding_models(demo_pack, tmp_path):
+    cfg = PackConfig()
+    cfg.embedding.model_name = "hash-384-v2"
+    other = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "other.pack")
+    assert group_packs_by_model([demo_pack, other]) == {"hash-384": [demo_pack], "hash-384-v2": [other]}
+    with pytest.raises(PackReadError, match="different embedding models"):
+        Answerer(PackConfig()).open_federated_session([demo_pack, other])
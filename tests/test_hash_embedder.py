@@ -0,0 +1,45 @@
+import hashlib
+import random
+
+import numpy as np
+
+from yt_channel_expert.embeddings import hash_embedder
+from yt_channel_expert.embeddings.hash_embedder import HashEmbedder
+
+def _reference(texts, dim):
+    """The original one-token-at-a-time implementation."""
+    mat = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, t in enumerate(texts):
+        for token in t.lower().split():
+            h = hashlib.sha256(token.encode("utf-8")).digest()
+            idx = int.from_bytes(h[:4], "little") % dim
+            sign = 1.0 if (h[4] % 2 == 0) else -1.0
+            mat[i, idx] += sign
+    norms = np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12
+    return mat / norms
+
+def _texts(n, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(300)] + ["Ünïcode", "A", "a", "tool,", "x" * 40]
+    return [" ".join(rng.choice(vocab) for _ in range(rng.randint(0, 60))) for _ in range(n)] + ["", "  \n "]
+
+def test_vectorized_output_is_bit_identical():
+    texts = _texts(200)
+    for dim in (384, 7):
+        emb = HashEmbedder(dim)
+        ref = _reference(texts, dim)
+        first, again = emb.embed_texts(texts), emb.embed_texts(texts[::-1])
+        assert first.dtype == ref.dtype and first.tobytes() == ref.tobytes()
+        assert again.tobytes() == ref[::-1].tobytes()
+
+def test_memo_reset_keeps_batch_tokens(monkeypatch):
+    monkeypatch.setattr(hash_embedder, "_MEMO_MAX", 50)
+    emb = HashEmbedder(32)
+    texts = _texts(40, seed=2)
+    emb.embed_texts(texts[:5])
+    assert emb.embed_texts(texts).tobytes() == _reference(texts, 32).tobytes()
+
+def test_sharded_batches_match(monkeypatch):
+    monkeypatch.setattr(hash_embedder, "_SHARD_MIN_TEXTS", 10)
+    texts = _texts(50, seed=1)
+    assert HashEmbedder(64, workers=3).embed_texts(texts).tobytes() == _reference(texts, 64).tobytes()
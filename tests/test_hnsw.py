@@ -0,0 +1,86 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.errors import PackBuildError
+from yt_channel_expert.index.vector_index import BruteForceIndex, HNSWIndex
+from yt_channel_expert.pack.pack_builder import PackBuilder
+from yt_channel_expert.pack.pack_reader import PackReader
+from yt_channel_expert.rag.answerer import Answerer
+
+from conftest import DEMO
+
+pytest.importorskip("hnswlib")
+
+def _hnsw_cfg() -> PackConfig:
+    cfg = PackConfig()
+    cfg.retrieval.vector_index = "hnsw"
+    return cfg
+
+def _scores(pack, cfg):
+    with Answerer(cfg).open_session(pack) as session:
+        return [round(ch.score, 5) for ch in session.retrieve("camera checklist").chunks]
+
+def test_hnsw_graphs_are_persisted_and_loaded(tmp_path):
+    cfg = _hnsw_cfg()
+    pack = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "hnsw.pack")
+    base = PackBuilder(PackConfig()).build_from_folder(DEMO, tmp_path / "flat.pack")
+    with PackReader(pack) as pr:
+        assert pr.paths.manifest["ann_index"]["kind"] == "hnsw"
+        for name, count in (("section", "section_count"), ("chunk", "chunk_count")):
+            index = pr.load_hnsw(name)
+            assert isinstance(index, HNSWIndex) and index.n_rows == pr.paths.manifest[count]
+
+    with Answerer(cfg).open_session(pack) as session:
+        assert isinstance(session.retriever.chunk_index, HNSWIndex)
+    # The demo pack is tiny, so the graph search is exact (up to tie order)
+    assert _scores(pack, cfg) == _scores(base, PackConfig())
+
+def test_hnsw_update_extends_graph(tmp_path):
+    cfg = _hnsw_cfg()
+    pack = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "hnsw.pack")
+    PackBuilder(cfg).update_pack(pack, DEMO)
+    with PackReader(pack) as pr:
+        assert pr.load_hnsw("chunk").n_rows == pr.load_row_ids()[1].shape[0]
+
+def test_falls_back_to_brute_force_without_hnswlib(tmp_path, monkeypatch):
+    cfg = _hnsw_cfg()
+    pack = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "hnsw.pack")
+    monkeypatch.setitem(sys.modules, "hnswlib", None)
+    with Answerer(cfg).open_session(pack) as session:
+        assert isinstance(session.retriever.chunk_index, BruteForceIndex)
+        assert session.retrieve("camera checklist").chunks
+    with Answerer(PackConfig()).open_session(pack) as session:  # kind from the manifest
+        assert isinstance(session.retriever.chunk_index, BruteForceIndex)
+    with pytest.raises(PackBuildError, match=r"\.\[hnsw\]"):
+        PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "again.pack")
+    with pytest.raises(PackBuildError, match="hnswlib"):
+        PackBuilder(PackConfig()).update_pack(pack, DEMO)
+
+def test_concurrent_searches_with_mixed_k():
+    rng = np.random.default_rng(0)
+    emb = rng.standard_normal((300, 16)).astype(np.float32)
+    index = HNSWIndex(16, ef=10)
+    index.add(emb)
+    ks = [5, 200] * 50
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        results = list(ex.map(lambda k: index.search(emb[k], k), ks))
+    # A large-k query never shrinks ef under a concurrent one, so each gets all k results
+    assert [len(hits) for hits in results] == ks
+    # ...and once they are done, later queries search with the configured ef again
+    assert index._ef_live == index.ef and index._index.ef == index.ef
+
+def test_session_uses_manifest_index_unless_overridden(tmp_path):
+    pack = PackBuilder(_hnsw_cfg()).build_from_folder(DEMO, tmp_path / "hnsw.pack")
+    with Answerer(PackConfig()).open_session(pack) as session:
+        assert isinstance(session.retriever.chunk_index, HNSWIndex)
+    flat = PackConfig()
+    flat.retrieval.vector_index = "brute_force"
+    with Answerer(flat).open_session(pack) as session:
+        assert isinstance(session.retriever.chunk_index, BruteForceIndex)
+    PackBuilder(PackConfig()).update_pack(pack, DEMO)
+    with PackReader(pack) as pr:
+        assert pr.paths.manifest["ann_index"]["kind"] == "hnsw"
@@ -0,0 +1,63 @@
+import numpy as np
+
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.index.ivfpq import IVFPQIndex
+from yt_channel_expert.index.vector_index import BruteForceIndex
+from yt_channel_expert.pack.pack_builder import PackBuilder
+from yt_channel_expert.pack.pack_reader import PackReader
+from yt_channel_expert.rag.answerer import Answerer
+
+from conftest import DEMO
+
+def _clustered_rows(n, dim, centers=32, seed=0):
+    rng = np.random.default_rng(seed)
+    c = rng.standard_normal((centers, dim)).astype(np.float32)
+    x = c[rng.integers(0, centers, n)] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def test_ivfpq_recall_against_brute_force():
+    x = _clustered_rows(6000, 64)
+    queries = _clustered_rows(20, 64, seed=1)
+    exact = BruteForceIndex()
+    exact.add(x)
+    index = IVFPQIndex.train(x, nlist=64, m=16)
+    index.nprobe = 16
+    index.rescore_candidates = 100
+    index.refine = exact._emb
+    recall = np.mean([
+        len({h.idx for h in index.search(q, 10)} & {h.idx for h in exact.search(q, 10)}) / 10
+        for q in queries
+    ])
+    assert recall >= 0.9
+
+def test_ivfpq_add_and_deleted_rows():
+    x = _clustered_rows(3000, 32, seed=2)
+    index = IVFPQIndex.train(x[:2000], m=8)
+    index.add(x[2000:])
+    assert index.n_rows == 3000 and int(index.list_offsets[-1]) == 3000
+    index.nprobe = index.nlist
+    assert index.search(x[2500], 1)[0].idx == 2500
+    index.mark_deleted(np.array([2500]))
+    assert all(h.idx != 2500 for h in index.search(x[2500], 5))
+
+def test_ivfpq_pack_roundtrip_and_update(tmp_path):
+    cfg = PackConfig()
+    cfg.retrieval.vector_index = "ivfpq"
+    cfg.retrieval.nprobe = 1000  # scan every list: results must match brute force after rescoring
+    cfg.retrieval.rescore_candidates = 1000
+    pack = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "ivf.pack")
+    base = PackBuilder(PackConfig()).build_from_folder(DEMO, tmp_path / "flat.pack")
+    with PackReader(pack) as pr:
+        index = pr.load_ivfpq()
+        assert index is not None and index.n_rows == pr.paths.manifest["chunk_count"]
+        assert pr.paths.manifest["ann_index"]["kind"] == "ivfpq"
+
+    def ranked(p, c):
+        with Answerer(c).open_session(p) as session:
+            return [ch.chunk_id for ch in session.retrieve("camera checklist").chunks]
+
+    assert ranked(pack, cfg) == ranked(base, PackConfig())
+
+    PackBuilder(cfg).update_pack(pack, DEMO)
+    with PackReader(pack) as pr:
+        assert pr.load_ivfpq().n_rows == pr.load_row_ids()[1].shape[0]
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.llm.llmhub_http import LLMHubHTTPBackend
+from yt_channel_expert.rag.answerer import Answerer
+
+_ANSWER = "The creator uses a checklist. [vid001 @ 00:00-00:45]"
+
+class _FakeHub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = []
+
+    def setup(self):
+        super().setup()
+        _FakeHub.connections.append(self.client_address)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if payload["model"] == "broken":
+            self._send(500, b"model exploded", "text/plain")
+        elif payload["model"] == "cut":  # stream dies mid-body
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self._chunk(f"data: {json.dumps({'type': 'delta', 'textDelta': 'partial'})}\n\n".encode())
+            self.close_connection = True
+        elif self.path == "/generate":
+            self._send(200, json.dumps({"text": _ANSWER, "finishReason": "stop"}).encode(), "application/json")
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for word in _ANSWER.split(" "):
+                self._chunk(f"data: {json.dumps({'type': 'delta', 'textDelta': word + ' '})}\n\n".encode())
+            self._chunk(b': keep-alive\n\ndata: {"type": "message_end", "finishReason": "stop"}\n\n')
+            self._chunk(b"")
+
+    def _send(self, code, body, ctype):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def hub_url():
+    _FakeHub.connections = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeHub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def _backend(url, model="m"):
+    return LLMHubHTTPBackend(base_url=url, provider="openai", model=model)
+
+def test_async_generate_and_stream_match_sync(hub_url):
+    llm = _backend(hub_url)
+    msgs = [{"role": "user", "content": [{"type": "text", "text": "hi"}]}]
+
+    async def run():
+        text = await llm.agenerate(msgs)
+        deltas = [d async for d in llm.astream_generate(msgs)]
+        return text, deltas
+
+    text, deltas = asyncio.run(run())
+    assert text == llm.generate(msgs) == _ANSWER
+    assert "".join(deltas).strip() == "".join(llm.stream_generate(msgs)).strip() == _ANSWER
+    assert llm.last_finish_reason == "stop"
+
+def test_sync_calls_reuse_keep_alive_connections(hub_url):
+    llm = _backend(hub_url)
+    msgs = [{"role": "user", "content": [{"type": "text", "text": "hi"}]}]
+    for _ in range(3):
+        assert llm.generate(msgs) == _ANSWER
+        assert "".join(llm.stream_generate(msgs)).strip() == _ANSWER
+    assert len(_FakeHub.connections) == 1
+
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        assert set(ex.map(lambda _: llm.generate(msgs), range(20))) == {_ANSWER}
+    assert len(_FakeHub.connections) <= 1 + 4
+    with pytest.raises(RuntimeError, match="HTTPError 500"):
+        _backend(hub_url, model="broken").generate(msgs)
+    llm.close()
+
+def test_async_http_error_is_reported(hub_url):
+    llm = _backend(hub_url, model="broken")
+    with pytest.raises(RuntimeError, match="HTTPError 500: model exploded"):
+        asyncio.run(llm.agenerate([]))
+
+def test_stream_connection_errors_are_wrapped():
+    llm = _backend("http://127.0.0.1:9")  # discard port: connection refused
+
+    async def drain():
+        return [d async for d in llm.astream_generate([])]
+
+    with pytest.raises(RuntimeError, match="llmhub request failed"):
+        asyncio.run(drain())
+    with pytest.raises(RuntimeError, match="llmhub request failed"):
+        list(llm.stream_generate([]))
+
+def test_stream_cut_mid_body_is_wrapped(hub_url):
+    llm = _backend(hub_url, model="cut")
+
+    async def drain():
+        return [d async for d in llm.astream_generate([])]
+
+    with pytest.raises(RuntimeError, match="llmhub stream failed"):
+        asyncio.run(drain())
+    with pytest.raises(RuntimeError, match="llmhub stream failed"):
+        list(llm.stream_generate([]))
+
+def test_aanswer_many_concurrent_questions(demo_pack, hub_url):
+    cfg = PackConfig()
+    cfg.llm.backend = "llmhub"
+    cfg.llm.provider, cfg.llm.model = "openai", "m"
+    cfg.llm.extra = {"base_url": hub_url}
+    answerer = Answerer(cfg)
+
+    async def run(session):
+        return await asyncio.gather(*(answerer.aanswer(session, f"tools {i}") for i in range(50)))
+
+    with answerer.open_session(demo_pack) as session:
+        results = asyncio.run(run(session))
+        expected = answerer.answer(session, "tools 0")
+    assert len(results) == 50
+    assert all(r.answer == _ANSWER and r.citations_present for r in results)
+    assert results[0].debug == expected.debug
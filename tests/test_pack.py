@@ -0,0 +1,159 @@
+import zipfile
+
+import numpy as np
+import pytest
+
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.errors import PackReadError
+from yt_channel_expert.pack.pack_builder import PackBuilder
+from yt_channel_expert.pack.pack_reader import PackReader
+
+from conftest import DEMO
+
+def test_pack_read_in_place_matches_extract(demo_pack, tmp_path):
+    cache = tmp_path / "cache"
+    with PackReader(demo_pack, cache_dir=cache) as pr:
+        sec, chunk = pr.load_embeddings()
+        assert isinstance(chunk, np.memmap)
+        n_chunks = pr.connect().execute("SELECT COUNT(*) FROM micro_chunk").fetchone()[0]
+    with PackReader(demo_pack, extract=True) as pr:
+        sec2, chunk2 = pr.load_embeddings()
+    assert np.array_equal(sec, sec2) and np.array_equal(chunk, chunk2)
+    assert chunk.shape[0] == n_chunks
+    assert len(list(cache.iterdir())) == 1
+
+def test_incomplete_pack_is_closed_on_error(tmp_path):
+    bad = tmp_path / "bad.pack"
+    with zipfile.ZipFile(bad, "w") as z:
+        z.writestr("manifest.json", "{}")
+    reader = PackReader(bad)
+    with pytest.raises(PackReadError, match="pack.sqlite"):
+        reader.__enter__()
+    assert reader._zip is None
+
+def test_rebuilt_pack_replaces_its_cache_dir(demo_pack, tmp_path):
+    cache = tmp_path / "cache"
+    pack = tmp_path / "rebuilt.pack"
+    PackBuilder(PackConfig()).build_from_folder(DEMO, pack)
+    with PackReader(demo_pack, cache_dir=cache), PackReader(pack, cache_dir=cache) as pr:
+        old = pr.content_hash
+    cfg = PackConfig()
+    cfg.chunking.micro_chunk_sec = 30
+    PackBuilder(cfg).build_from_folder(DEMO, pack)
+    with PackReader(pack, cache_dir=cache) as pr:
+        assert pr.content_hash != old and pr.connect().execute("SELECT 1").fetchone()
+    # The other pack's dir is kept; only the rebuilt pack's stale one goes
+    assert len(list(cache.iterdir())) == 2 and not (cache / old).exists()
+
+def _fixed_clock() -> str:
+    return "2024-01-01T00:00:00+00:00"
+
+def _pack_contents(pack):
+    with PackReader(pack, extract=True) as pr:
+        conn = pr.connect()
+        rows = {
+            t: conn.execute(f"SELECT * FROM {t} ORDER BY rowid").fetchall()
+            for t in ("channel", "video", "transcript_segment", "section", "micro_chunk")
+        }
+        arrays = {n: pr.load_array(n) for n in pr.members() if n.endswith(".npy")}
+        conn.close()
+        manifest, content_hash = pr.paths.manifest, pr.content_hash
+    return rows, arrays, manifest, content_hash
+
+def test_parallel_build_matches_serial(tmp_path):
+    serial = PackBuilder(PackConfig(), clock=_fixed_clock).build_from_folder(DEMO, tmp_path / "serial.pack")
+    parallel = PackBuilder(PackConfig(), workers=2, clock=_fixed_clock).build_from_folder(DEMO, tmp_path / "parallel.pack")
+    rows_a, arrays_a, manifest_a, hash_a = _pack_contents(serial)
+    rows_b, arrays_b, manifest_b, hash_b = _pack_contents(parallel)
+    assert manifest_a == manifest_b and hash_a == hash_b
+    assert rows_a == rows_b
+    assert arrays_a.keys() == arrays_b.keys()
+    for name in arrays_a:
+        assert np.array_equal(arrays_a[name], arrays_b[name]), name
+
+def test_auto_chaptered_chunks_embedded_once(tmp_path):
+    cfg = PackConfig()
+    cfg.embedding.cache = False
+    builder = PackBuilder(cfg)
+    inner = builder.embedder
+    seen = []
+
+    class _Counting(type(inner)):
+        def embed_texts(self, texts):
+            seen.extend(texts)
+            return inner.embed_texts(texts)
+
+    builder.embedder = _Counting(dim=inner.dim)
+    pack = builder.build_from_folder(DEMO, tmp_path / "demo.pack")
+    with PackReader(pack, extract=True) as pr:
+        conn = pr.connect()
+        chunk_texts = [r[0] for r in conn.execute("SELECT text FROM micro_chunk ORDER BY chunk_id")]
+        n_sections = conn.execute("SELECT COUNT(*) FROM section").fetchone()[0]
+        n_episodes = conn.execute("SELECT COUNT(*) FROM summary").fetchone()[0]
+        _, chunk_emb = pr.load_embeddings()
+        conn.close()
+    assert len(seen) == len(chunk_texts) + n_sections + n_episodes
+    assert np.array_equal(chunk_emb, inner.embed_texts(chunk_texts))
+
+def test_streamed_embedding_batches_match_single_batch(tmp_path, monkeypatch):
+    from yt_channel_expert.pack import pack_builder
+
+    # No embedding cache: the second build must compute every vector, not replay the first's
+    cfg = PackConfig()
+    cfg.embedding.cache = False
+    whole = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "whole.pack")
+    monkeypatch.setattr(pack_builder, "_EMBED_BATCH", 2)
+    streamed = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "streamed.pack")
+    arrays_a = _pack_contents(whole)[1]
+    arrays_b = _pack_contents(streamed)[1]
+    for name in arrays_a:
+        assert np.array_equal(arrays_a[name], arrays_b[name]), name
+
+def test_section_chunk_ranges_cover_each_sections_chunks(demo_pack):
+    with PackReader(demo_pack) as pr:
+        ranges = pr.load_section_chunk_ranges()
+        sec_ids, chunk_ids = pr.load_row_ids()
+        conn = pr.connect()
+        owner = dict(conn.execute("SELECT chunk_id, section_id FROM micro_chunk"))
+    assert ranges.shape == (len(sec_ids), 2)
+    covered = 0
+    for sid, (lo, hi) in zip(sec_ids.tolist(), ranges.tolist()):
+        assert all(owner[int(c)] == sid for c in chunk_ids[lo:hi])
+        covered += hi - lo
+    assert covered == len(chunk_ids)
+
+def test_hierarchical_retrieval_stays_inside_top_sections(demo_pack):
+    from yt_channel_expert.rag.answerer import Answerer
+
+    cfg = PackConfig()
+    cfg.retrieval.hierarchical = True
+    cfg.retrieval.top_sections = 1
+    with Answerer(cfg).open_session(demo_pack) as session:
+        r = session.retriever
+        qvec = r.embedder.embed_texts(["camera checklist"])[0]
+        top = r.section_index.search(qvec, top_k=1)[0].idx
+        lo, hi = r.section_chunk_ranges[top]
+        chunks = session.retrieve("camera checklist").chunks
+    assert chunks and {c.chunk_id for c in chunks} <= set(r.chunk_ids[lo:hi].tolist())
+
+def test_episode_tier_filters_to_top_videos(demo_pack):
+    from yt_channel_expert.rag.answerer import Answerer
+
+    with PackReader(demo_pack) as pr:
+        emb, ep_ids, ep_ranges = pr.load_episodes()
+        sec_ids, _ = pr.load_row_ids()
+        conn = pr.connect()
+        ep_video = dict(conn.execute("SELECT summary_id, video_id FROM summary WHERE kind = 'episode_short'"))
+        sec_video = dict(conn.execute("SELECT section_id, video_id FROM section"))
+    assert emb.n_rows == len(ep_ids) == len(ep_video) == 2
+    for sid, (lo, hi) in zip(ep_ids.tolist(), ep_ranges.tolist()):
+        assert hi > lo and {sec_video[int(s)] for s in sec_ids[lo:hi]} == {ep_video[sid]}
+
+    cfg = PackConfig()
+    cfg.retrieval.top_episodes = 1
+    with Answerer(cfg).open_session(demo_pack) as session:
+        r = session.retriever
+        qvec = r.embedder.embed_texts(["camera checklist"])[0]
+        top_video = ep_video[int(r.episode_ids[r.episode_index.search(qvec, top_k=1)[0].idx])]
+        chunks = session.retrieve("camera checklist").chunks
+    assert chunks and {c.video_id for c in chunks} == {top_video}
@@ -0,0 +1,43 @@
+import json
+import shutil
+
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.pack.pack_builder import PackBuilder
+from yt_channel_expert.rag.answerer import Answerer
+
+from conftest import DEMO
+
+def _ranked(pack, question, cfg=None):
+    with Answerer(cfg or PackConfig()).open_session(pack) as session:
+        ctx = session.retrieve(question)
+    return sorted((round(c.score, 9), c.video_id, c.start_ms, c.text) for c in ctx.chunks)
+
+def test_update_matches_full_rebuild(tmp_path):
+    src = tmp_path / "channel"
+    shutil.copytree(DEMO, src)
+    builder = PackBuilder(PackConfig())
+    pack = builder.build_from_folder(src, tmp_path / "a.pack")
+
+    # vid001 removed, vid002 transcript edited, vid003 added
+    videos = json.loads((src / "videos.json").read_text())
+    new_video = dict(videos[1], video_id="vid003", title="Episode 3")
+    (src / "videos.json").write_text(json.dumps(videos[1:] + [new_video]))
+    (src / "transcripts" / "vid001.srt").unlink()
+    srt = (src / "transcripts" / "vid002.srt").read_text()
+    (src / "transcripts" / "vid002.srt").write_text(srt.replace("cite your sources", "cite your camera checklist"))
+    shutil.copy(src / "transcripts" / "vid002.srt", src / "transcripts" / "vid003.srt")
+
+    res = builder.update_pack(pack, src)
+    assert (res.added, res.changed, res.removed, res.unchanged) == (["vid003"], ["vid002"], ["vid001"], 0)
+    rebuilt = builder.build_from_folder(src, tmp_path / "b.pack")
+    episodes = PackConfig()
+    episodes.retrieval.top_episodes = 1
+    for q in ["camera checklist", "grounded evidence", "tools and workflow"]:
+        assert _ranked(pack, q) == _ranked(rebuilt, q)
+    # vid002 and vid003 share a transcript; only the title separates their episode summaries
+    q = "episode 2 long form deep dive"
+    assert _ranked(pack, q, episodes) == _ranked(rebuilt, q, episodes)
+
+    # Nothing changed: nothing is reprocessed
+    res = builder.update_pack(pack, src)
+    assert (res.added, res.changed, res.removed, res.unchanged) == ([], [], [], 2)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from yt_channel_expert.config import PackConfig
+from yt_channel_expert.errors import PackBuildError
+from yt_channel_expert.index.quantize import StoredEmbeddings, quantize_rows
+from yt_channel_expert.index.vector_index import BruteForceIndex
+from yt_channel_expert.pack.pack_builder import PackBuilder
+from yt_channel_expert.pack.pack_reader import PackReader
+from yt_channel_expert.rag.answerer import Answerer
+
+from conftest import DEMO
+
+def _unit_rows(n, dim, seed=0):
+    x = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def test_int8_rows_decode_within_half_a_step():
+    x = _unit_rows(200, 32)
+    q, scales = quantize_rows(x, "int8")
+    assert q.dtype == np.int8
+    decoded = StoredEmbeddings(matrix=q, scales=scales).rows(0, 200)
+    assert np.all(np.abs(decoded - x) <= scales[:, None] * 0.5 + 1e-7)
+
+def test_rescoring_recovers_exact_ranking():
+    x = _unit_rows(5000, 64, seed=1)
+    qv = _unit_rows(1, 64, seed=2)[0]
+    exact = BruteForceIndex()
+    exact.add(x)
+    q, scales = quantize_rows(x, "int8")
+    approx = BruteForceIndex(rescore_candidates=50)
+    approx.add(q, scales=scales, full=x)
+    want = exact.search(qv, top_k=10)
+    got = approx.search(qv, top_k=10)
+    assert [h.idx for h in got] == [h.idx for h in want]
+    assert np.allclose([h.score for h in got], [h.score for h in want])
+
+def test_quantized_pack_answers_like_float32(tmp_path):
+    cfg = PackConfig()
+    base = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "f32.pack")
+    cfg.embedding.storage_dtype = "int8"
+    cfg.embedding.keep_full_precision = True
+    cfg.retrieval.rescore_candidates = 20
+    small = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "int8.pack")
+    with PackReader(small) as pr:
+        _, chunks = pr.load_stored_embeddings()
+        assert chunks.matrix.dtype == np.int8 and chunks.scales is not None and chunks.full is not None
+
+    def ranked(pack, c):
+        with Answerer(c).open_session(pack) as session:
+            return [ch.chunk_id for ch in session.retrieve("camera checklist").chunks]
+
+    assert ranked(small, cfg) == ranked(base, PackConfig())
+
+def test_update_rejects_different_storage(tmp_path):
+    cfg = PackConfig()
+    cfg.embedding.storage_dtype = "int8"
+    pack = PackBuilder(cfg).build_from_folder(DEMO, tmp_path / "int8.pack")
+    full = PackConfig()
+    full.embedding.storage_dtype = "int8"
+    full.embedding.keep_full_precision = True
+    for other in (PackConfig(), full):
+        with pytest.raises(PackBuildError, match="storage"):
+            PackBuilder(other).update_pack(pack, DEMO)
+    PackBuilder(cfg).update_pack(pack, DEMO)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from yt_channel_expert.embeddings import sentence_transformer_embedder as ste
+from yt_channel_expert.embeddings.sentence_transformer_embedder import SentenceTransformerEmbedder
+
+class _FakeModel:
+    """Stands in for a SentenceTransformer: embeds a text as (len, 1), records calls."""
+
+    def __init__(self):
+        self.calls = []
+        self.pools = 0
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False):
+        self.calls.append(("encode", list(texts), batch_size))
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+    def start_multi_process_pool(self, target_devices):
+        self.pools += 1
+        return {"devices": target_devices}
+
+    def encode_multi_process(self, texts, pool, batch_size=32, chunk_size=None, normalize_embeddings=False):
+        self.calls.append(("pool", list(texts), chunk_size))
+        return self.encode(texts, batch_size)
+
+    def stop_multi_process_pool(self, pool):
+        self.pools -= 1
+
+def test_batches_and_pool(monkeypatch):
+    model = _FakeModel()
+    monkeypatch.setitem(ste._MODELS, "fake", model)
+    texts = ["bb", "a", "dddd", "ccc", "a"]
+
+    emb = SentenceTransformerEmbedder("fake", batch_size=2)
+    out = emb.embed_texts(texts)
+    assert model.calls[0] == ("encode", texts, 2)
+    assert out[:, 0].tolist() == [len(t) for t in texts]
+
+    model.calls.clear()
+    pooled = SentenceTransformerEmbedder("fake", batch_size=2, workers=2)
+    assert np.array_equal(pooled.embed_texts(texts), out)
+    assert model.calls[0][0] == "pool" and model.pools == 1
+    pooled.embed_texts(["x"])  # below workers * batch_size: encoded in-process
+    assert model.calls[-1][0] == "encode"
+    pooled.close()
+    assert model.pools == 0